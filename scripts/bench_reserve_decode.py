@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import sys
+import timeit
+from pathlib import Path
+
+from eth_abi import encode as abi_encode
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+# Allow direct execution: `python ./scripts/bench_reserve_decode.py`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.config import V2PoolConfig
+from src.dex_uniswap_v2 import (
+    GET_RESERVES_CALLDATA,
+    V2_PAIR_ABI,
+    snapshot_from_reserves,
+    decode_get_reserves,
+)
+
+POOL_COUNT = 500
+REPEATS = 5
+
+RETURN_DATA = abi_encode(["uint112", "uint112", "uint32"], [1_234 * 10**18, 2_500_000 * 10**6, 1_700_000_000])
+
+
+class _StaticReservesProvider(BaseProvider):
+    # Answers every eth_call with the same getReserves payload so only CPU cost is measured.
+    def make_request(self, method, params):
+        if method == "eth_chainId":
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x1"}
+        return {"jsonrpc": "2.0", "id": 1, "result": "0x" + RETURN_DATA.hex()}
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+def _make_pools(count: int) -> list[V2PoolConfig]:
+    return [
+        V2PoolConfig(
+            chain="ethereum",
+            dex="uniswap",
+            pool_address=f"0x{index + 1:040x}",
+            token0_symbol="WETH",
+            token1_symbol="USDC",
+            token0_decimals=18,
+            token1_decimals=6,
+        )
+        for index in range(count)
+    ]
+
+
+def _legacy_path(w3: Web3, pools: list[V2PoolConfig]) -> None:
+    # Mirrors the original fetch_snapshot: checksum, contract build and web3 ABI decoding per pool.
+    for pool in pools:
+        pair = w3.eth.contract(address=Web3.to_checksum_address(pool.pool_address), abi=V2_PAIR_ABI)
+        reserve0, reserve1, _ = pair.functions.getReserves().call()
+        snapshot_from_reserves(pool, reserve0, reserve1, 0, 0.0)
+
+
+def _compiled_path(w3: Web3, pools: list[V2PoolConfig]) -> None:
+    for pool in pools:
+        return_data = w3.eth.call({"to": pool.checksum_address, "data": GET_RESERVES_CALLDATA})
+        reserve0, reserve1 = decode_get_reserves(return_data)
+        snapshot_from_reserves(pool, reserve0, reserve1, 0, 0.0)
+
+
+def _decode_only_legacy(pools: list[V2PoolConfig]) -> None:
+    codec = Web3().codec
+    for pool in pools:
+        reserve0, reserve1, _ = codec.decode(["uint112", "uint112", "uint32"], RETURN_DATA)
+        snapshot_from_reserves(pool, reserve0, reserve1, 0, 0.0)
+
+
+def _decode_only_compiled(pools: list[V2PoolConfig]) -> None:
+    for pool in pools:
+        reserve0, reserve1 = decode_get_reserves(RETURN_DATA)
+        snapshot_from_reserves(pool, reserve0, reserve1, 0, 0.0)
+
+
+def _per_pool_us(fn, *args) -> float:
+    best = min(timeit.repeat(lambda: fn(*args), number=1, repeat=REPEATS))
+    return best / POOL_COUNT * 1e6
+
+
+def main() -> None:
+    w3 = Web3(_StaticReservesProvider())
+    pools = _make_pools(POOL_COUNT)
+
+    rows = [
+        ("call+decode legacy", _per_pool_us(_legacy_path, w3, pools)),
+        ("call+decode compiled", _per_pool_us(_compiled_path, w3, pools)),
+        ("decode legacy", _per_pool_us(_decode_only_legacy, pools)),
+        ("decode compiled", _per_pool_us(_decode_only_compiled, pools)),
+    ]
+
+    print(f"getReserves CPU cost per pool ({POOL_COUNT} pools, best of {REPEATS})")
+    print("=" * 60)
+    for name, per_pool_us in rows:
+        print(f"  {name:24} {per_pool_us:10.2f} us/pool")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from aiohttp import web
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+# Allow direct execution: `python ./scripts/bench_suite.py`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.bench_ratio_engine import CHAINS, make_route_fees, make_snapshots
+from scripts.bench_reserve_decode import RETURN_DATA
+from scripts.fake_rpc_server import FaultProfile, SimChain, build_app, seed_configured_pools
+from src.collector import collect_v2_snapshots, collect_v2_snapshots_async, collect_v2_snapshots_by_chain
+from src.config import ArbitrageConfig, V2PoolConfig, get_v2_pool_configs
+from src.dex_uniswap_v2 import AsyncUniswapV2ReserveReader, MulticallV2ReserveReader, UniswapV2ReserveReader
+from src.fees import route_pairs_from_snapshots
+from src.ratio import compute_arbitrage_opportunities, compute_cross_chain_spreads
+from src.rpc_clients import build_async_rpc_client, build_web3_client
+
+# Micro-benchmarks time the hot loop in-process; end-to-end benchmarks run whole collection
+# cycles against scripts/fake_rpc_server.py. Results are JSON and can be checked against a
+# stored baseline: `--save-baseline` once on a reference machine, then compare on later runs.
+
+DEFAULT_BASELINE = PROJECT_ROOT / "scripts" / "bench_baseline.json"
+MICRO_SIZES = (10, 1_000, 10_000, 100_000)
+E2E_SIZES = (10, 100, 1_000)
+VENUES_PER_PAIR = 12
+# Fields gated against the baseline; the rest (per-pool rates, worst cycle) are informational.
+GATED_FIELDS = ("ms", "cycle_ms")
+# Repeat a measurement until this much time is spent (at least once, at most MAX_REPEATS).
+TIME_BUDGET_SEC = 1.0
+MAX_REPEATS = 5
+
+
+class _StaticReservesProvider(BaseProvider):
+    # Answers every request with the same getReserves payload so only CPU cost is measured.
+    def make_request(self, method, params):
+        if method == "eth_blockNumber":
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x121eac0"}
+        return {"jsonrpc": "2.0", "id": 1, "result": "0x" + RETURN_DATA.hex()}
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+def _make_pools(count: int) -> list[V2PoolConfig]:
+    return [
+        V2PoolConfig(
+            chain=CHAINS[index % len(CHAINS)],
+            dex="uniswap",
+            pool_address=f"0x{index + 1:040x}",
+            token0_symbol=f"TKN{index // VENUES_PER_PAIR}",
+            token1_symbol="USD",
+            token0_decimals=18,
+            token1_decimals=6,
+        )
+        for index in range(count)
+    ]
+
+
+def _pools_json(pools: list[V2PoolConfig]) -> str:
+    return json.dumps(
+        [
+            {
+                "chain": pool.chain,
+                "dex": pool.dex,
+                "pool_address": pool.pool_address,
+                "token0_symbol": pool.token0_symbol,
+                "token1_symbol": pool.token1_symbol,
+                "token0_decimals": pool.token0_decimals,
+                "token1_decimals": pool.token1_decimals,
+            }
+            for pool in pools
+        ]
+    )
+
+
+def _best_ms(fn, *args) -> float:
+    # Like timeit: GC stays off while timing, and the best run is reported.
+    timings: list[float] = []
+    while len(timings) < MAX_REPEATS and (not timings or sum(timings) < TIME_BUDGET_SEC):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            fn(*args)
+            timings.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return min(timings) * 1000
+
+
+def _fetch_all(reader: UniswapV2ReserveReader, pools: list[V2PoolConfig]) -> None:
+    for pool in pools:
+        reader.fetch_snapshot(pool)
+
+
+def _parse_pools(raw: str) -> None:
+    os.environ["V2_POOLS_JSON"] = raw
+    get_v2_pool_configs()
+
+
+def run_micro(sizes: tuple[int, ...]) -> dict[str, dict[str, float]]:
+    cfg = ArbitrageConfig(
+        volume=1000.0,
+        min_diff_pct=0.1,
+        min_net_profit=0.0,
+        min_net_profit_pct=0.0,
+        dex_fee_bps_per_swap=30.0,
+        gas_units_per_swap=220_000,
+        bridge_fee_url_template="",
+        bridge_fee_json_path="",
+    )
+    route_fees = make_route_fees(cfg.volume)
+    reader = UniswapV2ReserveReader({chain: Web3(_StaticReservesProvider()) for chain in CHAINS})
+    saved_pools_json = os.environ.get("V2_POOLS_JSON")
+    results: dict[str, dict[str, float]] = {}
+    try:
+        for size in sizes:
+            pools = _make_pools(size)
+            snapshots = make_snapshots(size, VENUES_PER_PAIR)
+            raw = _pools_json(pools)
+            cases = [
+                ("fetch_snapshot", _fetch_all, (reader, pools)),
+                ("compute_cross_chain_spreads", compute_cross_chain_spreads, (snapshots,)),
+                ("compute_arbitrage_opportunities", compute_arbitrage_opportunities, (snapshots, cfg, route_fees)),
+                ("route_pairs_from_snapshots", route_pairs_from_snapshots, (snapshots,)),
+                ("get_v2_pool_configs", _parse_pools, (raw,)),
+            ]
+            for name, fn, args in cases:
+                ms = _best_ms(fn, *args)
+                results[f"micro.{name}.n={size}"] = {"ms": ms, "us_per_pool": ms * 1000 / size}
+                print(f"  {name:34} n={size:<7} {ms:11.2f}ms  {ms * 1000 / size:9.2f}us/pool")
+    finally:
+        if saved_pools_json is None:
+            os.environ.pop("V2_POOLS_JSON", None)
+        else:
+            os.environ["V2_POOLS_JSON"] = saved_pools_json
+    return results
+
+
+class _SimServer:
+    # Runs the simulated chains on a private event loop so the collectors under test own the main one.
+    def __init__(self, faults: FaultProfile, pools: list[V2PoolConfig], block_time_sec: float) -> None:
+        self.chains = {chain: SimChain(chain, block_time_sec) for chain in CHAINS}
+        seed_configured_pools(self.chains, pools, seed=0)
+        self.faults = faults
+        self.loop = asyncio.new_event_loop()
+        self.port = 0
+        self._runner: web.AppRunner | None = None
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def __enter__(self) -> _SimServer:
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+    async def _start(self) -> None:
+        self._runner = web.AppRunner(build_app(self.chains, self.faults))
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def url(self, chain: str) -> str:
+        return f"http://127.0.0.1:{self.port}/{chain}"
+
+
+async def _run_cycles(collect, pools: list[V2PoolConfig], cycles: int) -> tuple[list[float], int]:
+    timings: list[float] = []
+    errors = 0
+    for _ in range(cycles):
+        start = time.perf_counter()
+        _, cycle_errors = await collect(pools)
+        timings.append(time.perf_counter() - start)
+        errors += len(cycle_errors)
+    return timings, errors
+
+
+async def _run_async_cycles(server: _SimServer, pools: list[V2PoolConfig], cycles: int) -> tuple[list[float], int]:
+    # aiohttp sessions bind to the running loop, so clients are created and closed inside it.
+    clients = {chain: build_async_rpc_client(server.url(chain)) for chain in CHAINS}
+    reader = AsyncUniswapV2ReserveReader(clients)
+    try:
+        return await _run_cycles(lambda batch: collect_v2_snapshots_async(reader, batch), pools, cycles)
+    finally:
+        for client in clients.values():
+            await client.aclose()
+
+
+def run_e2e(
+    sizes: tuple[int, ...],
+    cycles: int,
+    faults: FaultProfile,
+    block_time_sec: float,
+) -> dict[str, dict[str, float]]:
+    results: dict[str, dict[str, float]] = {}
+    pools_by_size = {size: _make_pools(size) for size in sizes}
+    all_pools = pools_by_size[max(sizes)]
+    with _SimServer(faults, all_pools, block_time_sec) as server:
+        chain_web3 = {chain: build_web3_client(server.url(chain)) for chain in CHAINS}
+        readers = {
+            "collect_v2_snapshots": lambda pools: asyncio.run(
+                _run_cycles(lambda batch: collect_v2_snapshots(UniswapV2ReserveReader(chain_web3), batch), pools, cycles)
+            ),
+            "collect_v2_snapshots_async": lambda pools: asyncio.run(_run_async_cycles(server, pools, cycles)),
+            "collect_v2_snapshots_by_chain": lambda pools: asyncio.run(
+                _run_cycles(
+                    lambda batch: collect_v2_snapshots_by_chain(MulticallV2ReserveReader(chain_web3), batch),
+                    pools,
+                    cycles,
+                )
+            ),
+        }
+        for size in sizes:
+            for name, run in readers.items():
+                timings, errors = run(pools_by_size[size])
+                cycle_ms = statistics.median(timings) * 1000
+                results[f"e2e.{name}.n={size}"] = {
+                    "cycle_ms": cycle_ms,
+                    "p_max_cycle_ms": max(timings) * 1000,
+                    "pools_per_sec": size / statistics.median(timings),
+                    "errors": errors,
+                }
+                print(
+                    f"  {name:34} n={size:<7} cycle={cycle_ms:10.1f}ms  "
+                    f"{size / statistics.median(timings):10.0f} pools/s  errors={errors}"
+                )
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    # A gated time may grow by `tolerance` before the case counts as regressed.
+    regressions: list[str] = []
+    for key, metrics in results.items():
+        reference = baseline.get(key, {})
+        for field in GATED_FIELDS:
+            value, base_value = metrics.get(field), reference.get(field)
+            if value is not None and base_value and value > base_value * (1 + tolerance):
+                regressions.append(f"{key} {field}: {value:.2f} vs baseline {base_value:.2f}")
+    return regressions
+
+
+def _sizes(value: str) -> tuple[int, ...]:
+    return tuple(int(item) for item in value.split(",") if item)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro and end-to-end benchmarks for the monitor pipeline.")
+    parser.add_argument("--micro-sizes", type=_sizes, default=MICRO_SIZES)
+    parser.add_argument("--e2e-sizes", type=_sizes, default=E2E_SIZES)
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--skip-e2e", action="store_true")
+    parser.add_argument("--cycles", type=int, default=3, help="collection cycles per end-to-end case")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="median injected RPC latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.0, help="0 keeps injected latency fixed")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--block-time", type=float, default=2.0)
+    parser.add_argument("--output", type=Path, default=None, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    results: dict[str, dict[str, float]] = {}
+    if not args.skip_micro:
+        print("Micro-benchmarks (best of up to 5 runs)")
+        print("=" * 88)
+        results.update(run_micro(args.micro_sizes))
+    if not args.skip_e2e:
+        faults = FaultProfile(latency_ms=args.latency_ms, latency_sigma=args.latency_sigma, error_rate=args.error_rate)
+        print(f"End-to-end collection (median of {args.cycles} cycles, {args.latency_ms:.0f}ms median RPC latency)")
+        print("=" * 88)
+        results.update(run_e2e(args.e2e_sizes, args.cycles, faults, args.block_time))
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} cpus={os.cpu_count()}",
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, sort_keys=True))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2, sort_keys=True))
+        print(f"Baseline saved to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(results, baseline.get("results", {}), args.tolerance)
+    print(f"Baseline {args.baseline} ({baseline.get('machine', '?')}, {baseline.get('created_at', '?')})")
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"No regressions beyond {args.tolerance:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import argparse
 import sys
 import time
 from pathlib import Path
@@ -9,37 +10,69 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from src.config import get_chain_configs
+from src.config import get_chain_configs, get_rpc_routing_config
 from src.rpc_clients import build_web3_client
+from src.rpc_router import EndpointPool, build_endpoint_pool
+
+
+def _probe(pool: EndpointPool, samples: int) -> None:
+    # Feeds the same rolling stats the monitor routes on, then prints them in routing order.
+    for endpoint in pool.endpoints:
+        w3 = build_web3_client(endpoint.url)
+        try:
+            pool.observe_chain_id(endpoint, w3.eth.chain_id)
+        except Exception as exc:
+            pool.record_failure(endpoint, None, str(exc))
+            continue
+        if endpoint.disabled:
+            continue
+        for _ in range(samples):
+            start = time.perf_counter()
+            try:
+                block = w3.eth.block_number
+            except Exception as exc:
+                pool.record_failure(endpoint, time.perf_counter() - start, str(exc))
+                continue
+            pool.record_success(endpoint, time.perf_counter() - start)
+            pool.observe_head(endpoint, block)
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Probe every configured RPC endpoint.")
+    parser.add_argument("--samples", type=int, default=5, help="eth_blockNumber calls per endpoint")
+    args = parser.parse_args()
+
     chains = get_chain_configs()
     if not chains:
         print("No RPC endpoints found in .env. Add at least ETH_RPC_URL.")
         return
 
+    routing = get_rpc_routing_config()
     print("RPC health check")
-    print("=" * 60)
+    print("=" * 100)
 
     for chain in chains:
-        start = time.perf_counter()
-        try:
-            w3 = build_web3_client(chain.rpc_url)
-            chain_id = w3.eth.chain_id
-            latest_block = w3.eth.block_number
-            latency_ms = (time.perf_counter() - start) * 1000
-            status = "OK"
-            if chain_id != chain.expected_chain_id:
+        pool = build_endpoint_pool(chain, routing)
+        _probe(pool, args.samples)
+        ranked = pool.ranked()
+        for endpoint in pool.endpoints:
+            if endpoint.disabled:
                 status = "MISMATCH"
+            elif endpoint.chain_id is None:
+                status = "FAIL"
+            elif not pool.is_healthy(endpoint):
+                status = "DEGRADED"
+            else:
+                status = "PRIMARY" if endpoint is ranked[0] else "OK"
+            lag = pool.best_head - endpoint.head_block if endpoint.head_block is not None else None
             print(
-                f"[{chain.name:10}] {status:<9} chain_id={chain_id:<8} "
-                f"expected={chain.expected_chain_id:<8} latest_block={latest_block:<12} "
-                f"latency={latency_ms:.1f}ms"
+                f"[{chain.name:10}] #{endpoint.index} {status:<9} chain_id={endpoint.chain_id or '-':<8} "
+                f"expected={chain.expected_chain_id:<8} head={endpoint.head_block or '-':<12} "
+                f"lag={lag if lag is not None else '-':<4} p50={endpoint.quantile(0.5) * 1000:7.1f}ms "
+                f"p95={endpoint.quantile(0.95) * 1000:7.1f}ms errors={endpoint.error_rate * 100:5.1f}%"
             )
-        except Exception as exc:
-            latency_ms = (time.perf_counter() - start) * 1000
-            print(f"[{chain.name:10}] FAIL error={exc} latency={latency_ms:.1f}ms")
+            if endpoint.last_error:
+                print(f"{'':14} last_error={endpoint.last_error}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,416 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from aiohttp import web
+from eth_abi import decode as abi_decode
+from eth_abi import encode as abi_encode
+
+# Allow direct execution: `python ./scripts/fake_rpc_server.py`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.config import V2PoolConfig, get_v2_pool_configs
+from src.dex_uniswap_v2 import GET_RESERVES_SELECTOR
+from src.fees import CHAIN_NATIVE_COINGECKO_ID
+from src.multicall import AGGREGATE3_SELECTOR, GET_BLOCK_NUMBER_SELECTOR, MULTICALL3_ADDRESS
+from src.sync_tracker import SYNC_TOPIC
+
+# Local stand-in for every endpoint the monitor talks to: one JSON-RPC chain per path
+# (http://host:port/<chain>), plus CoinGecko and bridge-quote lookalikes. Point the existing
+# *_RPC_URL, COINGECKO_API_URL and ARB_BRIDGE_FEE_* variables at it.
+
+CHAIN_IDS = {"ethereum": 1, "bsc": 56, "polygon": 137, "avalanche": 43114, "arbitrum": 42161, "base": 8453}
+CHAIN_ENV_PREFIX = {"ethereum": "ETH", "bsc": "BSC", "polygon": "POLYGON", "avalanche": "AVALANCHE",
+                    "arbitrum": "ARBITRUM", "base": "BASE"}
+TOKEN0_SELECTOR = bytes.fromhex("0dfe1681")
+TOKEN1_SELECTOR = bytes.fromhex("d21220a7")
+DECIMALS_SELECTOR = bytes.fromhex("313ce567")
+SYMBOL_SELECTOR = bytes.fromhex("95d89b41")
+HISTORY_BLOCKS = 512
+DEFAULT_NATIVE_PRICES = {
+    coingecko_id: {"ethereum": 3000.0, "binancecoin": 550.0, "matic-network": 0.7, "avalanche-2": 30.0}.get(coingecko_id, 1.0)
+    for coingecko_id in CHAIN_NATIVE_COINGECKO_ID.values()
+}
+
+
+def _seed(*parts: object) -> int:
+    return int.from_bytes(hashlib.sha256(":".join(map(str, parts)).encode()).digest()[:8], "big")
+
+
+def token_address(symbol: str, decimals: int) -> str:
+    # The same token resolves to the same address on every simulated chain.
+    return "0x" + hashlib.sha256(f"token:{symbol}:{decimals}".encode()).hexdigest()[:40]
+
+
+@dataclass
+class SimPool:
+    address: str
+    reserve0: float
+    reserve1: float
+    rng: random.Random
+    last_block: int
+    # (block, log_index, reserve0, reserve1) for each simulated swap, newest last.
+    history: deque = field(default_factory=lambda: deque(maxlen=HISTORY_BLOCKS))
+    token0: str = ""
+    token1: str = ""
+
+
+class SimChain:
+    def __init__(
+        self,
+        name: str,
+        block_time_sec: float,
+        start_block: int = 1_000_000,
+        swap_prob: float = 0.3,
+        volatility: float = 0.002,
+        seed: int = 0,
+    ) -> None:
+        self.name = name
+        self.chain_id = CHAIN_IDS.get(name, 1337)
+        self.block_time_sec = block_time_sec
+        self.start_block = start_block
+        self.swap_prob = swap_prob
+        self.volatility = volatility
+        self.seed = seed
+        self.started = time.monotonic()
+        self.pools: dict[str, SimPool] = {}
+        # token address -> (symbol, decimals), answered by symbol() and decimals().
+        self.tokens: dict[str, tuple[str, int]] = {}
+        self.base_gas_price = 1 + _seed(seed, name) % 40
+
+    def head(self) -> int:
+        return self.start_block + int((time.monotonic() - self.started) / self.block_time_sec)
+
+    def add_pool(
+        self,
+        address: str,
+        reserve0: float,
+        reserve1: float,
+        token0: tuple[str, int] | None = None,
+        token1: tuple[str, int] | None = None,
+    ) -> None:
+        key = address.lower()
+        # token0/token1 are (symbol, decimals); unnamed pools get tokens derived from their address.
+        token0 = token0 or (f"T{key[-4:].upper()}A", 18)
+        token1 = token1 or (f"T{key[-4:].upper()}B", 18)
+        addresses = (token_address(*token0), token_address(*token1))
+        self.tokens.update(zip(addresses, (token0, token1)))
+        self.pools[key] = SimPool(
+            key,
+            reserve0,
+            reserve1,
+            random.Random(_seed(self.seed, self.name, key)),
+            self.head(),
+            token0=addresses[0],
+            token1=addresses[1],
+        )
+
+    def pool(self, address: str) -> SimPool:
+        key = address.lower()
+        if key not in self.pools:
+            # Unknown pools get a 1:1 pair with 18/18 decimals so any address answers.
+            self.add_pool(key, 1_000_000 * 10**18, 1_000_000 * 10**18)
+        pool = self.pools[key]
+        self._advance(pool, self.head())
+        return pool
+
+    def reserves_at(self, pool: SimPool, block: int) -> tuple[int, int]:
+        # Like a pruned full node: state older than the kept window is gone, not approximated.
+        if block <= self.head() - HISTORY_BLOCKS:
+            state_root = hashlib.sha256(f"{self.name}:{block}:state".encode()).hexdigest()
+            raise RpcError(-32000, f"missing trie node {state_root} (path ) state is not available")
+        reserve0, reserve1 = pool.reserve0, pool.reserve1
+        for entry_block, _, entry0, entry1 in reversed(pool.history):
+            if entry_block <= block:
+                return int(entry0), int(entry1)
+            reserve0, reserve1 = entry0, entry1
+        return int(reserve0), int(reserve1)
+
+    def gas_price(self) -> int:
+        return int(self.base_gas_price * 10**9 * (1 + 0.1 * math.sin(self.head() / 10)))
+
+    def _advance(self, pool: SimPool, head: int) -> None:
+        # Lazily replays the random walk for every block since the pool was last touched.
+        first = max(pool.last_block + 1, head - HISTORY_BLOCKS + 1)
+        for block in range(first, head + 1):
+            if pool.rng.random() >= self.swap_prob:
+                continue
+            step = pool.rng.gauss(0.0, self.volatility)
+            pool.reserve0 *= math.exp(step)
+            pool.reserve1 *= math.exp(-step)
+            pool.history.append((block, 0, pool.reserve0, pool.reserve1))
+        pool.last_block = max(pool.last_block, head)
+
+
+@dataclass
+class FaultProfile:
+    latency_ms: float = 20.0
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+
+    async def delay(self) -> None:
+        if self.latency_ms > 0:
+            # Log-normal around the median: mostly fast, with a long tail like real providers.
+            await asyncio.sleep(random.lognormvariate(math.log(self.latency_ms / 1000), self.latency_sigma))
+
+    def should_fail(self) -> bool:
+        return random.random() < self.error_rate
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+def _block_param(chain: SimChain, value: object) -> int:
+    if value in (None, "latest", "pending", "safe", "finalized"):
+        return chain.head()
+    if value == "earliest":
+        return 0
+    return int(str(value), 16)
+
+
+def _eth_call(chain: SimChain, params: list) -> str:
+    call = params[0]
+    block = _block_param(chain, params[1] if len(params) > 1 else "latest")
+    if block > chain.head():
+        raise RpcError(-32000, "header not found")
+    to = str(call.get("to", "")).lower()
+    data = bytes.fromhex(str(call.get("data") or call.get("input") or "0x")[2:])
+
+    if to == MULTICALL3_ADDRESS.lower():
+        if data[:4] == GET_BLOCK_NUMBER_SELECTOR:
+            return "0x" + abi_encode(["uint256"], [block]).hex()
+        if data[:4] == AGGREGATE3_SELECTOR:
+            (calls,) = abi_decode(["(address,bool,bytes)[]"], data[4:])
+            results = []
+            for target, _, call_data in calls:
+                if call_data[:4] == GET_BLOCK_NUMBER_SELECTOR:
+                    results.append((True, abi_encode(["uint256"], [block])))
+                    continue
+                return_data = _static_call(chain, target.lower(), call_data, block)
+                results.append((return_data is not None, return_data or b""))
+            return "0x" + abi_encode(["(bool,bytes)[]"], [results]).hex()
+        raise RpcError(-32000, "execution reverted")
+
+    return_data = _static_call(chain, to, data, block)
+    if return_data is None:
+        raise RpcError(-32000, "execution reverted")
+    return "0x" + return_data.hex()
+
+
+def _static_call(chain: SimChain, to: str, data: bytes, block: int) -> bytes | None:
+    # Pair getters (getReserves, token0, token1) and ERC-20 metadata; None means revert.
+    selector = data[:4]
+    if selector == GET_RESERVES_SELECTOR:
+        return _encode_reserves(chain, to, block)
+    if selector in (TOKEN0_SELECTOR, TOKEN1_SELECTOR):
+        pool = chain.pool(to)
+        return abi_encode(["address"], [pool.token0 if selector == TOKEN0_SELECTOR else pool.token1])
+    token = chain.tokens.get(to)
+    if token is None:
+        return None
+    if selector == DECIMALS_SELECTOR:
+        return abi_encode(["uint8"], [token[1]])
+    if selector == SYMBOL_SELECTOR:
+        return abi_encode(["string"], [token[0]])
+    return None
+
+
+def _encode_reserves(chain: SimChain, address: str, block: int) -> bytes:
+    pool = chain.pool(address)
+    reserve0, reserve1 = chain.reserves_at(pool, block)
+    return abi_encode(["uint112", "uint112", "uint32"], [reserve0, reserve1, int(time.time()) % 2**32])
+
+
+def _eth_get_logs(chain: SimChain, params: list) -> list[dict]:
+    query = params[0]
+    head = chain.head()
+    from_block = _block_param(chain, query.get("fromBlock"))
+    to_block = min(_block_param(chain, query.get("toBlock")), head)
+    addresses = query.get("address") or list(chain.pools)
+    if isinstance(addresses, str):
+        addresses = [addresses]
+    topics = query.get("topics") or []
+    if topics and topics[0] not in (None, SYNC_TOPIC):
+        return []
+
+    logs = []
+    for address in addresses:
+        pool = chain.pool(address)
+        for block, log_index, reserve0, reserve1 in pool.history:
+            if from_block <= block <= to_block:
+                block_hash = "0x" + hashlib.sha256(f"{chain.name}:{block}".encode()).hexdigest()
+                logs.append(
+                    {
+                        "address": address,
+                        "topics": [SYNC_TOPIC],
+                        "data": "0x" + abi_encode(["uint112", "uint112"], [int(reserve0), int(reserve1)]).hex(),
+                        "blockNumber": hex(block),
+                        "blockHash": block_hash,
+                        "transactionHash": "0x" + hashlib.sha256(f"{block_hash}:{address}".encode()).hexdigest(),
+                        "transactionIndex": "0x0",
+                        "logIndex": hex(log_index),
+                        "removed": False,
+                    }
+                )
+    return logs
+
+
+def _dispatch(chain: SimChain, method: str, params: list) -> object:
+    if method == "eth_chainId":
+        return hex(chain.chain_id)
+    if method == "net_version":
+        return str(chain.chain_id)
+    if method == "eth_blockNumber":
+        return hex(chain.head())
+    if method == "eth_gasPrice":
+        return hex(chain.gas_price())
+    if method == "eth_call":
+        return _eth_call(chain, params)
+    if method == "eth_getLogs":
+        return _eth_get_logs(chain, params)
+    raise RpcError(-32601, f"method {method} not supported by the simulator")
+
+
+def _answer(chain: SimChain, faults: FaultProfile, request: dict) -> dict:
+    reply: dict = {"jsonrpc": "2.0", "id": request.get("id")}
+    if faults.should_fail():
+        reply["error"] = {"code": -32005, "message": "simulated rate limit"}
+        return reply
+    try:
+        reply["result"] = _dispatch(chain, request.get("method", ""), request.get("params") or [])
+    except RpcError as exc:
+        reply["error"] = {"code": exc.code, "message": str(exc)}
+    return reply
+
+
+def build_app(
+    chains: dict[str, SimChain],
+    faults: FaultProfile,
+    native_prices: dict[str, float] | None = None,
+    bridge_fee_bps: float = 5.0,
+) -> web.Application:
+    prices = native_prices or DEFAULT_NATIVE_PRICES
+
+    async def rpc(request: web.Request) -> web.Response:
+        chain = chains.get(request.match_info["chain"])
+        if chain is None:
+            raise web.HTTPNotFound(text=f"unknown chain {request.match_info['chain']}")
+        payload = await request.json()
+        await faults.delay()
+        if isinstance(payload, list):
+            return web.json_response([_answer(chain, faults, item) for item in payload])
+        return web.json_response(_answer(chain, faults, payload))
+
+    async def coingecko_price(request: web.Request) -> web.Response:
+        await faults.delay()
+        if faults.should_fail():
+            raise web.HTTPTooManyRequests()
+        ids = [item for item in request.query.get("ids", "").split(",") if item]
+        drift = 1 + 0.01 * math.sin(time.time() / 60)
+        return web.json_response({coin: {"usd": prices.get(coin, 1.0) * drift} for coin in ids})
+
+    async def bridge_quote(request: web.Request) -> web.Response:
+        await faults.delay()
+        if faults.should_fail():
+            raise web.HTTPServiceUnavailable()
+        amount = float(request.query.get("amount", "0"))
+        return web.json_response({"fee": {"usd": 0.5 + amount * bridge_fee_bps / 10_000}})
+
+    app = web.Application()
+    app.router.add_get("/coingecko/simple/price", coingecko_price)
+    app.router.add_get("/bridge/quote", bridge_quote)
+    app.router.add_post("/{chain}", rpc)
+    return app
+
+
+def seed_configured_pools(chains: dict[str, SimChain], pools: list[V2PoolConfig], seed: int) -> None:
+    # Pools of one pair share a base price across chains, with a small per-pool offset, so
+    # the monitor sees realistic cross-chain spreads instead of unrelated random prices.
+    for pool in pools:
+        chain = chains.get(pool.chain)
+        if chain is None:
+            continue
+        base_price = 1 + _seed(seed, pool.pair_key) % 3000
+        offset = 1 + ((_seed(seed, pool.chain, pool.pool_address) % 2001) - 1000) / 100_000
+        reserve0 = 10_000 * 10**pool.token0_decimals
+        reserve1 = 10_000 * base_price * offset * 10**pool.token1_decimals
+        chain.add_pool(
+            pool.pool_address,
+            reserve0,
+            reserve1,
+            token0=(pool.token0_symbol, pool.token0_decimals),
+            token1=(pool.token1_symbol, pool.token1_decimals),
+        )
+
+
+async def serve(host: str, port: int, chains: dict[str, SimChain], faults: FaultProfile) -> None:
+    runner = web.AppRunner(build_app(chains, faults))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    base = f"http://{host}:{port}"
+    print(f"Simulated chains on {base} (Ctrl+C to stop). Environment:")
+    for name in chains:
+        print(f"  {CHAIN_ENV_PREFIX.get(name, name.upper())}_RPC_URL={base}/{name}")
+    print(f"  COINGECKO_API_URL={base}/coingecko")
+    print(f"  ARB_BRIDGE_FEE_URL_TEMPLATE={base}/bridge/quote?from={{buy_chain}}&to={{sell_chain}}&amount={{volume}}")
+    print("  ARB_BRIDGE_FEE_JSON_PATH=fee.usd")
+    try:
+        await asyncio.Future()
+    finally:
+        await runner.cleanup()
+
+
+def _parse_chains(value: str) -> list[tuple[str, float]]:
+    chains = []
+    for item in value.split(","):
+        name, _, block_time = item.partition(":")
+        chains.append((name.strip().lower(), float(block_time or 2.0)))
+    return chains
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve simulated JSON-RPC chains plus fee API stand-ins.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument(
+        "--chains",
+        type=_parse_chains,
+        default=_parse_chains("ethereum:12,arbitrum:0.25,base:2,polygon:2,bsc:3,avalanche:2"),
+        help="comma-separated name:block_time_sec",
+    )
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="median response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal spread of latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls that fail")
+    parser.add_argument("--swap-prob", type=float, default=0.3, help="chance a pool trades in a block")
+    parser.add_argument("--volatility", type=float, default=0.002, help="per-swap log price step")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    chains = {
+        name: SimChain(name, block_time, swap_prob=args.swap_prob, volatility=args.volatility, seed=args.seed)
+        for name, block_time in args.chains
+    }
+    seed_configured_pools(chains, get_v2_pool_configs(), args.seed)
+    faults = FaultProfile(latency_ms=args.latency_ms, latency_sigma=args.latency_sigma, error_rate=args.error_rate)
+    try:
+        asyncio.run(serve(args.host, args.port, chains, faults))
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import uuid
+
+import websockets
+
+# Local stand-in for a node's WebSocket endpoint: answers eth_subscribe("newHeads")
+# and pushes a synthetic head every --block-time seconds. Point *_WS_URL at it.
+
+
+async def _serve_heads(ws, block_time_sec: float, start_block: int, started: float, drop_after: int) -> None:
+    request = json.loads(await ws.recv())
+    if request.get("method") != "eth_subscribe" or request.get("params") != ["newHeads"]:
+        await ws.send(json.dumps({"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32601}}))
+        return
+
+    subscription_id = "0x" + uuid.uuid4().hex
+    await ws.send(json.dumps({"jsonrpc": "2.0", "id": request.get("id"), "result": subscription_id}))
+    loop = asyncio.get_running_loop()
+    sent = 0
+    while drop_after <= 0 or sent < drop_after:
+        await asyncio.sleep(block_time_sec)
+        number = start_block + int((loop.time() - started) / block_time_sec)
+        await ws.send(
+            json.dumps(
+                {
+                    "jsonrpc": "2.0",
+                    "method": "eth_subscription",
+                    "params": {
+                        "subscription": subscription_id,
+                        "result": {"number": hex(number), "timestamp": hex(int(loop.time()))},
+                    },
+                }
+            )
+        )
+        sent += 1
+    # Simulates a provider dropping the socket so clients exercise resubscription.
+    await ws.close()
+
+
+async def serve(host: str, port: int, block_time_sec: float, start_block: int, drop_after: int) -> None:
+    # Heads follow one server-wide clock so numbering continues across reconnects.
+    started = asyncio.get_running_loop().time()
+
+    async def handler(ws, *_):
+        await _serve_heads(ws, block_time_sec, start_block, started, drop_after)
+
+    async with websockets.serve(handler, host, port):
+        print(f"Synthetic newHeads on ws://{host}:{port} every {block_time_sec}s (Ctrl+C to stop)")
+        await asyncio.Future()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve synthetic newHeads over WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8546)
+    parser.add_argument("--block-time", type=float, default=2.0)
+    parser.add_argument("--start-block", type=int, default=1_000_000)
+    parser.add_argument("--drop-after", type=int, default=0, help="close each socket after N heads (0 = never)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.block_time, args.start_block, args.drop_after))
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Allow direct execution: `python ./scripts/run_backtest.py`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.backtest import config_grid, sweep
+from src.config import get_arbitrage_config
+
+
+def _floats(value: str) -> list[float]:
+    return [float(item) for item in value.split(",") if item]
+
+
+def _ints(value: str) -> list[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def _iso_time(value: str) -> datetime:
+    # History is recorded in UTC, so a time without an offset is taken as UTC.
+    parsed = datetime.fromisoformat(value)
+    return parsed.replace(tzinfo=timezone.utc) if parsed.tzinfo is None else parsed
+
+
+def main() -> None:
+    base = get_arbitrage_config()
+    parser = argparse.ArgumentParser(description="Replay recorded history against a grid of arbitrage configs.")
+    parser.add_argument("history_dir", help="HISTORY_DIR written by run_price_monitor.py")
+    parser.add_argument("--start", type=_iso_time, default=None, help="ISO time, inclusive; UTC if no offset")
+    parser.add_argument("--end", type=_iso_time, default=None, help="ISO time, exclusive; UTC if no offset")
+    parser.add_argument("--min-diff-pct", type=_floats, default=[base.min_diff_pct])
+    parser.add_argument("--min-net-profit", type=_floats, default=[base.min_net_profit])
+    parser.add_argument("--dex-fee-bps", type=_floats, default=[base.dex_fee_bps_per_swap])
+    parser.add_argument("--gas-units", type=_ints, default=[base.gas_units_per_swap])
+    parser.add_argument(
+        "--recorded-gas-units",
+        type=int,
+        default=base.gas_units_per_swap,
+        help="ARB_GAS_UNITS_PER_SWAP in effect while recording",
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    configs = config_grid(
+        base,
+        min_diff_pct=args.min_diff_pct,
+        min_net_profit=args.min_net_profit,
+        dex_fee_bps_per_swap=args.dex_fee_bps,
+        gas_units_per_swap=args.gas_units,
+    )
+    summaries = sweep(
+        args.history_dir,
+        configs,
+        start=args.start,
+        end=args.end,
+        recorded_gas_units=args.recorded_gas_units,
+        workers=args.workers,
+    )
+
+    print(f"Backtest over {summaries[0].events if summaries else 0} events, {len(configs)} configs")
+    print("=" * 110)
+    print(
+        f"  {'diff%':>7} {'min_net':>8} {'dex_bps':>8} {'gas':>8} | {'opps':>7} {'total_net':>12} "
+        f"{'best':>10} {'mean':>9} {'dur_s':>8} {'conc':>5} {'replay_s':>8}"
+    )
+    for s in sorted(summaries, key=lambda x: x.total_net_profit, reverse=True):
+        print(
+            f"  {s.cfg.min_diff_pct:7.3f} {s.cfg.min_net_profit:8.3f} {s.cfg.dex_fee_bps_per_swap:8.1f} "
+            f"{s.cfg.gas_units_per_swap:8d} | {s.opportunities:7d} {s.total_net_profit:12.4f} "
+            f"{s.best_net_profit:10.4f} {s.mean_net_profit:9.4f} {s.mean_duration_sec:8.1f} "
+            f"{s.max_concurrent:5d} {s.replay_sec:8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import json
+import signal
 import sys
+from datetime import datetime, timezone
 from pathlib import Path
 
 from web3 import Web3
@@ -12,31 +15,341 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from src.collector import collect_v2_snapshots
-from src.config import get_arbitrage_config, get_chain_configs, get_v2_pool_configs
-from src.dex_uniswap_v2 import UniswapV2ReserveReader
-from src.fees import FeeEstimationError, RealTimeFeeEstimator, route_pairs_from_snapshots
-from src.ratio import compute_arbitrage_opportunities, compute_cross_chain_spreads
+from src.collector import (
+    SnapshotCollector,
+    collect_v2_snapshots,
+    collect_v2_snapshots_async,
+    collect_v2_snapshots_by_chain,
+    rpc_calls_per_poll,
+)
+from src.config import (
+    AnalysisConfig,
+    ArbitrageConfig,
+    CollectorConfig,
+    FeeCacheConfig,
+    V2PoolConfig,
+    get_analysis_config,
+    get_arbitrage_config,
+    get_chain_configs,
+    get_collector_config,
+    get_fee_cache_config,
+    get_fee_http_config,
+    get_history_config,
+    get_metrics_config,
+    get_output_config,
+    get_pool_registry_config,
+    get_rpc_routing_config,
+    get_spread_stats_config,
+    get_v2_pool_configs,
+)
+from src.dex_uniswap_v2 import (
+    AsyncUniswapV2ReserveReader,
+    BatchRpcV2ReserveReader,
+    MulticallV2ReserveReader,
+    UniswapV2ReserveReader,
+)
+from src.fee_cache import FeeInputCache
+from src.fees import AsyncRealTimeFeeEstimator, route_pairs_from_snapshots
+from src.history import HistoryRecorder
+from src.http_async import AsyncHttpClient
+from src.incremental import IncrementalOpportunityAnalyzer, OpportunityDelta
+from src.metrics import REGISTRY, count_errors, start_metrics_server, track
+from src.output_sink import CycleReport, OutputSink, build_output_sink
+from src.pool_registry import load_registry_pools
+from src.process_collector import ProcessShardedCollector
+from src.price_types import (
+    ArbitrageCycle,
+    PriceSnapshot,
+    SizedOpportunity,
+)
+from src.ratio import (
+    compute_arbitrage_opportunities,
+    compute_cross_chain_spreads,
+    compute_top_arbitrage_opportunities,
+)
+from src.ratio_vectorized import (
+    compute_arbitrage_opportunities_vectorized,
+    compute_cross_chain_spreads_vectorized,
+)
+from src.rpc_async import AsyncJsonRpcClient
+from src.rpc_batch import JsonRpcBatchClient
+from src.rpc_clients import (
+    build_batch_rpc_client,
+    build_routed_async_rpc_client,
+    build_routed_web3_client,
+    close_web3_client,
+)
+from src.rpc_router import EndpointPool, HedgedAsyncJsonRpcClient, build_endpoint_pool
+from src.scheduler import AdaptivePollScheduler
+from src.sizing import filter_by_sizing, size_opportunities
+from src.spread_stats import SpreadStats, SpreadStatsTracker
+from src.sync_tracker import SyncEventReserveTracker
+from src.token_graph import TokenGraph
+from src.ws_heads import HeadDrivenCollector
+
+
+@functools.cache
+def _endpoint_pools() -> dict[str, EndpointPool]:
+    # One pool per chain, shared by the web3 readers and async clients so they learn from each other.
+    routing = get_rpc_routing_config()
+    return {chain.name: build_endpoint_pool(chain, routing) for chain in get_chain_configs()}
 
 
 def _build_chain_web3() -> dict[str, Web3]:
-    chain_map = {chain.name: Web3(Web3.HTTPProvider(chain.rpc_url)) for chain in get_chain_configs()}
+    chain_map = {name: build_routed_web3_client(pool) for name, pool in _endpoint_pools().items()}
     return chain_map
 
 
+def _build_chain_batch_clients() -> dict[str, JsonRpcBatchClient]:
+    return {chain.name: build_batch_rpc_client(chain.rpc_url) for chain in get_chain_configs()}
+
+
+def _build_chain_async_clients(
+    collector_cfg: CollectorConfig,
+) -> dict[str, AsyncJsonRpcClient | HedgedAsyncJsonRpcClient]:
+    return {
+        name: build_routed_async_rpc_client(
+            pool,
+            max_connections=collector_cfg.rpc_max_connections_per_chain,
+            max_in_flight=collector_cfg.rpc_max_in_flight_per_chain,
+            request_timeout=collector_cfg.rpc_request_timeout_sec,
+        )
+        for name, pool in _endpoint_pools().items()
+    }
+
+
+def _build_snapshot_collector(
+    collector_cfg: CollectorConfig,
+    chain_web3: dict[str, Web3],
+    async_clients: dict[str, AsyncJsonRpcClient | HedgedAsyncJsonRpcClient],
+    fee_cache: FeeInputCache | None = None,
+) -> SnapshotCollector:
+    multicall_reader = MulticallV2ReserveReader(
+        chain_web3,
+        gas_limit=collector_cfg.multicall_gas_limit,
+        gas_per_call=collector_cfg.multicall_gas_per_call,
+    )
+    if collector_cfg.read_mode == "multicall":
+        return lambda pools: collect_v2_snapshots_by_chain(multicall_reader, pools)
+    if collector_cfg.read_mode == "sync_events":
+        tracker = SyncEventReserveTracker(
+            chain_web3,
+            seed_reader=multicall_reader,
+            confirmation_depth=collector_cfg.sync_confirmation_depth,
+            max_block_range=collector_cfg.sync_max_block_range,
+        )
+        return lambda pools: collect_v2_snapshots_by_chain(tracker, pools)
+    if collector_cfg.read_mode == "batch":
+        batch_reader = BatchRpcV2ReserveReader(_build_chain_batch_clients(), fee_cache=fee_cache)
+        return lambda pools: collect_v2_snapshots_by_chain(batch_reader, pools)
+    if collector_cfg.read_mode == "async":
+        async_reader = AsyncUniswapV2ReserveReader(async_clients)
+        return lambda pools: collect_v2_snapshots_async(async_reader, pools)
+
+    reader = UniswapV2ReserveReader(chain_web3)
+    return lambda pools: collect_v2_snapshots(reader, pools)
+
+
+def _build_fee_cache(fee_cache_cfg: FeeCacheConfig) -> FeeInputCache | None:
+    if not fee_cache_cfg.enabled:
+        return None
+    return FeeInputCache(
+        native_price_ttl_sec=fee_cache_cfg.native_price_ttl_sec,
+        bridge_quote_ttl_sec=fee_cache_cfg.bridge_quote_ttl_sec,
+        bridge_quote_stale_sec=fee_cache_cfg.bridge_quote_stale_sec,
+        gas_price_ttl_sec=fee_cache_cfg.gas_price_ttl_sec,
+    )
+
+
+def _register_fee_cache_metrics(cache: FeeInputCache) -> None:
+    # Read from the cache's own counters at scrape time; nothing extra runs per lookup.
+    def collect():
+        for kind, counter in cache.counters.items():
+            yield {"kind": kind, "result": "hit"}, counter.hits
+            yield {"kind": kind, "result": "stale"}, counter.stale_hits
+            yield {"kind": kind, "result": "miss"}, counter.misses
+
+    REGISTRY.add_collector("fee_cache_lookups_total", "counter", "Fee input cache lookups by outcome.", collect)
+
+
+async def _collect_tracked(
+    collect: SnapshotCollector,
+    pools: list[V2PoolConfig],
+) -> tuple[list[PriceSnapshot], list[str]]:
+    with track("collect"):
+        snapshots, errors = await collect(pools)
+    count_errors("collect", "", len(errors))
+    return snapshots, errors
+
+
+def _merge_pools(inline: list[V2PoolConfig], registry: list[V2PoolConfig]) -> list[V2PoolConfig]:
+    # Hand-written V2_POOLS_JSON entries take precedence over registry entries for the same pool.
+    known = {(pool.chain, pool.checksum_address) for pool in inline}
+    return inline + [pool for pool in registry if (pool.chain, pool.checksum_address) not in known]
+
+
 def _validate_pool_chains(pool_chains: set[str], configured_chains: set[str]) -> list[str]:
     missing = sorted(pool_chains - configured_chains)
     return [f"Missing RPC config for chain '{chain}'" for chain in missing]
 
 
+async def _evaluate_cycle(
+    snapshots: list[PriceSnapshot],
+    errors: list[str],
+    arb_cfg: ArbitrageConfig,
+    analysis_cfg: AnalysisConfig,
+    fee_estimator: AsyncRealTimeFeeEstimator,
+    sink: OutputSink,
+    analyzer: IncrementalOpportunityAnalyzer | None = None,
+    token_graph: TokenGraph | None = None,
+    recorder: HistoryRecorder | None = None,
+    spread_stats: SpreadStatsTracker | None = None,
+    spread_min_z: float = 0.0,
+) -> None:
+    spread_limit = analysis_cfg.spread_top_n or None
+    # Rolling statistics need every route each cycle; the display limit is applied afterwards.
+    compute_limit = None if spread_stats is not None else spread_limit
+    opportunity_limit = analysis_cfg.opportunity_top_k or None
+    # The z-score and sizing filters must see every candidate, otherwise they only thin out the top K.
+    z_filter = spread_stats is not None and spread_min_z > 0
+    rank_limit = None if z_filter or analysis_cfg.optimal_sizing else opportunity_limit
+    deltas: list[OpportunityDelta] = []
+    if fee_estimator.cache is not None:
+        fee_estimator.cache.observe_snapshots(snapshots)
+
+    engine = analysis_cfg.engine
+    if analyzer is not None:
+        # Only pools whose block or price moved are rescored; routes come from the analyzer's state.
+        with track("analysis_snapshots", engine):
+            deltas.extend(analyzer.sync_snapshots(snapshots))
+        with track("fee_estimation"):
+            route_fees, fee_errors = await fee_estimator.estimate_routes(
+                sorted(analyzer.routes()), volume=arb_cfg.volume
+            )
+        with track("analysis_opportunities", engine):
+            deltas.extend(analyzer.sync_route_fees(route_fees))
+            spreads = analyzer.spreads()[:compute_limit]
+            opportunities = analyzer.opportunities()[:rank_limit]
+    else:
+        with track("analysis_spreads", engine):
+            if engine == "numpy":
+                spreads = compute_cross_chain_spreads_vectorized(snapshots, limit=compute_limit)
+            else:
+                spreads = compute_cross_chain_spreads(snapshots)[:compute_limit]
+        with track("analysis_routes", engine):
+            routes = sorted(route_pairs_from_snapshots(snapshots))
+        with track("fee_estimation"):
+            route_fees, fee_errors = await fee_estimator.estimate_routes(routes, volume=arb_cfg.volume)
+
+        with track("analysis_opportunities", engine):
+            if engine == "sweep":
+                opportunities = compute_top_arbitrage_opportunities(
+                    snapshots=snapshots,
+                    cfg=arb_cfg,
+                    route_fees=route_fees,
+                    top_k=rank_limit,
+                )
+            else:
+                compute_opportunities = (
+                    compute_arbitrage_opportunities_vectorized
+                    if engine == "numpy"
+                    else compute_arbitrage_opportunities
+                )
+                opportunities = compute_opportunities(
+                    snapshots=snapshots,
+                    cfg=arb_cfg,
+                    route_fees=route_fees,
+                )[:rank_limit]
+    count_errors("fee_estimation", "", len(fee_errors))
+
+    shown_stats: list[SpreadStats] = []
+    if spread_stats is not None:
+        with track("analysis_spread_stats"):
+            spread_stats.update(spreads)
+            spreads = spreads[:spread_limit]
+            shown_stats = [
+                stats
+                for stats in (
+                    spread_stats.stats(s.pair_key, (s.chain_a, s.pool_a), (s.chain_b, s.pool_b)) for s in spreads
+                )
+                if stats is not None
+            ]
+            if z_filter:
+                opportunities = spread_stats.filter_opportunities(opportunities, spread_min_z)
+
+    cycles: list[ArbitrageCycle] = []
+    if token_graph is not None:
+        # Only edges whose rate moved re-enter the relaxation queue. Fees go first so pool
+        # edges are weighted with this cycle's gas.
+        with track("analysis_multi_hop"):
+            token_graph.update_route_fees(route_fees)
+            for snapshot in snapshots:
+                token_graph.update_pool(snapshot)
+            cycles = token_graph.find_cycles()[:opportunity_limit]
+    sized: list[SizedOpportunity] = []
+    if analysis_cfg.optimal_sizing:
+        with track("analysis_sizing"):
+            sized = size_opportunities(snapshots, arb_cfg, route_fees, analysis_cfg.usd_quote_symbols)
+            # A spread that no trade size survives after price impact is not an opportunity.
+            opportunities = filter_by_sizing(opportunities, snapshots, sized, analysis_cfg.usd_quote_symbols)
+            sized = sized[:opportunity_limit]
+    opportunities = opportunities[:opportunity_limit]
+
+    if recorder is not None:
+        # Hands the cycle to the recorder thread; disk writes never stall the loop.
+        recorder.record_cycle(snapshots, route_fees, opportunities)
+        history_error = recorder.take_error()
+        if history_error is not None:
+            errors = errors + [f"history write failed error={history_error}"]
+
+    with track("output"):
+        # Rendering and writes happen on the sink's thread; this only enqueues the cycle.
+        sink.submit(
+            CycleReport(
+                timestamp=datetime.now(timezone.utc),
+                snapshots=list(snapshots),
+                errors=errors + fee_errors,
+                spreads=list(spreads),
+                spread_stats=shown_stats,
+                opportunities=list(opportunities),
+                route_fees=dict(route_fees),
+                sized=sized,
+                cycles=cycles,
+                deltas=deltas,
+                fee_cache_stats=fee_estimator.cache.stats_line() if fee_estimator.cache is not None else "",
+            )
+        )
+
+
+async def _evaluate_tracked(snapshots: list[PriceSnapshot], errors: list[str], **kwargs) -> None:
+    with track("evaluate"):
+        await _evaluate_cycle(snapshots, errors, **kwargs)
+
+
 async def main() -> None:
     pools = get_v2_pool_configs()
+    registry_cfg = get_pool_registry_config()
     arb_cfg = get_arbitrage_config()
-    if not pools:
-        print("No pools configured. Set V2_POOLS_JSON in .env.")
+    collector_cfg = get_collector_config()
+    analysis_cfg = get_analysis_config()
+    if not pools and not registry_cfg.path:
+        print("No pools configured. Set V2_POOLS_JSON or POOL_REGISTRY_PATH in .env.")
         return
 
     chain_web3 = _build_chain_web3()
+    if registry_cfg.path:
+        registry_pools, registry_errors = load_registry_pools(
+            registry_cfg,
+            chain_web3,
+            gas_limit=collector_cfg.multicall_gas_limit,
+            gas_per_call=collector_cfg.multicall_gas_per_call,
+        )
+        for err in registry_errors:
+            print(f"ERROR {err}")
+        pools = _merge_pools(pools, registry_pools)
+        if not pools:
+            print(f"No pools resolved from {registry_cfg.path}.")
+            return
     configured_chains = set(chain_web3.keys())
     pool_chains = {pool.chain for pool in pools}
 
@@ -46,82 +359,174 @@ async def main() -> None:
             print(err)
         return
 
-    reader = UniswapV2ReserveReader(chain_web3)
-    fee_estimator = RealTimeFeeEstimator(chain_web3=chain_web3, cfg=arb_cfg)
-    print("Starting price monitor (Ctrl+C to stop)")
-    print("=" * 90)
-    print(
+    fee_cache = _build_fee_cache(get_fee_cache_config())
+    # One session pool per chain, shared by the async reader and the fee estimator.
+    async_clients = _build_chain_async_clients(collector_cfg)
+    process_collector = ProcessShardedCollector(pools, collector_cfg) if collector_cfg.process_workers else None
+    collect = (
+        process_collector.collect
+        if process_collector is not None
+        else _build_snapshot_collector(collector_cfg, chain_web3, async_clients, fee_cache)
+    )
+    fee_http_cfg = get_fee_http_config()
+    fee_estimator = AsyncRealTimeFeeEstimator(
+        chain_clients=async_clients,
+        http=AsyncHttpClient(
+            max_connections=fee_http_cfg.max_connections,
+            max_connections_per_host=fee_http_cfg.max_connections_per_host,
+            request_timeout=fee_http_cfg.request_timeout_sec,
+        ),
+        cfg=arb_cfg,
+        cache=fee_cache,
+        route_deadline_sec=fee_http_cfg.route_deadline_sec,
+    )
+    analyzer = IncrementalOpportunityAnalyzer(arb_cfg) if analysis_cfg.engine == "incremental" else None
+    token_graph = TokenGraph(arb_cfg) if analysis_cfg.multi_hop else None
+    spread_stats_cfg = get_spread_stats_config()
+    spread_stats = (
+        SpreadStatsTracker(
+            halflife_sec=spread_stats_cfg.halflife_sec,
+            window=spread_stats_cfg.window,
+            max_routes=spread_stats_cfg.max_routes,
+            min_samples=spread_stats_cfg.min_samples,
+        )
+        if spread_stats_cfg.enabled
+        else None
+    )
+    history_cfg = get_history_config()
+    recorder = (
+        HistoryRecorder(
+            history_cfg.directory,
+            segment_rows=history_cfg.segment_rows,
+            flush_interval_sec=history_cfg.flush_interval_sec,
+        )
+        if history_cfg.directory
+        else None
+    )
+    metrics_cfg = get_metrics_config()
+    metrics_runner = None
+    if metrics_cfg.port:
+        if fee_estimator.cache is not None:
+            _register_fee_cache_metrics(fee_estimator.cache)
+        metrics_runner = await start_metrics_server(metrics_cfg.host, metrics_cfg.port)
+    output_cfg = get_output_config()
+    # Machine-readable output on stdout keeps the banner on stderr so the stream stays parseable.
+    info = functools.partial(print, file=sys.stdout if output_cfg.mode == "console" or output_cfg.path else sys.stderr)
+    info("Starting price monitor (Ctrl+C to stop)")
+    info("=" * 90)
+    if metrics_runner is not None:
+        info(f"Metrics: http://{metrics_cfg.host}:{metrics_cfg.port}/metrics")
+    if process_collector is not None:
+        info(
+            f"Collector workers: {len(process_collector.shards)} processes "
+            f"({', '.join(shard.name for shard in process_collector.shards)})"
+        )
+    info(
         f"Arbitrage config: volume={arb_cfg.volume:.2f}, "
         f"min_diff_pct={arb_cfg.min_diff_pct:.3f}%, "
         f"min_net_profit={arb_cfg.min_net_profit:.3f}, "
         f"min_net_profit_pct={arb_cfg.min_net_profit_pct:.3f}%"
     )
 
-    while True:
-        snapshots, errors = await collect_v2_snapshots(reader, pools)
-        spreads = compute_cross_chain_spreads(snapshots)
-        route_fees = {}
-        fee_errors: list[str] = []
-        for buy_chain, sell_chain in sorted(route_pairs_from_snapshots(snapshots)):
-            try:
-                route_fees[(buy_chain, sell_chain)] = fee_estimator.estimate_route_fees(
-                    buy_chain=buy_chain,
-                    sell_chain=sell_chain,
-                    volume=arb_cfg.volume,
-                )
-            except (FeeEstimationError, ValueError, KeyError, OSError) as exc:
-                fee_errors.append(
-                    f"fee_quote_failed route={buy_chain}->{sell_chain} reason={exc}"
-                )
-
-        opportunities = compute_arbitrage_opportunities(
-            snapshots=snapshots,
-            cfg=arb_cfg,
-            route_fees=route_fees,
+    sink = build_output_sink(output_cfg)
+    if metrics_runner is not None:
+        REGISTRY.add_collector(
+            "output_dropped_cycles_total",
+            "counter",
+            "Cycles dropped because the output writer fell behind.",
+            lambda: [({}, sink.dropped_cycles)],
         )
-
-        for error in errors:
-            print(f"ERROR {error}")
-        for fee_error in fee_errors:
-            print(f"ERROR {fee_error}")
-
-        if snapshots:
-            print("Latest snapshots:")
-            for s in snapshots:
-                print(
-                    f"  {s.chain:10} {s.dex:12} {s.pair_key:14} "
-                    f"price={s.price_token1_per_token0:.8f} block={s.block_number} "
-                    f"latency={s.latency_ms:.1f}ms"
-                )
-
-        if spreads:
-            print("Cross-chain spreads:")
-            for spread in spreads:
-                print(
-                    f"  {spread.pair_key:14} {spread.chain_a:10}/{spread.chain_b:10} "
-                    f"ratio={spread.ratio_a_over_b:.6f} spread={spread.spread_pct:+.3f}%"
+        if recorder is not None:
+            REGISTRY.add_collector(
+                "history_write_errors_total",
+                "counter",
+                "History writes that failed and were rolled back.",
+                lambda: [({}, recorder.write_errors)],
+            )
+            REGISTRY.add_collector(
+                "history_dropped_cycles_total",
+                "counter",
+                "Cycles dropped because the history recorder fell behind.",
+                lambda: [({}, recorder.dropped_cycles)],
+            )
+    evaluate = functools.partial(
+        _evaluate_tracked,
+        arb_cfg=arb_cfg,
+        analysis_cfg=analysis_cfg,
+        fee_estimator=fee_estimator,
+        sink=sink,
+        analyzer=analyzer,
+        token_graph=token_graph,
+        recorder=recorder,
+        spread_stats=spread_stats,
+        spread_min_z=spread_stats_cfg.min_z,
+    )
+    try:
+        if process_collector is not None:
+            await process_collector.start()
+        if collector_cfg.poll_mode != "fixed":
+            scheduler: AdaptivePollScheduler | HeadDrivenCollector
+            tracked_collect = functools.partial(_collect_tracked, collect)
+            if collector_cfg.poll_mode == "websocket":
+                scheduler = HeadDrivenCollector(
+                    tracked_collect,
+                    pools,
+                    ws_urls={chain.name: chain.ws_url for chain in get_chain_configs()},
+                    fallback_interval_sec=collector_cfg.poll_interval_sec,
                 )
-
-        if opportunities:
-            print("Arbitrage opportunities (after fees):")
-            for opp in opportunities:
-                fee_quote = route_fees[(opp.buy_chain, opp.sell_chain)]
-                print(
-                    f"  {opp.pair_key:14} buy={opp.buy_chain:10} sell={opp.sell_chain:10} "
-                    f"diff={opp.difference_pct:+.3f}% gross={opp.gross_profit:.4f} "
-                    f"fees={opp.fees:.4f} net={opp.net_profit:.4f} "
-                    f"(gas={fee_quote.gas_buy_usd + fee_quote.gas_sell_usd:.4f}, "
-                    f"bridge={fee_quote.bridge_fee_usd:.4f}, dex={fee_quote.dex_fee_usd:.4f})"
+            else:
+                scheduler = AdaptivePollScheduler(
+                    tracked_collect,
+                    pools,
+                    min_interval_sec=collector_cfg.poll_min_interval_sec,
+                    max_interval_sec=collector_cfg.poll_max_interval_sec,
+                    rpc_budget_per_min=collector_cfg.poll_rpc_budget_per_min,
+                    rpc_budgets_per_min=collector_cfg.poll_rpc_budgets_per_min,
+                    # Process workers poll on their own; draining their ring costs no RPC calls.
+                    rpc_calls_per_poll=(
+                        (lambda chain_pools: 0)
+                        if process_collector is not None
+                        else functools.partial(rpc_calls_per_poll, collector_cfg)
+                    ),
                 )
+            poll_task = asyncio.create_task(scheduler.run())
+            try:
+                while True:
+                    # Evaluate as soon as any chain reports new data instead of on a fixed tick.
+                    await scheduler.wait_for_update()
+                    snapshots, errors = scheduler.snapshots()
+                    await evaluate(snapshots, errors)
+            finally:
+                poll_task.cancel()
 
-        print("-" * 90)
-        await asyncio.sleep(5)
+        while True:
+            snapshots, errors = await _collect_tracked(collect, pools)
+            await evaluate(snapshots, errors)
+            await asyncio.sleep(collector_cfg.poll_interval_sec)
+    finally:
+        # Every step below is bounded; a second Ctrl+C would only abort it and leak open sessions.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        if process_collector is not None:
+            process_collector.close()
+        # Drains queued cycles so the last results are not lost on shutdown.
+        sink.close()
+        if sink.last_error:
+            print(f"Output sink error: {sink.last_error}", file=sys.stderr)
+        if recorder is not None:
+            # Flushes whatever is still queued before the process exits.
+            recorder.close()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await fee_estimator.aclose()
+        await asyncio.gather(*(client.aclose() for client in async_clients.values()))
+        for w3 in chain_web3.values():
+            close_web3_client(w3)
 
 
 if __name__ == "__main__":
     try:
         asyncio.run(main())
     except json.JSONDecodeError:
-        print("Invalid JSON format in .env. Check V2_POOLS_JSON and fee config JSON fields.")
+        print("Invalid JSON format in .env. Check V2_POOLS_JSON and fee config JSON fields.", file=sys.stderr)
     except KeyboardInterrupt:
-        print("Stopped.")
+        print("Stopped.", file=sys.stderr)
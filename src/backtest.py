@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import dataclasses
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from src.config import ArbitrageConfig
+from src.fees import reprice_fee_breakdown
+from src.history import HistoryReader, datetime_from_ns
+from src.incremental import IncrementalOpportunityAnalyzer
+from src.price_types import FeeBreakdown, PriceSnapshot
+
+# (timestamp, snapshot) or (timestamp, fee quote)
+ReplayEvent = tuple[datetime, PriceSnapshot | FeeBreakdown]
+
+# A new block at an unchanged price cannot open or close an opportunity, so it is not replayed.
+_SNAPSHOT_FIELDS = ("price_token1_per_token0",)
+_FEE_FIELDS = ("gas_buy_usd", "gas_sell_usd", "bridge_fee_usd", "dex_fee_usd", "total_fees_usd")
+
+
+@dataclass(frozen=True)
+class BacktestSummary:
+    cfg: ArbitrageConfig
+    events: int
+    opportunities: int
+    total_net_profit: float
+    best_net_profit: float
+    mean_net_profit: float
+    mean_duration_sec: float
+    max_concurrent: int
+    replay_sec: float
+
+
+def _concat(reader: HistoryReader, stream: str, start: datetime | None, end: datetime | None) -> dict[str, np.ndarray]:
+    parts = list(reader.iter_columns(stream, start=start, end=end))
+    if not parts:
+        return {}
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def _changed_rows(
+    columns: dict[str, np.ndarray],
+    key_fields: tuple[str, ...],
+    value_fields: tuple[str, ...],
+) -> np.ndarray:
+    # Fixed-interval polling re-records unchanged values; only rows that move the state are replayed.
+    order = np.lexsort((columns["timestamp_ns"],) + tuple(columns[name] for name in reversed(key_fields)))
+    keep = np.ones(len(order), dtype=bool)
+    if len(order) > 1:
+        same_key = np.ones(len(order) - 1, dtype=bool)
+        for name in key_fields:
+            same_key &= columns[name][order[1:]] == columns[name][order[:-1]]
+        same_value = np.ones(len(order) - 1, dtype=bool)
+        for name in value_fields:
+            same_value &= columns[name][order[1:]] == columns[name][order[:-1]]
+        keep[1:] = ~(same_key & same_value)
+    return order[keep]
+
+
+def load_replay_events(
+    root: str | Path,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list[ReplayEvent]:
+    reader = HistoryReader(root)
+    symbols = reader.symbols
+    snapshot_cols = _concat(reader, "snapshots", start, end)
+    fee_cols = _concat(reader, "fees", start, end)
+
+    snapshot_rows = (
+        _changed_rows(snapshot_cols, ("chain", "pool_address"), _SNAPSHOT_FIELDS) if snapshot_cols else np.empty(0, int)
+    )
+    fee_rows = _changed_rows(fee_cols, ("buy_chain", "sell_chain"), _FEE_FIELDS) if fee_cols else np.empty(0, int)
+
+    timestamps = np.concatenate(
+        [
+            snapshot_cols["timestamp_ns"][snapshot_rows] if snapshot_cols else np.empty(0, np.int64),
+            fee_cols["timestamp_ns"][fee_rows] if fee_cols else np.empty(0, np.int64),
+        ]
+    )
+    # Event-time order; on equal timestamps snapshots come first, as in a live cycle.
+    order = np.argsort(timestamps, kind="stable").tolist()
+
+    snapshots: list[ReplayEvent] = []
+    if snapshot_cols:
+        columns = [
+            snapshot_cols[name][snapshot_rows].tolist()
+            for name in (
+                "timestamp_ns",
+                "chain",
+                "dex",
+                "pool_address",
+                "pair_key",
+                "price_token1_per_token0",
+                "block_number",
+                "latency_ms",
+                "reserve0",
+                "reserve1",
+            )
+        ]
+        for ts, chain, dex, pool_address, pair_key, price, block, latency, reserve0, reserve1 in zip(*columns):
+            timestamp = datetime_from_ns(ts)
+            snapshots.append(
+                (
+                    timestamp,
+                    PriceSnapshot(
+                        timestamp=timestamp,
+                        chain=symbols[chain],
+                        dex=symbols[dex],
+                        pool_address=symbols[pool_address],
+                        pair_key=symbols[pair_key],
+                        price_token1_per_token0=price,
+                        block_number=block,
+                        latency_ms=latency,
+                        reserve0=reserve0,
+                        reserve1=reserve1,
+                    ),
+                )
+            )
+
+    fees: list[ReplayEvent] = []
+    if fee_cols:
+        columns = [fee_cols[name][fee_rows].tolist() for name in ("timestamp_ns", "buy_chain", "sell_chain") + _FEE_FIELDS]
+        for ts, buy_chain, sell_chain, gas_buy, gas_sell, bridge, dex_fee, total in zip(*columns):
+            fees.append(
+                (
+                    datetime_from_ns(ts),
+                    FeeBreakdown(
+                        buy_chain=symbols[buy_chain],
+                        sell_chain=symbols[sell_chain],
+                        gas_buy_usd=gas_buy,
+                        gas_sell_usd=gas_sell,
+                        bridge_fee_usd=bridge,
+                        dex_fee_usd=dex_fee,
+                        total_fees_usd=total,
+                    ),
+                )
+            )
+
+    events = snapshots + fees
+    events = [events[position] for position in order]
+    return events
+
+
+def replay(
+    events: list[ReplayEvent],
+    cfg: ArbitrageConfig,
+    recorded_gas_units: int | None = None,
+) -> BacktestSummary:
+    # Recorded gas costs are rescaled when the config changes gas units per swap.
+    gas_scale = cfg.gas_units_per_swap / recorded_gas_units if recorded_gas_units else 1.0
+    analyzer = IncrementalOpportunityAnalyzer(cfg, track_spreads=False)
+    opened_at: dict[tuple, datetime] = {}
+    first_net: list[float] = []
+    durations: list[float] = []
+    max_concurrent = 0
+
+    started = time.perf_counter()
+    for timestamp, event in events:
+        if isinstance(event, PriceSnapshot):
+            deltas = analyzer.update_snapshot(event)
+        else:
+            quote = reprice_fee_breakdown(event, cfg, gas_scale)
+            deltas = analyzer.update_route_fee((quote.buy_chain, quote.sell_chain), quote)
+        for delta in deltas:
+            if delta.kind == "new":
+                opened_at[delta.key] = timestamp
+                first_net.append(delta.opportunity.net_profit)
+            elif delta.kind == "gone":
+                durations.append((timestamp - opened_at.pop(delta.key)).total_seconds())
+        max_concurrent = max(max_concurrent, len(opened_at))
+
+    return BacktestSummary(
+        cfg=cfg,
+        events=len(events),
+        opportunities=len(first_net),
+        total_net_profit=sum(first_net),
+        best_net_profit=max(first_net, default=0.0),
+        mean_net_profit=sum(first_net) / len(first_net) if first_net else 0.0,
+        mean_duration_sec=sum(durations) / len(durations) if durations else 0.0,
+        max_concurrent=max_concurrent,
+        replay_sec=time.perf_counter() - started,
+    )
+
+
+def config_grid(base: ArbitrageConfig, **axes: list) -> list[ArbitrageConfig]:
+    # config_grid(cfg, min_diff_pct=[0.1, 0.2], dex_fee_bps_per_swap=[5, 30]) -> 4 configs.
+    names = list(axes)
+    return [dataclasses.replace(base, **dict(zip(names, values))) for values in itertools.product(*axes.values())]
+
+
+_worker_events: list[ReplayEvent] = []
+
+
+def _load_worker_events(root: str, start: datetime | None, end: datetime | None) -> None:
+    # Each worker decodes the history once and replays many configs against it.
+    global _worker_events
+    _worker_events = load_replay_events(root, start, end)
+
+
+def _replay_in_worker(cfg: ArbitrageConfig, recorded_gas_units: int | None) -> BacktestSummary:
+    return replay(_worker_events, cfg, recorded_gas_units)
+
+
+def sweep(
+    root: str | Path,
+    configs: list[ArbitrageConfig],
+    start: datetime | None = None,
+    end: datetime | None = None,
+    recorded_gas_units: int | None = None,
+    workers: int | None = None,
+) -> list[BacktestSummary]:
+    workers = max(1, min(workers or os.cpu_count() or 1, len(configs)))
+    if workers == 1:
+        events = load_replay_events(root, start, end)
+        return [replay(events, cfg, recorded_gas_units) for cfg in configs]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_load_worker_events,
+        initargs=(str(root), start, end),
+    ) as pool:
+        return list(pool.map(_replay_in_worker, configs, itertools.repeat(recorded_gas_units)))
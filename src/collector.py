@@ -1,25 +1,99 @@
 from __future__ import annotations
 
 import asyncio
+import math
+from typing import Awaitable, Callable, Protocol
 
-from src.config import V2PoolConfig
-from src.dex_uniswap_v2 import UniswapV2ReserveReader
+from src.config import CollectorConfig, V2PoolConfig
+from src.dex_uniswap_v2 import AsyncUniswapV2ReserveReader, UniswapV2ReserveReader
+from src.multicall import max_calls_per_batch
 from src.price_types import PriceSnapshot
 
 
-async def collect_v2_snapshots(
-    reader: UniswapV2ReserveReader,
+SnapshotCollector = Callable[[list[V2PoolConfig]], Awaitable[tuple[list[PriceSnapshot], list[str]]]]
+
+
+class ChainSnapshotReader(Protocol):
+    def fetch_chain_snapshots(
+        self,
+        chain: str,
+        pools: list[V2PoolConfig],
+    ) -> list[PriceSnapshot | Exception]: ...
+
+
+def rpc_calls_per_poll(cfg: CollectorConfig, pools: list[V2PoolConfig]) -> int:
+    # Steady-state JSON-RPC calls for one poll of one chain's pools. Entries of a JSON-RPC
+    # batch count one by one, as providers meter them.
+    if cfg.read_mode == "multicall":
+        return math.ceil(len(pools) / max_calls_per_batch(cfg.multicall_gas_limit, cfg.multicall_gas_per_call))
+    if cfg.read_mode == "batch":
+        # Two eth_blockNumber brackets and, with a fee cache, eth_gasPrice around the reserve reads.
+        return len(pools) + 3
+    if cfg.read_mode == "sync_events":
+        # eth_blockNumber plus eth_getLogs per address chunk.
+        return 1 + math.ceil(len(pools) / 500)
+    # per_pool and async read getReserves and eth_blockNumber for every pool.
+    return 2 * len(pools)
+
+
+def _group_pools_by_chain(pools: list[V2PoolConfig]) -> dict[str, list[V2PoolConfig]]:
+    by_chain: dict[str, list[V2PoolConfig]] = {}
+    for pool in pools:
+        by_chain.setdefault(pool.chain, []).append(pool)
+    return by_chain
+
+
+def _split_results(
     pools: list[V2PoolConfig],
+    results: list[PriceSnapshot | BaseException],
 ) -> tuple[list[PriceSnapshot], list[str]]:
-    tasks = [asyncio.to_thread(reader.fetch_snapshot, pool) for pool in pools]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-
     snapshots: list[PriceSnapshot] = []
     errors: list[str] = []
     for pool, result in zip(pools, results, strict=True):
-        if isinstance(result, Exception):
+        if isinstance(result, BaseException):
             errors.append(f"{pool.chain}:{pool.dex}:{pool.pair_key} error={result}")
             continue
         snapshots.append(result)
 
     return snapshots, errors
+
+
+async def collect_v2_snapshots(
+    reader: UniswapV2ReserveReader,
+    pools: list[V2PoolConfig],
+) -> tuple[list[PriceSnapshot], list[str]]:
+    tasks = [asyncio.to_thread(reader.fetch_snapshot, pool) for pool in pools]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    return _split_results(pools, results)
+
+
+async def collect_v2_snapshots_async(
+    reader: AsyncUniswapV2ReserveReader,
+    pools: list[V2PoolConfig],
+) -> tuple[list[PriceSnapshot], list[str]]:
+    # Runs on the event loop; per-chain clients bound connections and in-flight requests.
+    results = await asyncio.gather(*(reader.fetch_snapshot(pool) for pool in pools), return_exceptions=True)
+    return _split_results(pools, results)
+
+
+async def collect_v2_snapshots_by_chain(
+    reader: ChainSnapshotReader,
+    pools: list[V2PoolConfig],
+) -> tuple[list[PriceSnapshot], list[str]]:
+    # One worker per chain; the reader batches all of that chain's pools itself.
+    by_chain = _group_pools_by_chain(pools)
+    tasks = [
+        asyncio.to_thread(reader.fetch_chain_snapshots, chain, chain_pools)
+        for chain, chain_pools in by_chain.items()
+    ]
+    chain_results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    ordered_pools: list[V2PoolConfig] = []
+    results: list[PriceSnapshot | BaseException] = []
+    for chain_pools, chain_result in zip(by_chain.values(), chain_results, strict=True):
+        ordered_pools.extend(chain_pools)
+        if isinstance(chain_result, BaseException):
+            results.extend(chain_result for _ in chain_pools)
+        else:
+            results.extend(chain_result)
+    return _split_results(ordered_pools, results)
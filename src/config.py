@@ -2,18 +2,27 @@ from __future__ import annotations
 
 import json
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from dotenv import load_dotenv
+from eth_utils import to_checksum_address
 
 load_dotenv()
 
+COLLECTOR_READ_MODES = ("multicall", "batch", "async", "sync_events", "per_pool")
+POLL_MODES = ("fixed", "adaptive", "websocket")
+ANALYSIS_ENGINES = ("python", "numpy", "incremental", "sweep")
+OUTPUT_MODES = ("console", "jsonl", "binary")
+
 
 @dataclass(frozen=True)
 class ChainConfig:
     name: str
     rpc_url: str
     expected_chain_id: int
+    ws_url: str = ""
+    # Every endpoint for the chain, rpc_url first; more than one enables routing and hedging.
+    rpc_urls: tuple[str, ...] = ()
 
 
 @dataclass(frozen=True)
@@ -25,6 +34,17 @@ class V2PoolConfig:
     token1_symbol: str
     token0_decimals: int
     token1_decimals: int
+    # Derived once at load time so the per-cycle read path does no address or power math.
+    # The pool index passes an already checksummed address to skip the keccak on startup.
+    checksum_address: str = field(default="", repr=False, compare=False)
+    token0_scale: int = field(init=False, repr=False, compare=False)
+    token1_scale: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if not self.checksum_address:
+            object.__setattr__(self, "checksum_address", to_checksum_address(self.pool_address))
+        object.__setattr__(self, "token0_scale", 10**self.token0_decimals)
+        object.__setattr__(self, "token1_scale", 10**self.token1_decimals)
 
     @property
     def pair_key(self) -> str:
@@ -41,22 +61,130 @@ class ArbitrageConfig:
     gas_units_per_swap: int
     bridge_fee_url_template: str
     bridge_fee_json_path: str
+    price_api_url: str = "https://api.coingecko.com/api/v3"
+
+
+@dataclass(frozen=True)
+class AnalysisConfig:
+    engine: str
+    spread_top_n: int
+    opportunity_top_k: int
+    optimal_sizing: bool
+    multi_hop: bool
+    # Quote (token1) symbols worth one US dollar; sizing only values pairs quoted in one of them.
+    usd_quote_symbols: tuple[str, ...] = ("USD", "USDC", "USDT", "DAI")
+
+
+@dataclass(frozen=True)
+class SpreadStatsConfig:
+    enabled: bool
+    halflife_sec: float
+    window: int
+    max_routes: int
+    min_samples: int
+    min_z: float
+
+
+@dataclass(frozen=True)
+class HistoryConfig:
+    directory: str
+    segment_rows: int
+    flush_interval_sec: float
+
+
+@dataclass(frozen=True)
+class PoolRegistryConfig:
+    path: str
+    index_path: str
+
+
+@dataclass(frozen=True)
+class OutputConfig:
+    mode: str
+    path: str
+    top_n: int
+    max_pending_cycles: int
+
+
+@dataclass(frozen=True)
+class RpcRoutingConfig:
+    hedge_enabled: bool
+    hedge_min_delay_sec: float
+    max_block_lag: int
+    stats_window: int
+    retry_after_sec: float
+
+
+@dataclass(frozen=True)
+class MetricsConfig:
+    host: str
+    port: int
+
+
+@dataclass(frozen=True)
+class FeeCacheConfig:
+    enabled: bool
+    native_price_ttl_sec: float
+    bridge_quote_ttl_sec: float
+    bridge_quote_stale_sec: float
+    gas_price_ttl_sec: float
+
+
+@dataclass(frozen=True)
+class FeeHttpConfig:
+    max_connections: int
+    max_connections_per_host: int
+    request_timeout_sec: float
+    route_deadline_sec: float
+
+
+@dataclass(frozen=True)
+class CollectorConfig:
+    read_mode: str
+    multicall_gas_limit: int
+    multicall_gas_per_call: int
+    rpc_max_connections_per_chain: int
+    rpc_max_in_flight_per_chain: int
+    rpc_request_timeout_sec: float
+    sync_confirmation_depth: int
+    sync_max_block_range: int
+    poll_mode: str
+    poll_interval_sec: float
+    poll_min_interval_sec: float
+    poll_max_interval_sec: float
+    poll_rpc_budget_per_min: float
+    poll_rpc_budgets_per_min: dict[str, float]
+    process_workers: bool
+    pools_per_worker: int
+    ring_records: int
+
+
+def _rpc_urls(prefix: str) -> tuple[str, ...]:
+    # <PREFIX>_RPC_URLS takes a comma-separated list; <PREFIX>_RPC_URL a single endpoint.
+    raw = os.getenv(f"{prefix}_RPC_URLS", "") or os.getenv(f"{prefix}_RPC_URL", "")
+    return tuple(url.strip() for url in raw.split(",") if url.strip())
 
 
 def get_chain_configs() -> list[ChainConfig]:
     chains = [
-        ("ethereum", os.getenv("ETH_RPC_URL", ""), 1),
-        ("bsc", os.getenv("BSC_RPC_URL", ""), 56),
-        ("polygon", os.getenv("POLYGON_RPC_URL", ""), 137),
-        ("avalanche", os.getenv("AVALANCHE_RPC_URL", ""), 43114),
-        ("arbitrum", os.getenv("ARBITRUM_RPC_URL", ""), 42161),
-        ("base", os.getenv("BASE_RPC_URL", ""), 8453),
+        ("ethereum", _rpc_urls("ETH"), os.getenv("ETH_WS_URL", ""), 1),
+        ("bsc", _rpc_urls("BSC"), os.getenv("BSC_WS_URL", ""), 56),
+        ("polygon", _rpc_urls("POLYGON"), os.getenv("POLYGON_WS_URL", ""), 137),
+        ("avalanche", _rpc_urls("AVALANCHE"), os.getenv("AVALANCHE_WS_URL", ""), 43114),
+        ("arbitrum", _rpc_urls("ARBITRUM"), os.getenv("ARBITRUM_WS_URL", ""), 42161),
+        ("base", _rpc_urls("BASE"), os.getenv("BASE_WS_URL", ""), 8453),
     ]
 
     return [
-        ChainConfig(name=name, rpc_url=rpc_url, expected_chain_id=expected_chain_id)
-        for name, rpc_url, expected_chain_id in chains
-        if rpc_url
+        ChainConfig(
+            name=name,
+            rpc_url=rpc_urls[0],
+            expected_chain_id=expected_chain_id,
+            ws_url=ws_url,
+            rpc_urls=rpc_urls,
+        )
+        for name, rpc_urls, ws_url, expected_chain_id in chains
+        if rpc_urls
     ]
 
 
@@ -82,6 +210,13 @@ def get_v2_pool_configs() -> list[V2PoolConfig]:
     return pools
 
 
+def get_pool_registry_config() -> PoolRegistryConfig:
+    path = os.getenv("POOL_REGISTRY_PATH", "").strip()
+    index_path = os.getenv("POOL_INDEX_PATH", "").strip() or (f"{path}.index.json" if path else "")
+
+    return PoolRegistryConfig(path=path, index_path=index_path)
+
+
 def get_arbitrage_config() -> ArbitrageConfig:
     volume = float(os.getenv("ARB_TRADE_VOLUME", "1000"))
     min_diff_pct = float(os.getenv("ARB_MIN_DIFF_PCT", "0.1"))
@@ -91,6 +226,7 @@ def get_arbitrage_config() -> ArbitrageConfig:
     gas_units_per_swap = int(os.getenv("ARB_GAS_UNITS_PER_SWAP", "220000"))
     bridge_fee_url_template = os.getenv("ARB_BRIDGE_FEE_URL_TEMPLATE", "").strip()
     bridge_fee_json_path = os.getenv("ARB_BRIDGE_FEE_JSON_PATH", "").strip()
+    price_api_url = os.getenv("COINGECKO_API_URL", "https://api.coingecko.com/api/v3").strip().rstrip("/")
 
     return ArbitrageConfig(
         volume=volume,
@@ -101,4 +237,180 @@ def get_arbitrage_config() -> ArbitrageConfig:
         gas_units_per_swap=gas_units_per_swap,
         bridge_fee_url_template=bridge_fee_url_template,
         bridge_fee_json_path=bridge_fee_json_path,
+        price_api_url=price_api_url,
+    )
+
+
+def get_analysis_config() -> AnalysisConfig:
+    engine = os.getenv("ANALYSIS_ENGINE", "numpy").strip().lower()
+    if engine not in ANALYSIS_ENGINES:
+        raise ValueError(f"Unknown ANALYSIS_ENGINE '{engine}', expected one of {', '.join(ANALYSIS_ENGINES)}")
+    spread_top_n = int(os.getenv("ANALYSIS_SPREAD_TOP_N", "0"))
+    opportunity_top_k = int(os.getenv("ANALYSIS_OPPORTUNITY_TOP_K", "0"))
+    optimal_sizing = os.getenv("ANALYSIS_OPTIMAL_SIZING", "1").strip().lower() not in ("0", "false", "no")
+    multi_hop = os.getenv("ANALYSIS_MULTI_HOP", "1").strip().lower() not in ("0", "false", "no")
+    usd_quote_symbols = tuple(
+        symbol.strip().upper() for symbol in os.getenv("ANALYSIS_USD_QUOTE_SYMBOLS", "USD,USDC,USDT,DAI").split(",")
+        if symbol.strip()
+    )
+
+    return AnalysisConfig(
+        engine=engine,
+        spread_top_n=spread_top_n,
+        opportunity_top_k=opportunity_top_k,
+        optimal_sizing=optimal_sizing,
+        multi_hop=multi_hop,
+        usd_quote_symbols=usd_quote_symbols,
+    )
+
+
+def get_spread_stats_config() -> SpreadStatsConfig:
+    # Opt-in: the tracker needs every route's spread each cycle, which disables the spread top-N shortcut.
+    enabled = os.getenv("SPREAD_STATS_ENABLED", "0").strip().lower() in ("1", "true", "yes")
+    halflife_sec = float(os.getenv("SPREAD_STATS_HALFLIFE_SEC", "300"))
+    window = int(os.getenv("SPREAD_STATS_WINDOW", "128"))
+    max_routes = int(os.getenv("SPREAD_STATS_MAX_ROUTES", "4096"))
+    min_samples = int(os.getenv("SPREAD_STATS_MIN_SAMPLES", "30"))
+    # 0 disables the filter; otherwise opportunities need a spread this many deviations above its mean.
+    min_z = float(os.getenv("SPREAD_STATS_MIN_Z", "0"))
+
+    return SpreadStatsConfig(
+        enabled=enabled,
+        halflife_sec=halflife_sec,
+        window=window,
+        max_routes=max_routes,
+        min_samples=min_samples,
+        min_z=min_z,
+    )
+
+
+def get_history_config() -> HistoryConfig:
+    directory = os.getenv("HISTORY_DIR", "").strip()
+    segment_rows = int(os.getenv("HISTORY_SEGMENT_ROWS", str(1 << 20)))
+    flush_interval_sec = float(os.getenv("HISTORY_FLUSH_INTERVAL_SEC", "1.0"))
+
+    return HistoryConfig(directory=directory, segment_rows=segment_rows, flush_interval_sec=flush_interval_sec)
+
+
+def get_output_config() -> OutputConfig:
+    mode = os.getenv("OUTPUT_MODE", "console").strip().lower()
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown OUTPUT_MODE '{mode}', expected one of {', '.join(OUTPUT_MODES)}")
+    # Empty path writes to stdout; otherwise the file is appended to.
+    path = os.getenv("OUTPUT_PATH", "").strip()
+    top_n = int(os.getenv("OUTPUT_TOP_N", "10"))
+    max_pending_cycles = int(os.getenv("OUTPUT_MAX_PENDING_CYCLES", "256"))
+
+    return OutputConfig(mode=mode, path=path, top_n=top_n, max_pending_cycles=max_pending_cycles)
+
+
+def get_rpc_routing_config() -> RpcRoutingConfig:
+    hedge_enabled = os.getenv("RPC_HEDGE_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+    hedge_min_delay_sec = float(os.getenv("RPC_HEDGE_MIN_DELAY_MS", "25")) / 1000
+    max_block_lag = int(os.getenv("RPC_MAX_BLOCK_LAG", "3"))
+    stats_window = int(os.getenv("RPC_STATS_WINDOW", "200"))
+    retry_after_sec = float(os.getenv("RPC_ENDPOINT_RETRY_SEC", "15"))
+
+    return RpcRoutingConfig(
+        hedge_enabled=hedge_enabled,
+        hedge_min_delay_sec=hedge_min_delay_sec,
+        max_block_lag=max_block_lag,
+        stats_window=stats_window,
+        retry_after_sec=retry_after_sec,
+    )
+
+
+def get_metrics_config() -> MetricsConfig:
+    host = os.getenv("METRICS_HOST", "127.0.0.1").strip()
+    port = int(os.getenv("METRICS_PORT", "0"))
+
+    return MetricsConfig(host=host, port=port)
+
+
+def get_fee_cache_config() -> FeeCacheConfig:
+    enabled = os.getenv("FEE_CACHE_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+    native_price_ttl_sec = float(os.getenv("FEE_CACHE_NATIVE_PRICE_TTL_SEC", "60"))
+    bridge_quote_ttl_sec = float(os.getenv("FEE_CACHE_BRIDGE_QUOTE_TTL_SEC", "30"))
+    bridge_quote_stale_sec = float(os.getenv("FEE_CACHE_BRIDGE_QUOTE_STALE_SEC", "120"))
+    gas_price_ttl_sec = float(os.getenv("FEE_CACHE_GAS_PRICE_TTL_SEC", "5"))
+
+    return FeeCacheConfig(
+        enabled=enabled,
+        native_price_ttl_sec=native_price_ttl_sec,
+        bridge_quote_ttl_sec=bridge_quote_ttl_sec,
+        bridge_quote_stale_sec=bridge_quote_stale_sec,
+        gas_price_ttl_sec=gas_price_ttl_sec,
+    )
+
+
+def get_fee_http_config() -> FeeHttpConfig:
+    max_connections = int(os.getenv("FEE_HTTP_MAX_CONNECTIONS", "32"))
+    max_connections_per_host = int(os.getenv("FEE_HTTP_MAX_CONNECTIONS_PER_HOST", "4"))
+    request_timeout_sec = float(os.getenv("FEE_HTTP_REQUEST_TIMEOUT_SEC", "8"))
+    route_deadline_sec = float(os.getenv("FEE_ROUTE_DEADLINE_SEC", "5"))
+
+    return FeeHttpConfig(
+        max_connections=max_connections,
+        max_connections_per_host=max_connections_per_host,
+        request_timeout_sec=request_timeout_sec,
+        route_deadline_sec=route_deadline_sec,
+    )
+
+
+def get_collector_config() -> CollectorConfig:
+    read_mode = os.getenv("COLLECTOR_READ_MODE", "multicall").strip().lower()
+    if read_mode not in COLLECTOR_READ_MODES:
+        raise ValueError(
+            f"Unknown COLLECTOR_READ_MODE '{read_mode}', expected one of {', '.join(COLLECTOR_READ_MODES)}"
+        )
+    multicall_gas_limit = int(os.getenv("MULTICALL_GAS_LIMIT", "30000000"))
+    multicall_gas_per_call = int(os.getenv("MULTICALL_GAS_PER_CALL", "15000"))
+    rpc_max_connections_per_chain = int(os.getenv("RPC_MAX_CONNECTIONS_PER_CHAIN", "16"))
+    rpc_max_in_flight_per_chain = int(os.getenv("RPC_MAX_IN_FLIGHT_PER_CHAIN", "64"))
+    rpc_request_timeout_sec = float(os.getenv("RPC_REQUEST_TIMEOUT_SEC", "10"))
+    sync_confirmation_depth = int(os.getenv("SYNC_CONFIRMATION_DEPTH", "12"))
+    sync_max_block_range = int(os.getenv("SYNC_MAX_BLOCK_RANGE", "2000"))
+    poll_mode = os.getenv("POLL_MODE", "fixed").strip().lower()
+    if poll_mode not in POLL_MODES:
+        raise ValueError(f"Unknown POLL_MODE '{poll_mode}', expected one of {', '.join(POLL_MODES)}")
+    poll_interval_sec = float(os.getenv("POLL_INTERVAL_SEC", "5"))
+    poll_min_interval_sec = float(os.getenv("POLL_MIN_INTERVAL_SEC", "0.25"))
+    poll_max_interval_sec = float(os.getenv("POLL_MAX_INTERVAL_SEC", "30"))
+    # JSON-RPC calls per minute for each chain; POLL_RPC_BUDGETS_JSON overrides single chains,
+    # e.g. {"ethereum": 60}.
+    poll_rpc_budget_per_min = float(os.getenv("POLL_RPC_BUDGET_PER_MIN", "120"))
+    poll_rpc_budgets_per_min = {
+        str(chain).lower(): float(budget)
+        for chain, budget in json.loads(os.getenv("POLL_RPC_BUDGETS_JSON", "").strip() or "{}").items()
+    }
+    process_workers = os.getenv("COLLECTOR_PROCESSES", "0").strip().lower() in ("1", "true", "yes")
+    # 0 = one worker per chain; otherwise each chain's pools are split into shards of this size.
+    pools_per_worker = int(os.getenv("COLLECTOR_POOLS_PER_WORKER", "0"))
+    # 0 = sized from the shard (several cycles of headroom). A ring must hold one full shard
+    # cycle; per-chain shards are checked against their pool count when workers are planned.
+    ring_records = int(os.getenv("COLLECTOR_RING_RECORDS", "0"))
+    if ring_records < 0 or (ring_records and ring_records < pools_per_worker):
+        raise ValueError(
+            f"COLLECTOR_RING_RECORDS={ring_records} must be 0 or at least "
+            f"COLLECTOR_POOLS_PER_WORKER={pools_per_worker}"
+        )
+
+    return CollectorConfig(
+        read_mode=read_mode,
+        multicall_gas_limit=multicall_gas_limit,
+        multicall_gas_per_call=multicall_gas_per_call,
+        rpc_max_connections_per_chain=rpc_max_connections_per_chain,
+        rpc_max_in_flight_per_chain=rpc_max_in_flight_per_chain,
+        rpc_request_timeout_sec=rpc_request_timeout_sec,
+        sync_confirmation_depth=sync_confirmation_depth,
+        sync_max_block_range=sync_max_block_range,
+        poll_mode=poll_mode,
+        poll_interval_sec=poll_interval_sec,
+        poll_min_interval_sec=poll_min_interval_sec,
+        poll_max_interval_sec=poll_max_interval_sec,
+        poll_rpc_budget_per_min=poll_rpc_budget_per_min,
+        poll_rpc_budgets_per_min=poll_rpc_budgets_per_min,
+        process_workers=process_workers,
+        pools_per_worker=pools_per_worker,
+        ring_records=ring_records,
     )
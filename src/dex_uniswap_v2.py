@@ -1,12 +1,25 @@
 from __future__ import annotations
 
+import asyncio
 import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
 
 from web3 import Web3
 
 from src.config import V2PoolConfig
+from src.fee_cache import FeeInputCache
+from src.metrics import count_errors, track
+from src.multicall import (
+    GET_BLOCK_NUMBER_SELECTOR,
+    MULTICALL3_ABI,
+    MULTICALL3_ADDRESS,
+    chunked,
+    max_calls_per_batch,
+)
 from src.price_types import PriceSnapshot
+from src.rpc_async import AsyncJsonRpcClient
+from src.rpc_batch import JsonRpcBatchClient, unwrap
 
 V2_PAIR_ABI = [
     {
@@ -24,34 +37,265 @@ V2_PAIR_ABI = [
     }
 ]
 
+GET_RESERVES_SELECTOR = bytes.fromhex("0902f1ac")
+GET_RESERVES_CALLDATA = "0x" + GET_RESERVES_SELECTOR.hex()
+_UINT112_MASK = (1 << 112) - 1
+
+
+@dataclass(frozen=True)
+class ReserveRead:
+    reserve0: int
+    reserve1: int
+    block_number: int
+    latency_ms: float
+
+
+def decode_get_reserves(return_data: bytes) -> tuple[int, int]:
+    # getReserves() returns three static 32-byte words; slice them instead of ABI-decoding.
+    if len(return_data) < 96:
+        raise ValueError(f"getReserves returned {len(return_data)} bytes, expected 96")
+    reserve0 = int.from_bytes(return_data[0:32], "big")
+    reserve1 = int.from_bytes(return_data[32:64], "big")
+    if reserve0 > _UINT112_MASK or reserve1 > _UINT112_MASK:
+        raise ValueError("getReserves returned values wider than uint112")
+    return reserve0, reserve1
+
+
+def snapshot_from_reserves(
+    pool: V2PoolConfig,
+    reserve0: int,
+    reserve1: int,
+    block_number: int,
+    latency_ms: float,
+) -> PriceSnapshot:
+    reserve0_norm = reserve0 / pool.token0_scale
+    reserve1_norm = reserve1 / pool.token1_scale
+    if reserve0_norm == 0:
+        raise ValueError(f"Zero reserve0 for pool {pool.pool_address}")
+
+    return PriceSnapshot(
+        timestamp=datetime.now(timezone.utc),
+        chain=pool.chain,
+        dex=pool.dex,
+        pool_address=pool.pool_address,
+        pair_key=pool.pair_key,
+        price_token1_per_token0=reserve1_norm / reserve0_norm,
+        block_number=block_number,
+        latency_ms=latency_ms,
+        reserve0=reserve0_norm,
+        reserve1=reserve1_norm,
+    )
+
+
+def _decode_reserves_result(
+    pool: V2PoolConfig,
+    success: bool,
+    return_data: bytes,
+    block_number: int,
+    latency_ms: float,
+) -> PriceSnapshot | Exception:
+    if not success or len(return_data) < 96:
+        return ValueError(f"getReserves reverted for pool {pool.pool_address}")
+    try:
+        reserve0, reserve1 = decode_get_reserves(return_data)
+        return snapshot_from_reserves(pool, reserve0, reserve1, block_number, latency_ms)
+    except Exception as exc:
+        return exc
+
+
+def _get_reserves_call(pool: V2PoolConfig, block_tag: str) -> tuple[str, list]:
+    call = {"to": pool.checksum_address, "data": GET_RESERVES_CALLDATA}
+    return ("eth_call", [call, block_tag])
+
 
 class UniswapV2ReserveReader:
     def __init__(self, chain_web3: dict[str, Web3]) -> None:
         self.chain_web3 = chain_web3
 
     def fetch_snapshot(self, pool: V2PoolConfig) -> PriceSnapshot:
-        start = time.perf_counter()
         w3 = self.chain_web3[pool.chain]
-        pair = w3.eth.contract(address=Web3.to_checksum_address(pool.pool_address), abi=V2_PAIR_ABI)
+        # latency_ms covers the getReserves round trip only; eth_blockNumber is timed separately.
+        with track("rpc_get_reserves", pool.chain) as timer:
+            return_data = w3.eth.call({"to": pool.checksum_address, "data": GET_RESERVES_CALLDATA})
+        latency_ms = (time.perf_counter() - timer.start) * 1000
+        with track("rpc_block_number", pool.chain):
+            block_number = w3.eth.block_number
+
+        with track("decode", pool.chain):
+            reserve0, reserve1 = decode_get_reserves(return_data)
+            return snapshot_from_reserves(pool, reserve0, reserve1, block_number, latency_ms)
+
+
+class MulticallV2ReserveReader:
+    def __init__(
+        self,
+        chain_web3: dict[str, Web3],
+        gas_limit: int = 30_000_000,
+        gas_per_call: int = 15_000,
+    ) -> None:
+        self.chain_web3 = chain_web3
+        self.gas_limit = gas_limit
+        self.batch_size = max_calls_per_batch(gas_limit, gas_per_call)
+        self._multicalls = {
+            chain: w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+            for chain, w3 in chain_web3.items()
+        }
 
-        reserve0, reserve1, _ = pair.functions.getReserves().call()
-        block_number = w3.eth.block_number
+    def fetch_chain_snapshots(
+        self,
+        chain: str,
+        pools: list[V2PoolConfig],
+    ) -> list[PriceSnapshot | Exception]:
+        results: list[PriceSnapshot | Exception] = []
+        for pool, read in zip(pools, self.fetch_chain_reserves(chain, pools), strict=True):
+            if isinstance(read, Exception):
+                results.append(read)
+                continue
+            try:
+                results.append(
+                    snapshot_from_reserves(
+                        pool, read.reserve0, read.reserve1, read.block_number, read.latency_ms
+                    )
+                )
+            except Exception as exc:
+                results.append(exc)
+        return results
 
-        reserve0_norm = reserve0 / (10 ** pool.token0_decimals)
-        reserve1_norm = reserve1 / (10 ** pool.token1_decimals)
-        if reserve0_norm == 0:
-            raise ValueError(f"Zero reserve0 for pool {pool.pool_address}")
+    def fetch_chain_reserves(
+        self,
+        chain: str,
+        pools: list[V2PoolConfig],
+    ) -> list[ReserveRead | Exception]:
+        multicall = self._multicalls[chain]
 
-        price = reserve1_norm / reserve0_norm
+        results: list[ReserveRead | Exception] = []
+        # The first chunk reads at "latest"; later chunks are pinned to the same block.
+        block_identifier: int | str = "latest"
+        for chunk in chunked(pools, self.batch_size):
+            start = time.perf_counter()
+            calls = [(MULTICALL3_ADDRESS, False, GET_BLOCK_NUMBER_SELECTOR)]
+            calls.extend(
+                (pool.checksum_address, True, GET_RESERVES_SELECTOR)
+                for pool in chunk
+            )
+            try:
+                with track("rpc_multicall", chain):
+                    returned = multicall.functions.aggregate3(calls).call(
+                        {"gas": self.gas_limit},
+                        block_identifier=block_identifier,
+                    )
+            except Exception as exc:
+                results.extend(exc for _ in chunk)
+                continue
+            latency_ms = (time.perf_counter() - start) * 1000
+
+            block_number = int.from_bytes(returned[0][1][:32], "big")
+            block_identifier = block_number
+            failed = 0
+            with track("decode", chain):
+                for pool, (success, return_data) in zip(chunk, returned[1:], strict=True):
+                    if not success:
+                        results.append(ValueError(f"getReserves reverted for pool {pool.pool_address}"))
+                        failed += 1
+                        continue
+                    try:
+                        reserve0, reserve1 = decode_get_reserves(return_data)
+                    except ValueError as exc:
+                        results.append(exc)
+                        failed += 1
+                        continue
+                    results.append(ReserveRead(reserve0, reserve1, block_number, latency_ms))
+            count_errors("decode", chain, failed)
+        return results
+
+
+class BatchRpcV2ReserveReader:
+    def __init__(
+        self,
+        chain_clients: dict[str, JsonRpcBatchClient],
+        fee_cache: FeeInputCache | None = None,
+    ) -> None:
+        self.chain_clients = chain_clients
+        # eth_gasPrice rides along in the reserve batch only when a fee cache will take it,
+        # so the fee estimator finds it already cached for this block.
+        self.fee_cache = fee_cache
+
+    def fetch_chain_snapshots(
+        self,
+        chain: str,
+        pools: list[V2PoolConfig],
+    ) -> list[PriceSnapshot | Exception]:
+        client = self.chain_clients[chain]
+        start = time.perf_counter()
+
+        # eth_blockNumber brackets the reads: when both agree, every "latest" eth_call in
+        # between was served at that block. Otherwise the reads are re-issued pinned to it.
+        gas_calls = [("eth_gasPrice", [])] if self.fee_cache is not None else []
+        reserve_calls = [_get_reserves_call(pool, "latest") for pool in pools]
+        with track("rpc_batch", chain):
+            results = client.call_batch(
+                [("eth_blockNumber", []), *gas_calls, *reserve_calls, ("eth_blockNumber", [])]
+            )
+        block_before = int(unwrap(results[0]), 16)
+        block_after = int(unwrap(results[-1]), 16)
+        gas_results = results[1 : 1 + len(gas_calls)]
+        reserve_results = results[1 + len(gas_calls) : -1]
+
+        block_number = max(block_before, block_after)
+        if block_before != block_after:
+            block_tag = hex(block_number)
+            with track("rpc_batch", chain):
+                pinned = client.call_batch(
+                    [*gas_calls, *(_get_reserves_call(pool, block_tag) for pool in pools)]
+                )
+            gas_results = pinned[: len(gas_calls)]
+            reserve_results = pinned[len(gas_calls) :]
+
+        for gas_price in gas_results:
+            if not isinstance(gas_price, Exception):
+                self.fee_cache.store_gas_price(chain, int(gas_price, 16), block_number=block_number)
         latency_ms = (time.perf_counter() - start) * 1000
 
-        return PriceSnapshot(
-            timestamp=datetime.now(timezone.utc),
-            chain=pool.chain,
-            dex=pool.dex,
-            pool_address=pool.pool_address,
-            pair_key=pool.pair_key,
-            price_token1_per_token0=price,
-            block_number=block_number,
-            latency_ms=latency_ms,
-        )
+        snapshots: list[PriceSnapshot | Exception] = []
+        with track("decode", chain):
+            for pool, result in zip(pools, reserve_results, strict=True):
+                if isinstance(result, Exception):
+                    snapshots.append(result)
+                    continue
+                return_data = bytes.fromhex(result[2:]) if isinstance(result, str) else b""
+                snapshots.append(
+                    _decode_reserves_result(pool, True, return_data, block_number, latency_ms)
+                )
+        count_errors("decode", chain, sum(isinstance(result, Exception) for result in snapshots))
+        return snapshots
+
+
+class AsyncUniswapV2ReserveReader:
+    def __init__(self, chain_clients: dict[str, AsyncJsonRpcClient]) -> None:
+        self.chain_clients = chain_clients
+
+    async def fetch_snapshot(self, pool: V2PoolConfig) -> PriceSnapshot:
+        start = time.perf_counter()
+        client = self.chain_clients[pool.chain]
+
+        # getReserves and the block number share one keep-alive POST.
+        with track("rpc_batch", pool.chain):
+            reserves_result, block_result = await client.call_batch(
+                [
+                    _get_reserves_call(pool, "latest"),
+                    ("eth_blockNumber", []),
+                ]
+            )
+            reserves_hex, block_hex = unwrap(reserves_result), unwrap(block_result)
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        with track("decode", pool.chain):
+            return_data = bytes.fromhex(reserves_hex[2:])
+            block_number = int(block_hex, 16)
+            result = _decode_reserves_result(pool, True, return_data, block_number, latency_ms)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def aclose(self) -> None:
+        await asyncio.gather(*(client.aclose() for client in self.chain_clients.values()))
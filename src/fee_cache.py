@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from src.price_types import PriceSnapshot
+
+# (buy_chain, sell_chain, volume)
+BridgeRoute = tuple[str, str, float]
+
+
+@dataclass
+class CacheCounter:
+    hits: int = 0
+    misses: int = 0
+    stale_hits: int = 0
+
+    @property
+    def saved_ratio(self) -> float:
+        total = self.hits + self.misses + self.stale_hits
+        return (self.hits + self.stale_hits) / total if total else 0.0
+
+
+class FeeInputCache:
+    def __init__(
+        self,
+        native_price_ttl_sec: float = 60.0,
+        bridge_quote_ttl_sec: float = 30.0,
+        bridge_quote_stale_sec: float = 120.0,
+        gas_price_ttl_sec: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.native_price_ttl_sec = native_price_ttl_sec
+        self.bridge_quote_ttl_sec = bridge_quote_ttl_sec
+        self.bridge_quote_stale_sec = bridge_quote_stale_sec
+        self.gas_price_ttl_sec = gas_price_ttl_sec
+        self.clock = clock
+        self.counters = {
+            "gas_price": CacheCounter(),
+            "native_price": CacheCounter(),
+            "bridge_quote": CacheCounter(),
+        }
+        self._lock = threading.Lock()
+        self._blocks: dict[str, int] = {}
+        self._gas_prices: dict[tuple[str, int | None], tuple[int, float]] = {}
+        self._native_prices: dict[str, float] = {}
+        self._native_fetched_at: float | None = None
+        self._bridge_quotes: dict[BridgeRoute, tuple[float, float]] = {}
+        self._revalidating: set[BridgeRoute] = set()
+
+    def observe_snapshots(self, snapshots: list[PriceSnapshot]) -> None:
+        with self._lock:
+            for snapshot in snapshots:
+                if snapshot.block_number > self._blocks.get(snapshot.chain, -1):
+                    self._blocks[snapshot.chain] = snapshot.block_number
+            # Only the current block of each chain can be hit again.
+            self._gas_prices = {
+                key: entry
+                for key, entry in self._gas_prices.items()
+                if key[1] is None or key[1] == self._blocks.get(key[0])
+            }
+
+    def lookup_gas_price(self, chain: str) -> int | None:
+        # Keyed by the chain's current block; without a known block fall back to a short TTL.
+        now = self.clock()
+        with self._lock:
+            key = (chain, self._blocks.get(chain))
+            entry = self._gas_prices.get(key)
+            if entry is not None and (key[1] is not None or now - entry[1] < self.gas_price_ttl_sec):
+                self.counters["gas_price"].hits += 1
+                return entry[0]
+            self.counters["gas_price"].misses += 1
+            return None
+
+    def record_coalesced(self, kind: str) -> None:
+        # A lookup that missed but joined a fetch already in flight sent no request of its own.
+        with self._lock:
+            counter = self.counters[kind]
+            counter.misses -= 1
+            counter.hits += 1
+
+    def store_gas_price(self, chain: str, gas_price_wei: int, block_number: int | None = None) -> None:
+        # Readers that saw the price next to a block pass it, ahead of observe_snapshots moving there.
+        with self._lock:
+            block = block_number if block_number is not None else self._blocks.get(chain)
+            self._gas_prices[(chain, block)] = (gas_price_wei, self.clock())
+
+    def lookup_native_price(self, coingecko_id: str) -> float | None:
+        now = self.clock()
+        with self._lock:
+            fresh = self._native_fetched_at is not None and now - self._native_fetched_at < self.native_price_ttl_sec
+            if fresh and coingecko_id in self._native_prices:
+                self.counters["native_price"].hits += 1
+                return self._native_prices[coingecko_id]
+            self.counters["native_price"].misses += 1
+            return None
+
+    def store_native_prices(self, prices: dict[str, float]) -> None:
+        with self._lock:
+            self._native_prices = dict(prices)
+            self._native_fetched_at = self.clock()
+
+    def lookup_bridge_fee(self, route: BridgeRoute) -> tuple[float | None, bool]:
+        # Returns (value, revalidate). A stale value is still returned, and `revalidate` is True
+        # for exactly one caller, who should refresh it and call store_bridge_fee.
+        now = self.clock()
+        with self._lock:
+            entry = self._bridge_quotes.get(route)
+            if entry is not None:
+                value, fetched_at = entry
+                age = now - fetched_at
+                if age < self.bridge_quote_ttl_sec:
+                    self.counters["bridge_quote"].hits += 1
+                    return value, False
+                if age < self.bridge_quote_ttl_sec + self.bridge_quote_stale_sec:
+                    self.counters["bridge_quote"].stale_hits += 1
+                    claimed = route not in self._revalidating
+                    self._revalidating.add(route)
+                    return value, claimed
+            self.counters["bridge_quote"].misses += 1
+            return None, False
+
+    def store_bridge_fee(self, route: BridgeRoute, value: float | None) -> None:
+        # `None` only releases a revalidation claim after a failed refresh.
+        with self._lock:
+            self._revalidating.discard(route)
+            if value is not None:
+                self._bridge_quotes[route] = (value, self.clock())
+
+    def stats_line(self) -> str:
+        return " ".join(
+            f"{name}(hit={c.hits} stale={c.stale_hits} miss={c.misses} saved={c.saved_ratio * 100:.0f}%)"
+            for name, c in self.counters.items()
+        )
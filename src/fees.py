@@ -1,14 +1,15 @@
 from __future__ import annotations
 
-import json
+import asyncio
 import urllib.parse
-import urllib.request
-from typing import Any
-
-from web3 import Web3
+from typing import Any, Awaitable, Callable
 
 from src.config import ArbitrageConfig
+from src.fee_cache import BridgeRoute, FeeInputCache
+from src.http_async import AsyncHttpClient
+from src.metrics import track
 from src.price_types import FeeBreakdown, PriceSnapshot
+from src.rpc_async import AsyncJsonRpcClient
 
 CHAIN_NATIVE_COINGECKO_ID = {
     "ethereum": "ethereum",
@@ -24,12 +25,6 @@ class FeeEstimationError(Exception):
     pass
 
 
-def _http_get_json(url: str, timeout_sec: int = 8) -> Any:
-    req = urllib.request.Request(url, headers={"Accept": "application/json", "User-Agent": "trade-bot/0.1"})
-    with urllib.request.urlopen(req, timeout=timeout_sec) as resp:
-        return json.loads(resp.read().decode("utf-8"))
-
-
 def _json_path_get(payload: Any, path: str) -> float:
     current: Any = payload
     for key in path.split("."):
@@ -43,75 +38,249 @@ def _json_path_get(payload: Any, path: str) -> float:
         raise FeeEstimationError(f"Value at '{path}' is not numeric: {current!r}") from exc
 
 
-class RealTimeFeeEstimator:
+class AsyncRealTimeFeeEstimator:
     def __init__(
         self,
-        chain_web3: dict[str, Web3],
+        chain_clients: dict[str, AsyncJsonRpcClient],
+        http: AsyncHttpClient,
         cfg: ArbitrageConfig,
+        cache: FeeInputCache | None = None,
+        route_deadline_sec: float = 5.0,
     ) -> None:
-        self.chain_web3 = chain_web3
+        self.chain_clients = chain_clients
+        self.http = http
         self.cfg = cfg
+        self.cache = cache
+        self.route_deadline_sec = route_deadline_sec
+        # Concurrent routes that need the same input share one request.
+        self._in_flight: dict[tuple[str, ...], asyncio.Task] = {}
+        self._background: set[asyncio.Task] = set()
 
-    def _native_price_usd(self, chain: str) -> float:
+    async def _shared(self, key: tuple[str, ...], kind: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._release(key, done))
+        elif self.cache is not None:
+            self.cache.record_coalesced(kind)
+        # Shielded so one route hitting its deadline does not cancel the fetch for the others.
+        return await asyncio.shield(task)
+
+    def _release(self, key: tuple[str, ...], task: asyncio.Task) -> None:
+        self._in_flight.pop(key, None)
+        # Every waiter may have hit its deadline; retrieve the outcome so it is not reported as lost.
+        if not task.cancelled():
+            task.exception()
+
+    async def _native_price_usd(self, chain: str) -> float:
         coingecko_id = CHAIN_NATIVE_COINGECKO_ID.get(chain)
         if not coingecko_id:
             raise FeeEstimationError(f"No native price mapping for chain '{chain}'")
+        if self.cache is not None:
+            cached = self.cache.lookup_native_price(coingecko_id)
+            if cached is not None:
+                return cached
 
-        query = urllib.parse.urlencode({"ids": coingecko_id, "vs_currencies": "usd"})
-        url = f"https://api.coingecko.com/api/v3/simple/price?{query}"
-        payload = _http_get_json(url)
-        try:
-            return float(payload[coingecko_id]["usd"])
-        except (KeyError, TypeError, ValueError) as exc:
-            raise FeeEstimationError(f"Unexpected CoinGecko payload for '{chain}': {payload!r}") from exc
-
-    def _gas_cost_usd(self, chain: str) -> float:
-        if chain not in self.chain_web3:
-            raise FeeEstimationError(f"Missing Web3 client for chain '{chain}'")
-        w3 = self.chain_web3[chain]
-        gas_price_wei = int(w3.eth.gas_price)
-        native_price = self._native_price_usd(chain)
-        gas_native = (gas_price_wei * self.cfg.gas_units_per_swap) / 1e18
-        return gas_native * native_price
-
-    def _bridge_fee_usd(self, buy_chain: str, sell_chain: str, volume: float) -> float:
-        if not self.cfg.bridge_fee_url_template or not self.cfg.bridge_fee_json_path:
-            raise FeeEstimationError(
-                "Missing ARB_BRIDGE_FEE_URL_TEMPLATE or ARB_BRIDGE_FEE_JSON_PATH"
-            )
+        prices = await self._shared(("native_prices",), "native_price", self._fetch_all_native_prices_usd)
+        return prices[coingecko_id]
+
+    async def _fetch_all_native_prices_usd(self) -> dict[str, float]:
+        with track("fee_native_price", "coingecko"):
+            prices = _parse_native_prices(await self.http.get_json(_all_native_prices_url(self.cfg)))
+        if self.cache is not None:
+            self.cache.store_native_prices(prices)
+        return prices
+
+    async def _gas_price_wei(self, chain: str) -> int:
+        if chain not in self.chain_clients:
+            raise FeeEstimationError(f"Missing RPC client for chain '{chain}'")
+        if self.cache is not None:
+            cached = self.cache.lookup_gas_price(chain)
+            if cached is not None:
+                return cached
+
+        async def fetch() -> int:
+            with track("fee_gas_price", chain):
+                gas_price_wei = int(await self.chain_clients[chain].call("eth_gasPrice", []), 16)
+            if self.cache is not None:
+                self.cache.store_gas_price(chain, gas_price_wei)
+            return gas_price_wei
+
+        return await self._shared(("gas_price", chain), "gas_price", fetch)
 
-        url = self.cfg.bridge_fee_url_template.format(
-            buy_chain=buy_chain,
-            sell_chain=sell_chain,
-            volume=volume,
+    async def _gas_cost_usd(self, chain: str) -> float:
+        gas_price_wei, native_price = await asyncio.gather(
+            self._gas_price_wei(chain),
+            self._native_price_usd(chain),
         )
-        payload = _http_get_json(url)
-        return _json_path_get(payload, self.cfg.bridge_fee_json_path)
+        return _gas_cost_usd(self.cfg, gas_price_wei, native_price)
 
-    def estimate_route_fees(
+    async def _bridge_fee_usd(self, buy_chain: str, sell_chain: str, volume: float) -> float:
+        url = _bridge_fee_url(self.cfg, buy_chain, sell_chain, volume)
+        route = (buy_chain, sell_chain, volume)
+
+        async def fetch() -> float:
+            with track("fee_bridge", f"{buy_chain}->{sell_chain}"):
+                return _json_path_get(await self.http.get_json(url), self.cfg.bridge_fee_json_path)
+
+        if self.cache is None:
+            return await fetch()
+
+        async def fetch_and_store() -> float:
+            fetched = await fetch()
+            if self.cache is not None:
+                self.cache.store_bridge_fee(route, fetched)
+            return fetched
+
+        value, revalidate = self.cache.lookup_bridge_fee(route)
+        if value is None:
+            # A quote that lands after this route's deadline is still cached for the next cycle.
+            value = await self._shared(("bridge", url), "bridge_quote", fetch_and_store)
+        elif revalidate:
+            task = asyncio.create_task(self._revalidate_bridge(route, fetch))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        return value
+
+    async def _revalidate_bridge(self, route: BridgeRoute, fetch: Callable[[], Awaitable[float]]) -> None:
+        try:
+            value: float | None = await fetch()
+        except Exception:
+            value = None
+        if self.cache is not None:
+            self.cache.store_bridge_fee(route, value)
+
+    async def estimate_route_fees(
         self,
         buy_chain: str,
         sell_chain: str,
         volume: float,
     ) -> FeeBreakdown:
-        gas_buy = self._gas_cost_usd(buy_chain)
-        gas_sell = self._gas_cost_usd(sell_chain)
-        bridge_fee = self._bridge_fee_usd(buy_chain=buy_chain, sell_chain=sell_chain, volume=volume)
-
-        # Two swaps: buy on cheaper chain, sell on expensive chain.
-        dex_fee = volume * (self.cfg.dex_fee_bps_per_swap / 10_000.0) * 2.0
-        total = gas_buy + gas_sell + bridge_fee + dex_fee
-
-        return FeeBreakdown(
-            buy_chain=buy_chain,
-            sell_chain=sell_chain,
-            gas_buy_usd=gas_buy,
-            gas_sell_usd=gas_sell,
-            bridge_fee_usd=bridge_fee,
-            dex_fee_usd=dex_fee,
-            total_fees_usd=total,
+        with track("fee_route", f"{buy_chain}->{sell_chain}"):
+            gas_buy, gas_sell, bridge_fee = await asyncio.gather(
+                self._gas_cost_usd(buy_chain),
+                self._gas_cost_usd(sell_chain),
+                self._bridge_fee_usd(buy_chain=buy_chain, sell_chain=sell_chain, volume=volume),
+            )
+        return _fee_breakdown(self.cfg, buy_chain, sell_chain, volume, gas_buy, gas_sell, bridge_fee)
+
+    async def _estimate_route_or_raise(self, buy_chain: str, sell_chain: str, volume: float) -> FeeBreakdown:
+        # aiohttp request timeouts are asyncio.TimeoutError too; rename them so only the route
+        # deadline itself is reported as one.
+        try:
+            return await self.estimate_route_fees(buy_chain=buy_chain, sell_chain=sell_chain, volume=volume)
+        except asyncio.TimeoutError as exc:
+            raise FeeEstimationError("request timed out") from exc
+
+    async def estimate_routes(
+        self,
+        routes: list[tuple[str, str]],
+        volume: float,
+    ) -> tuple[dict[tuple[str, str], FeeBreakdown], list[str]]:
+        # Every route gets its own deadline; a slow route drops only its own quote.
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(
+                    self._estimate_route_or_raise(buy_chain, sell_chain, volume),
+                    timeout=self.route_deadline_sec,
+                )
+                for buy_chain, sell_chain in routes
+            ),
+            return_exceptions=True,
         )
 
+        route_fees: dict[tuple[str, str], FeeBreakdown] = {}
+        errors: list[str] = []
+        for (buy_chain, sell_chain), result in zip(routes, results, strict=True):
+            if isinstance(result, asyncio.TimeoutError):
+                errors.append(
+                    f"fee_quote_failed route={buy_chain}->{sell_chain} "
+                    f"reason=deadline {self.route_deadline_sec:.1f}s exceeded"
+                )
+            elif isinstance(result, Exception):
+                errors.append(f"fee_quote_failed route={buy_chain}->{sell_chain} reason={result}")
+            else:
+                route_fees[(buy_chain, sell_chain)] = result
+        return route_fees, errors
+
+    async def aclose(self) -> None:
+        # Shielded fetches outlive the routes that started them; stop them before their clients close.
+        tasks = [*self._in_flight.values(), *self._background]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.http.aclose()
+
+
+def _all_native_prices_url(cfg: ArbitrageConfig) -> str:
+    ids = sorted(set(CHAIN_NATIVE_COINGECKO_ID.values()))
+    query = urllib.parse.urlencode({"ids": ",".join(ids), "vs_currencies": "usd"})
+    return f"{cfg.price_api_url}/simple/price?{query}"
+
+
+def _parse_native_prices(payload: Any) -> dict[str, float]:
+    ids = sorted(set(CHAIN_NATIVE_COINGECKO_ID.values()))
+    try:
+        return {coingecko_id: float(payload[coingecko_id]["usd"]) for coingecko_id in ids}
+    except (KeyError, TypeError, ValueError) as exc:
+        raise FeeEstimationError(f"Unexpected CoinGecko payload: {payload!r}") from exc
+
+
+def _gas_cost_usd(cfg: ArbitrageConfig, gas_price_wei: int, native_price: float) -> float:
+    gas_native = (gas_price_wei * cfg.gas_units_per_swap) / 1e18
+    return gas_native * native_price
+
+
+def _bridge_fee_url(cfg: ArbitrageConfig, buy_chain: str, sell_chain: str, volume: float) -> str:
+    if not cfg.bridge_fee_url_template or not cfg.bridge_fee_json_path:
+        raise FeeEstimationError(
+            "Missing ARB_BRIDGE_FEE_URL_TEMPLATE or ARB_BRIDGE_FEE_JSON_PATH"
+        )
+
+    return cfg.bridge_fee_url_template.format(
+        buy_chain=buy_chain,
+        sell_chain=sell_chain,
+        volume=volume,
+    )
+
+
+def _fee_breakdown(
+    cfg: ArbitrageConfig,
+    buy_chain: str,
+    sell_chain: str,
+    volume: float,
+    gas_buy: float,
+    gas_sell: float,
+    bridge_fee: float,
+) -> FeeBreakdown:
+    # Two swaps: buy on cheaper chain, sell on expensive chain.
+    dex_fee = volume * (cfg.dex_fee_bps_per_swap / 10_000.0) * 2.0
+    total = gas_buy + gas_sell + bridge_fee + dex_fee
+
+    return FeeBreakdown(
+        buy_chain=buy_chain,
+        sell_chain=sell_chain,
+        gas_buy_usd=gas_buy,
+        gas_sell_usd=gas_sell,
+        bridge_fee_usd=bridge_fee,
+        dex_fee_usd=dex_fee,
+        total_fees_usd=total,
+    )
+
+
+def reprice_fee_breakdown(quote: FeeBreakdown, cfg: ArbitrageConfig, gas_scale: float = 1.0) -> FeeBreakdown:
+    # Re-applies a config's DEX fee and gas units to a recorded quote; the bridge fee is kept as quoted.
+    return _fee_breakdown(
+        cfg,
+        quote.buy_chain,
+        quote.sell_chain,
+        cfg.volume,
+        quote.gas_buy_usd * gas_scale,
+        quote.gas_sell_usd * gas_scale,
+        quote.bridge_fee_usd,
+    )
+
 
 def route_pairs_from_snapshots(snapshots: list[PriceSnapshot]) -> set[tuple[str, str]]:
     routes: set[tuple[str, str]] = set()
@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+from src.price_types import ArbitrageOpportunity, FeeBreakdown, PriceSnapshot
+
+# Fixed-width little-endian columns per stream; string fields are stored as interned int32 ids.
+SCHEMAS: dict[str, tuple[tuple[str, str], ...]] = {
+    "snapshots": (
+        ("timestamp_ns", "<i8"),
+        ("chain", "<i4"),
+        ("dex", "<i4"),
+        ("pool_address", "<i4"),
+        ("pair_key", "<i4"),
+        ("price_token1_per_token0", "<f8"),
+        ("block_number", "<i8"),
+        ("latency_ms", "<f8"),
+        ("reserve0", "<f8"),
+        ("reserve1", "<f8"),
+    ),
+    "fees": (
+        ("timestamp_ns", "<i8"),
+        ("buy_chain", "<i4"),
+        ("sell_chain", "<i4"),
+        ("gas_buy_usd", "<f8"),
+        ("gas_sell_usd", "<f8"),
+        ("bridge_fee_usd", "<f8"),
+        ("dex_fee_usd", "<f8"),
+        ("total_fees_usd", "<f8"),
+    ),
+    "opportunities": (
+        ("timestamp_ns", "<i8"),
+        ("pair_key", "<i4"),
+        ("buy_chain", "<i4"),
+        ("sell_chain", "<i4"),
+        ("buy_price", "<f8"),
+        ("sell_price", "<f8"),
+        ("difference", "<f8"),
+        ("difference_pct", "<f8"),
+        ("volume", "<f8"),
+        ("gross_profit", "<f8"),
+        ("fees", "<f8"),
+        ("net_profit", "<f8"),
+    ),
+}
+CHAIN_COLUMNS = {
+    "snapshots": ("chain",),
+    "fees": ("buy_chain", "sell_chain"),
+    "opportunities": ("buy_chain", "sell_chain"),
+}
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+SYMBOLS_FILE = "symbols.json"
+META_FILE = "meta.json"
+
+
+def datetime_to_ns(timestamp: datetime) -> int:
+    # Integer microsecond math keeps datetimes round-tripping exactly.
+    return (timestamp - EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def datetime_from_ns(timestamp_ns: int) -> datetime:
+    return EPOCH + timedelta(microseconds=timestamp_ns // 1000)
+
+
+def _write_json_atomic(path: Path, payload: object) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(payload))
+    os.replace(tmp, path)
+
+
+@dataclass
+class _Segment:
+    index: int
+    path: Path
+    rows: int = 0
+    min_timestamp_ns: int | None = None
+    max_timestamp_ns: int | None = None
+
+
+def _truncate_columns(stream: str, segment: _Segment) -> None:
+    for name, dtype in SCHEMAS[stream]:
+        column = segment.path / f"{name}.bin"
+        if column.exists():
+            with open(column, "r+b") as handle:
+                handle.truncate(segment.rows * np.dtype(dtype).itemsize)
+
+
+class HistoryRecorder:
+    def __init__(
+        self,
+        root: str | Path,
+        segment_rows: int = 1 << 20,
+        flush_interval_sec: float = 1.0,
+        max_pending_cycles: int = 1024,
+    ) -> None:
+        self.root = Path(root)
+        self.segment_rows = segment_rows
+        self.flush_interval_sec = flush_interval_sec
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.dropped_cycles = 0
+        self.write_errors = 0
+        self.last_error: str | None = None
+        self._symbols: dict[str, int] = {}
+        symbols_path = self.root / SYMBOLS_FILE
+        if symbols_path.exists():
+            self._symbols = {name: index for index, name in enumerate(json.loads(symbols_path.read_text()))}
+        self._symbols_dirty = False
+        self._segments = {stream: self._open_last_segment(stream) for stream in SCHEMAS}
+        self._queue: queue.Queue[tuple[list, dict, list, datetime] | None] = queue.Queue(max_pending_cycles)
+        self._thread = threading.Thread(target=self._run, name="history-recorder", daemon=True)
+        self._thread.start()
+
+    def record_cycle(
+        self,
+        snapshots: list[PriceSnapshot],
+        route_fees: dict[tuple[str, str], FeeBreakdown],
+        opportunities: list[ArbitrageOpportunity],
+        timestamp: datetime | None = None,
+    ) -> None:
+        # Never blocks the polling loop: a full queue drops the cycle and counts it.
+        cycle_time = timestamp or datetime.now(timezone.utc)
+        try:
+            self._queue.put_nowait((list(snapshots), dict(route_fees), list(opportunities), cycle_time))
+        except queue.Full:
+            self.dropped_cycles += 1
+
+    def take_error(self) -> str | None:
+        # The latest write failure not yet reported, if any.
+        error, self.last_error = self.last_error, None
+        return error
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            try:
+                item = self._queue.get(timeout=self.flush_interval_sec)
+            except queue.Empty:
+                continue
+            pending = [item]
+            # Drain everything queued so one write covers many cycles.
+            while True:
+                try:
+                    pending.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in pending
+            try:
+                self._write([cycle for cycle in pending if cycle is not None])
+            except Exception as exc:
+                self.write_errors += 1
+                self.last_error = str(exc)
+
+    def _write(self, cycles: list[tuple[list, dict, list, datetime]]) -> None:
+        rows: dict[str, list[tuple]] = {stream: [] for stream in SCHEMAS}
+        for snapshots, route_fees, opportunities, cycle_time in cycles:
+            cycle_ns = datetime_to_ns(cycle_time)
+            rows["snapshots"].extend(
+                (
+                    datetime_to_ns(s.timestamp),
+                    self._symbol(s.chain),
+                    self._symbol(s.dex),
+                    self._symbol(s.pool_address),
+                    self._symbol(s.pair_key),
+                    s.price_token1_per_token0,
+                    s.block_number,
+                    s.latency_ms,
+                    s.reserve0,
+                    s.reserve1,
+                )
+                for s in snapshots
+            )
+            rows["fees"].extend(
+                (
+                    cycle_ns,
+                    self._symbol(q.buy_chain),
+                    self._symbol(q.sell_chain),
+                    q.gas_buy_usd,
+                    q.gas_sell_usd,
+                    q.bridge_fee_usd,
+                    q.dex_fee_usd,
+                    q.total_fees_usd,
+                )
+                for q in route_fees.values()
+            )
+            rows["opportunities"].extend(
+                (
+                    datetime_to_ns(o.timestamp),
+                    self._symbol(o.pair_key),
+                    self._symbol(o.buy_chain),
+                    self._symbol(o.sell_chain),
+                    o.buy_price,
+                    o.sell_price,
+                    o.difference,
+                    o.difference_pct,
+                    o.volume,
+                    o.gross_profit,
+                    o.fees,
+                    o.net_profit,
+                )
+                for o in opportunities
+            )
+
+        # Symbols are published before any row that references them.
+        if self._symbols_dirty:
+            _write_json_atomic(self.root / SYMBOLS_FILE, list(self._symbols))
+            self._symbols_dirty = False
+        for stream, stream_rows in rows.items():
+            if stream_rows:
+                self._append(stream, np.array(stream_rows, dtype=list(SCHEMAS[stream])))
+
+    def _symbol(self, name: str) -> int:
+        symbol_id = self._symbols.get(name)
+        if symbol_id is None:
+            symbol_id = len(self._symbols)
+            self._symbols[name] = symbol_id
+            self._symbols_dirty = True
+        return symbol_id
+
+    def _append(self, stream: str, table: np.ndarray) -> None:
+        offset = 0
+        while offset < len(table):
+            segment = self._segments[stream]
+            if segment.rows >= self.segment_rows:
+                segment = self._segments[stream] = self._new_segment(stream, segment.index + 1)
+            chunk = table[offset: offset + self.segment_rows - segment.rows]
+            timestamps = chunk["timestamp_ns"]
+            low, high = int(timestamps.min()), int(timestamps.max())
+            # meta.json is the commit point: readers never look past its row count.
+            meta = {
+                "rows": segment.rows + len(chunk),
+                "min_timestamp_ns": low if segment.min_timestamp_ns is None else min(segment.min_timestamp_ns, low),
+                "max_timestamp_ns": high if segment.max_timestamp_ns is None else max(segment.max_timestamp_ns, high),
+            }
+            try:
+                for name, _ in SCHEMAS[stream]:
+                    with open(segment.path / f"{name}.bin", "ab") as handle:
+                        handle.write(np.ascontiguousarray(chunk[name]).tobytes())
+                _write_json_atomic(segment.path / META_FILE, meta)
+            except Exception:
+                # A partial append (ENOSPC, EIO) would leave columns of different lengths and
+                # misalign every later row; roll back to the committed count first.
+                self._rollback(stream, segment)
+                raise
+            segment.rows = meta["rows"]
+            segment.min_timestamp_ns = meta["min_timestamp_ns"]
+            segment.max_timestamp_ns = meta["max_timestamp_ns"]
+            offset += len(chunk)
+
+    def _rollback(self, stream: str, segment: _Segment) -> None:
+        try:
+            _truncate_columns(stream, segment)
+        except OSError:
+            # The segment cannot be repaired in place; later appends go to a fresh one.
+            self._segments[stream] = self._new_segment(stream, segment.index + 1)
+
+    def _open_last_segment(self, stream: str) -> _Segment:
+        stream_dir = self.root / stream
+        existing = sorted(stream_dir.glob("segment_*")) if stream_dir.exists() else []
+        if not existing:
+            return self._new_segment(stream, 0)
+        path = existing[-1]
+        meta = json.loads((path / META_FILE).read_text()) if (path / META_FILE).exists() else {"rows": 0}
+        segment = _Segment(
+            index=int(path.name.split("_")[1]),
+            path=path,
+            rows=meta["rows"],
+            min_timestamp_ns=meta.get("min_timestamp_ns"),
+            max_timestamp_ns=meta.get("max_timestamp_ns"),
+        )
+        # Trim bytes written after the last committed meta (e.g. a crash mid-append).
+        _truncate_columns(stream, segment)
+        return segment
+
+    def _new_segment(self, stream: str, index: int) -> _Segment:
+        path = self.root / stream / f"segment_{index:06d}"
+        path.mkdir(parents=True, exist_ok=True)
+        return _Segment(index=index, path=path)
+
+
+class HistoryReader:
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        symbols_path = self.root / SYMBOLS_FILE
+        self.symbols: list[str] = json.loads(symbols_path.read_text()) if symbols_path.exists() else []
+        self._symbol_ids = {name: index for index, name in enumerate(self.symbols)}
+
+    def iter_columns(
+        self,
+        stream: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        chain: str | None = None,
+        pair_key: str | None = None,
+    ) -> Iterator[dict[str, np.ndarray]]:
+        # Yields one dict of column arrays per segment; columns are memory-mapped and only the
+        # rows passing the filters are copied out.
+        start_ns = datetime_to_ns(start) if start is not None else None
+        end_ns = datetime_to_ns(end) if end is not None else None
+        chain_id = self._symbol_ids.get(chain, -1) if chain is not None else None
+        pair_id = self._symbol_ids.get(pair_key, -1) if pair_key is not None else None
+        schema = SCHEMAS[stream]
+        stream_dir = self.root / stream
+        if not stream_dir.exists():
+            return
+
+        for path in sorted(stream_dir.glob("segment_*")):
+            meta_path = path / META_FILE
+            if not meta_path.exists():
+                continue
+            meta = json.loads(meta_path.read_text())
+            rows = meta["rows"]
+            if not rows:
+                continue
+            if start_ns is not None and meta["max_timestamp_ns"] < start_ns:
+                continue
+            if end_ns is not None and meta["min_timestamp_ns"] >= end_ns:
+                continue
+
+            columns = {
+                name: np.memmap(path / f"{name}.bin", dtype=dtype, mode="r", shape=(rows,))
+                for name, dtype in schema
+            }
+            mask = np.ones(rows, dtype=bool)
+            if start_ns is not None:
+                mask &= columns["timestamp_ns"] >= start_ns
+            if end_ns is not None:
+                mask &= columns["timestamp_ns"] < end_ns
+            if chain_id is not None:
+                chain_mask = np.zeros(rows, dtype=bool)
+                for name in CHAIN_COLUMNS[stream]:
+                    chain_mask |= columns[name] == chain_id
+                mask &= chain_mask
+            # Fee rows are per route, not per pair, so a pair filter leaves them untouched.
+            if pair_id is not None and "pair_key" in columns:
+                mask &= columns["pair_key"] == pair_id
+            if mask.any():
+                yield {name: np.asarray(column[mask]) for name, column in columns.items()}
+
+    def read_snapshots(self, **filters) -> list[PriceSnapshot]:
+        return [
+            PriceSnapshot(
+                timestamp=datetime_from_ns(row["timestamp_ns"]),
+                chain=self.symbols[row["chain"]],
+                dex=self.symbols[row["dex"]],
+                pool_address=self.symbols[row["pool_address"]],
+                pair_key=self.symbols[row["pair_key"]],
+                price_token1_per_token0=row["price_token1_per_token0"],
+                block_number=row["block_number"],
+                latency_ms=row["latency_ms"],
+                reserve0=row["reserve0"],
+                reserve1=row["reserve1"],
+            )
+            for row in self._rows("snapshots", filters)
+        ]
+
+    def read_fees(self, **filters) -> list[tuple[datetime, FeeBreakdown]]:
+        return [
+            (
+                datetime_from_ns(row["timestamp_ns"]),
+                FeeBreakdown(
+                    buy_chain=self.symbols[row["buy_chain"]],
+                    sell_chain=self.symbols[row["sell_chain"]],
+                    gas_buy_usd=row["gas_buy_usd"],
+                    gas_sell_usd=row["gas_sell_usd"],
+                    bridge_fee_usd=row["bridge_fee_usd"],
+                    dex_fee_usd=row["dex_fee_usd"],
+                    total_fees_usd=row["total_fees_usd"],
+                ),
+            )
+            for row in self._rows("fees", filters)
+        ]
+
+    def read_opportunities(self, **filters) -> list[ArbitrageOpportunity]:
+        return [
+            ArbitrageOpportunity(
+                timestamp=datetime_from_ns(row["timestamp_ns"]),
+                pair_key=self.symbols[row["pair_key"]],
+                buy_chain=self.symbols[row["buy_chain"]],
+                sell_chain=self.symbols[row["sell_chain"]],
+                buy_price=row["buy_price"],
+                sell_price=row["sell_price"],
+                difference=row["difference"],
+                difference_pct=row["difference_pct"],
+                volume=row["volume"],
+                gross_profit=row["gross_profit"],
+                fees=row["fees"],
+                net_profit=row["net_profit"],
+            )
+            for row in self._rows("opportunities", filters)
+        ]
+
+    def _rows(self, stream: str, filters: dict) -> Iterator[dict]:
+        for columns in self.iter_columns(stream, **filters):
+            names = list(columns)
+            for values in zip(*(columns[name].tolist() for name in names)):
+                yield dict(zip(names, values))
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import Any
+
+import aiohttp
+
+
+class AsyncHttpClient:
+    def __init__(
+        self,
+        max_connections: int = 32,
+        max_connections_per_host: int = 4,
+        request_timeout: float = 8.0,
+        keepalive_timeout: float = 30.0,
+    ) -> None:
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.request_timeout = request_timeout
+        self.keepalive_timeout = keepalive_timeout
+        self._session: aiohttp.ClientSession | None = None
+        self._closed = False
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # The per-host limit doubles as a concurrency cap: excess requests queue for a connection.
+        if self._closed:
+            raise RuntimeError("HTTP client is closed")
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                headers={"Accept": "application/json", "User-Agent": "trade-bot/0.1"},
+            )
+        return self._session
+
+    async def get_json(self, url: str, timeout: float | None = None) -> Any:
+        # Passing timeout=None to aiohttp would lift the limit; omit it to keep the session's.
+        kwargs = {"timeout": aiohttp.ClientTimeout(total=timeout)} if timeout is not None else {}
+        async with self._get_session().get(url, **kwargs) as resp:
+            resp.raise_for_status()
+            return await resp.json(content_type=None)
+
+    async def aclose(self) -> None:
+        self._closed = True
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from src.config import ArbitrageConfig
+from src.price_types import ArbitrageOpportunity, FeeBreakdown, PriceSnapshot, SpreadSignal
+
+# (chain, dex, pool_address)
+VenueKey = tuple[str, str, str]
+# (pair_key, venue_a, venue_b) with venue_a registered before venue_b, as in combinations().
+ComboKey = tuple[str, VenueKey, VenueKey]
+Route = tuple[str, str]
+
+
+@dataclass(frozen=True)
+class OpportunityDelta:
+    kind: str  # "new", "changed" or "gone"
+    key: ComboKey
+    opportunity: ArbitrageOpportunity
+
+
+def venue_key(snapshot: PriceSnapshot) -> VenueKey:
+    return (snapshot.chain, snapshot.dex, snapshot.pool_address)
+
+
+class IncrementalOpportunityAnalyzer:
+    def __init__(self, cfg: ArbitrageConfig, track_spreads: bool = True) -> None:
+        self.cfg = cfg
+        self.track_spreads = track_spreads
+        self._venues: dict[str, dict[VenueKey, PriceSnapshot]] = {}
+        self._pairs_by_chain: dict[str, set[str]] = {}
+        self._route_fees: dict[Route, FeeBreakdown] = {}
+        self._spreads: dict[ComboKey, SpreadSignal] = {}
+        self._opportunities: dict[ComboKey, ArbitrageOpportunity] = {}
+        self._combo_routes: dict[ComboKey, Route] = {}
+        self._route_refs: dict[Route, int] = {}
+
+    def update_snapshot(self, snapshot: PriceSnapshot) -> list[OpportunityDelta]:
+        venues = self._venues.setdefault(snapshot.pair_key, {})
+        key = venue_key(snapshot)
+        previous = venues.get(key)
+        # A re-read of the same block at the same price changes nothing worth rescoring.
+        if (
+            previous is not None
+            and previous.block_number == snapshot.block_number
+            and previous.price_token1_per_token0 == snapshot.price_token1_per_token0
+        ):
+            return []
+        venues[key] = snapshot
+        self._pairs_by_chain.setdefault(snapshot.chain, set()).add(snapshot.pair_key)
+        return self._rescore_venue(snapshot.pair_key, key)
+
+    def remove_snapshot(self, pair_key: str, key: VenueKey) -> list[OpportunityDelta]:
+        venues = self._venues.get(pair_key)
+        if venues is None or key not in venues:
+            return []
+        deltas: list[OpportunityDelta] = []
+        before = True
+        for other in venues:
+            if other == key:
+                before = False
+                continue
+            deltas.extend(self._drop_combo((pair_key, other, key) if before else (pair_key, key, other)))
+        del venues[key]
+        chain = key[0]
+        if not any(other[0] == chain for other in venues):
+            self._pairs_by_chain[chain].discard(pair_key)
+        if not venues:
+            del self._venues[pair_key]
+        return deltas
+
+    def sync_snapshots(self, snapshots: list[PriceSnapshot]) -> list[OpportunityDelta]:
+        # Applies one collection cycle: venues missing from it (failed reads) are dropped,
+        # and only venues whose block or price moved are rescored.
+        deltas: list[OpportunityDelta] = []
+        seen: set[tuple[str, VenueKey]] = set()
+        for snapshot in snapshots:
+            seen.add((snapshot.pair_key, venue_key(snapshot)))
+            deltas.extend(self.update_snapshot(snapshot))
+        stale = [
+            (pair_key, key)
+            for pair_key, venues in self._venues.items()
+            for key in venues
+            if (pair_key, key) not in seen
+        ]
+        for pair_key, key in stale:
+            deltas.extend(self.remove_snapshot(pair_key, key))
+        return deltas
+
+    def update_route_fee(self, route: Route, quote: FeeBreakdown | None) -> list[OpportunityDelta]:
+        # `None` forgets the quote, which retires every opportunity on that route.
+        if quote is None:
+            if self._route_fees.pop(route, None) is None:
+                return []
+        elif self._route_fees.get(route) == quote:
+            return []
+        else:
+            self._route_fees[route] = quote
+
+        chains = set(route)
+        pair_keys = self._pairs_by_chain.get(route[0], set()) & self._pairs_by_chain.get(route[1], set())
+        deltas: list[OpportunityDelta] = []
+        for pair_key in pair_keys:
+            venues = list(self._venues[pair_key].values())
+            for i, a in enumerate(venues):
+                for b in venues[i + 1:]:
+                    if {a.chain, b.chain} == chains:
+                        deltas.extend(self._score(pair_key, a, b))
+        return deltas
+
+    def sync_route_fees(self, route_fees: dict[Route, FeeBreakdown]) -> list[OpportunityDelta]:
+        deltas: list[OpportunityDelta] = []
+        for route, quote in route_fees.items():
+            deltas.extend(self.update_route_fee(route, quote))
+        for route in [route for route in self._route_fees if route not in route_fees]:
+            deltas.extend(self.update_route_fee(route, None))
+        return deltas
+
+    def routes(self) -> set[Route]:
+        return set(self._route_refs)
+
+    def spreads(self) -> list[SpreadSignal]:
+        return sorted(self._spreads.values(), key=lambda x: abs(x.spread_pct), reverse=True)
+
+    def opportunities(self) -> list[ArbitrageOpportunity]:
+        return sorted(self._opportunities.values(), key=lambda x: x.net_profit, reverse=True)
+
+    def _rescore_venue(self, pair_key: str, key: VenueKey) -> list[OpportunityDelta]:
+        # Only the combinations that contain the updated venue can change.
+        venues = self._venues[pair_key]
+        updated = venues[key]
+        deltas: list[OpportunityDelta] = []
+        before = True
+        for other_key, other in venues.items():
+            if other_key == key:
+                before = False
+                continue
+            if other.chain == updated.chain:
+                continue
+            a, b = (other, updated) if before else (updated, other)
+            deltas.extend(self._score(pair_key, a, b))
+        return deltas
+
+    def _score(self, pair_key: str, a: PriceSnapshot, b: PriceSnapshot) -> list[OpportunityDelta]:
+        combo = (pair_key, venue_key(a), venue_key(b))
+
+        if not self.track_spreads:
+            pass
+        elif b.price_token1_per_token0 != 0:
+            ratio = a.price_token1_per_token0 / b.price_token1_per_token0
+            self._spreads[combo] = SpreadSignal(
+                timestamp=max(a.timestamp, b.timestamp),
+                pair_key=pair_key,
+                chain_a=a.chain,
+                chain_b=b.chain,
+                dex_a=a.dex,
+                pool_a=a.pool_address,
+                dex_b=b.dex,
+                pool_b=b.pool_address,
+                price_a=a.price_token1_per_token0,
+                price_b=b.price_token1_per_token0,
+                ratio_a_over_b=ratio,
+                spread_pct=(ratio - 1.0) * 100,
+            )
+        else:
+            self._spreads.pop(combo, None)
+
+        lower, higher = (b, a) if a.price_token1_per_token0 > b.price_token1_per_token0 else (a, b)
+        self._set_route(combo, (lower.chain, higher.chain))
+        return self._set_opportunity(combo, self._evaluate(pair_key, a, b, lower, higher))
+
+    def _evaluate(
+        self,
+        pair_key: str,
+        a: PriceSnapshot,
+        b: PriceSnapshot,
+        lower: PriceSnapshot,
+        higher: PriceSnapshot,
+    ) -> ArbitrageOpportunity | None:
+        cfg = self.cfg
+        lower_price = lower.price_token1_per_token0
+        higher_price = higher.price_token1_per_token0
+        if lower_price <= 0:
+            return None
+        fee_quote = self._route_fees.get((lower.chain, higher.chain))
+        if not fee_quote:
+            return None
+
+        difference = higher_price - lower_price
+        difference_pct = (difference / lower_price) * 100
+        gross_profit = (difference / lower_price) * cfg.volume
+        fees = fee_quote.total_fees_usd
+        net_profit = gross_profit - fees
+        net_profit_pct = (net_profit / cfg.volume) * 100
+
+        if difference_pct < cfg.min_diff_pct:
+            return None
+        if net_profit <= 0 or net_profit < cfg.min_net_profit:
+            return None
+        if net_profit_pct < cfg.min_net_profit_pct:
+            return None
+
+        return ArbitrageOpportunity(
+            timestamp=max(a.timestamp, b.timestamp),
+            pair_key=pair_key,
+            buy_chain=lower.chain,
+            sell_chain=higher.chain,
+            buy_price=lower_price,
+            sell_price=higher_price,
+            difference=difference,
+            difference_pct=difference_pct,
+            volume=cfg.volume,
+            gross_profit=gross_profit,
+            fees=fees,
+            net_profit=net_profit,
+            buy_pool=lower.pool_address,
+            sell_pool=higher.pool_address,
+        )
+
+    def _set_opportunity(self, combo: ComboKey, opportunity: ArbitrageOpportunity | None) -> list[OpportunityDelta]:
+        previous = self._opportunities.get(combo)
+        if opportunity is None:
+            if previous is None:
+                return []
+            del self._opportunities[combo]
+            return [OpportunityDelta("gone", combo, previous)]
+        self._opportunities[combo] = opportunity
+        if previous is None:
+            return [OpportunityDelta("new", combo, opportunity)]
+        if previous != opportunity:
+            return [OpportunityDelta("changed", combo, opportunity)]
+        return []
+
+    def _set_route(self, combo: ComboKey, route: Route | None) -> None:
+        previous = self._combo_routes.pop(combo, None)
+        if previous is not None:
+            self._route_refs[previous] -= 1
+            if not self._route_refs[previous]:
+                del self._route_refs[previous]
+        if route is not None:
+            self._combo_routes[combo] = route
+            self._route_refs[route] = self._route_refs.get(route, 0) + 1
+
+    def _drop_combo(self, combo: ComboKey) -> list[OpportunityDelta]:
+        self._spreads.pop(combo, None)
+        self._set_route(combo, None)
+        return self._set_opportunity(combo, None)
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Callable, Iterable
+
+from aiohttp import web
+
+# Recording is a few arithmetic ops under a lock; text is only rendered when /metrics is scraped.
+
+LATENCY_BUCKETS_SEC = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (labels, value) samples produced at scrape time by a registered collector.
+Sample = tuple[dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        lock: threading.Lock | None = None,
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = lock or threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._add(labels, amount)
+
+    def _add(self, labels: tuple[str, ...], amount: float) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS_SEC,
+        lock: threading.Lock | None = None,
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = lock or threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._observe(value, labels)
+
+    def _observe(self, value: float, labels: tuple[str, ...]) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        lines: list[str] = []
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._collectors: list[tuple[str, str, str, Callable[[], Iterable[Sample]]]] = []
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: tuple[str, ...] = (), lock=None) -> Counter:
+        return self._register(Counter(name, help_text, labelnames, lock=lock))
+
+    def gauge(self, name: str, help_text: str, labelnames: tuple[str, ...] = (), lock=None) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames, lock=lock))
+
+    def histogram(self, name: str, help_text: str, labelnames: tuple[str, ...] = (), lock=None) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, lock=lock))
+
+    def add_collector(
+        self,
+        name: str,
+        kind: str,
+        help_text: str,
+        collect: Callable[[], Iterable[Sample]],
+    ) -> None:
+        # For values that already live elsewhere (cache counters, queue depths): read on scrape only.
+        self._collectors.append((name, kind, help_text, collect))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for name, kind, help_text, collect in self._collectors:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in collect():
+                names = tuple(labels)
+                lines.append(f"{name}{_format_labels(names, tuple(labels[n] for n in names))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+# The stage metrics share one lock so a timed stage takes it once on entry and once on exit.
+_STAGE_LOCK = threading.Lock()
+STAGE_LATENCY = REGISTRY.histogram(
+    "monitor_stage_latency_seconds",
+    "Wall time per monitor stage (collect, rpc_*, decode, fee_*, analysis_*, output, evaluate).",
+    ("stage", "target"),
+    lock=_STAGE_LOCK,
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "monitor_stage_errors_total", "Failed stage executions.", ("stage", "target"), lock=_STAGE_LOCK
+)
+IN_FLIGHT = REGISTRY.gauge("monitor_in_flight", "Stage executions currently running.", ("stage", "target"), lock=_STAGE_LOCK)
+
+
+class _StageTimer:
+    __slots__ = ("labels", "start")
+
+    def __init__(self, labels: tuple[str, str]) -> None:
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self) -> _StageTimer:
+        with _STAGE_LOCK:
+            IN_FLIGHT._add(self.labels, 1.0)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self.start
+        with _STAGE_LOCK:
+            STAGE_LATENCY._observe(elapsed, self.labels)
+            IN_FLIGHT._add(self.labels, -1.0)
+            if exc_type is not None:
+                STAGE_ERRORS._add(self.labels, 1.0)
+
+
+def track(stage: str, target: str = "") -> _StageTimer:
+    # with track("rpc_get_reserves", pool.chain): ...
+    return _StageTimer((stage, target))
+
+
+def count_errors(stage: str, target: str, amount: int) -> None:
+    if amount:
+        STAGE_ERRORS.inc(stage, target, amount=amount)
+
+
+async def start_metrics_server(host: str, port: int, registry: MetricsRegistry = REGISTRY) -> web.AppRunner:
+    async def handle(_: web.Request) -> web.Response:
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
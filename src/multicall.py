@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from typing import Iterator, Sequence, TypeVar
+
+# Multicall3 is deployed at the same address on every chain we monitor.
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+                "name": "calls",
+                "type": "tuple[]",
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+                "name": "returnData",
+                "type": "tuple[]",
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function",
+    },
+    {
+        "inputs": [],
+        "name": "getBlockNumber",
+        "outputs": [{"name": "blockNumber", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+]
+
+GET_BLOCK_NUMBER_SELECTOR = bytes.fromhex("42cbb15c")
+AGGREGATE3_SELECTOR = bytes.fromhex("82ad56cb")
+
+T = TypeVar("T")
+
+
+def max_calls_per_batch(gas_limit: int, gas_per_call: int) -> int:
+    # One slot is reserved for the getBlockNumber() call that leads every batch.
+    return max(1, gas_limit // max(1, gas_per_call) - 1)
+
+
+def chunked(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _word(data: bytes, offset: int) -> int:
+    if offset < 0 or offset + 32 > len(data):
+        raise ValueError("ABI data too short")
+    return int.from_bytes(data[offset : offset + 32], "big")
+
+
+def _first_element(data: bytes, head: int) -> int:
+    # Start of element 0 of the dynamic array whose offset word is at `head`.
+    array = _word(data, head)
+    if _word(data, array) == 0:
+        raise ValueError("empty array")
+    return array + 32 + _word(data, array + 32)
+
+
+def leading_block_number(calldata: bytes, result: bytes) -> int | None:
+    # Block reported by an aggregate3 call that leads with getBlockNumber(), as every reserve
+    # batch does; None for any other call. Only element 0 is walked, not the whole batch.
+    if calldata[:4] != AGGREGATE3_SELECTOR:
+        return None
+    args = calldata[4:]
+    try:
+        call = _first_element(args, 0)
+        call_data = call + _word(args, call + 64)
+        if _word(args, call_data) < 4 or args[call_data + 32 : call_data + 36] != GET_BLOCK_NUMBER_SELECTOR:
+            return None
+        returned = _first_element(result, 0)
+        if not _word(result, returned):
+            return None
+        return_data = returned + _word(result, returned + 32)
+        if _word(result, return_data) < 32:
+            return None
+        return _word(result, return_data + 32)
+    except ValueError:
+        return None
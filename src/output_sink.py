@@ -0,0 +1,465 @@
+from __future__ import annotations
+
+import json
+import math
+import queue
+import struct
+import sys
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import BinaryIO, Hashable, Iterable, Iterator, Protocol, TypeVar
+
+import numpy as np
+
+from src.config import OutputConfig
+from src.history import SCHEMAS, datetime_to_ns
+from src.incremental import OpportunityDelta
+from src.price_types import (
+    ArbitrageCycle,
+    ArbitrageOpportunity,
+    FeeBreakdown,
+    PriceSnapshot,
+    SizedOpportunity,
+    SpreadSignal,
+)
+from src.spread_stats import SpreadStats
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class CycleReport:
+    timestamp: datetime
+    snapshots: list[PriceSnapshot]
+    errors: list[str]
+    spreads: list[SpreadSignal] = field(default_factory=list)
+    opportunities: list[ArbitrageOpportunity] = field(default_factory=list)
+    route_fees: dict[tuple[str, str], FeeBreakdown] = field(default_factory=dict)
+    sized: list[SizedOpportunity] = field(default_factory=list)
+    cycles: list[ArbitrageCycle] = field(default_factory=list)
+    deltas: list[OpportunityDelta] = field(default_factory=list)
+    spread_stats: list[SpreadStats] = field(default_factory=list)
+    fee_cache_stats: str = ""
+
+
+class CycleRenderer(Protocol):
+    def render(self, reports: list[CycleReport], dropped_cycles: int) -> bytes: ...
+
+    # Called after the last render's bytes reached the stream.
+    def mark_written(self) -> None: ...
+
+
+def _changed(previous: dict[Hashable, str], rows: Iterable[tuple[Hashable, str, T]]) -> tuple[list[T], dict]:
+    # Compares the display value per row key; the returned dict replaces the previous one,
+    # so keys that disappeared are forgotten instead of accumulating.
+    current: dict[Hashable, str] = {}
+    changed: list[T] = []
+    for key, value, item in rows:
+        current[key] = value
+        if previous.get(key) != value:
+            changed.append(item)
+    return changed, current
+
+
+class ConsoleRenderer:
+    # Only rows whose displayed values moved since the previous cycle, plus the current top N.
+    def __init__(self, top_n: int = 10) -> None:
+        self.top_n = top_n
+        self.cycle = 0
+        self._reported_drops = 0
+        self._errors: set[str] = set()
+        self._snapshots: dict[Hashable, str] = {}
+        self._spreads: dict[Hashable, str] = {}
+        self._sized: dict[Hashable, str] = {}
+        self._cycles: dict[Hashable, str] = {}
+
+    def render(self, reports: list[CycleReport], dropped_cycles: int) -> bytes:
+        lines: list[str] = []
+        for report in reports:
+            self._render_cycle(report, lines)
+        if dropped_cycles > self._reported_drops:
+            lines.append(f"WARN output fell behind; {dropped_cycles - self._reported_drops} cycles dropped")
+            self._reported_drops = dropped_cycles
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def mark_written(self) -> None:
+        pass
+
+    def _render_cycle(self, report: CycleReport, lines: list[str]) -> None:
+        self.cycle += 1
+        new_errors = [error for error in report.errors if error not in self._errors]
+        self._errors = set(report.errors)
+        lines.append(
+            f"Cycle {self.cycle} {report.timestamp:%H:%M:%S} snapshots={len(report.snapshots)} "
+            f"spreads={len(report.spreads)} opportunities={len(report.opportunities)} "
+            f"errors={len(report.errors)} (new={len(new_errors)})"
+        )
+        lines.extend(f"ERROR {error}" for error in new_errors)
+
+        snapshots, self._snapshots = _changed(
+            self._snapshots,
+            [((s.chain, s.dex, s.pool_address), f"{s.price_token1_per_token0:.8f}", s) for s in report.snapshots],
+        )
+        if snapshots:
+            lines.append(f"Changed snapshots ({len(snapshots)}/{len(report.snapshots)}):")
+            lines.extend(
+                f"  {s.chain:10} {s.dex:12} {s.pair_key:14} "
+                f"price={s.price_token1_per_token0:.8f} block={s.block_number} "
+                f"latency={s.latency_ms:.1f}ms"
+                for s in snapshots
+            )
+
+        spreads, self._spreads = _changed(
+            self._spreads,
+            [
+                (
+                    (
+                        spread.pair_key,
+                        (spread.chain_a, spread.dex_a, spread.pool_a),
+                        (spread.chain_b, spread.dex_b, spread.pool_b),
+                    ),
+                    f"{spread.ratio_a_over_b:.6f} {spread.spread_pct:+.3f}",
+                    spread,
+                )
+                for spread in report.spreads
+            ],
+        )
+        if spreads:
+            stats = {(st.pair_key, st.chain_a, st.pool_a, st.chain_b, st.pool_b): st for st in report.spread_stats}
+            lines.append(f"Changed spreads ({len(spreads)}/{len(report.spreads)}):")
+            for spread in spreads:
+                st = stats.get((spread.pair_key, spread.chain_a, spread.pool_a, spread.chain_b, spread.pool_b))
+                stats_detail = (
+                    f" z={st.z_score:+.2f} mean={st.mean_pct:+.3f}% std={st.std_pct:.3f}% "
+                    f"half_life={st.half_life_sec:.0f}s n={st.samples}"
+                    if st is not None
+                    else ""
+                )
+                lines.append(
+                    f"  {spread.pair_key:14} {spread.chain_a:10} {spread.dex_a:12} {spread.pool_a[:10]} / "
+                    f"{spread.chain_b:10} {spread.dex_b:12} {spread.pool_b[:10]} "
+                    f"ratio={spread.ratio_a_over_b:.6f} spread={spread.spread_pct:+.3f}%{stats_detail}"
+                )
+
+        if report.opportunities:
+            top = sorted(report.opportunities, key=lambda opp: opp.net_profit, reverse=True)[: self.top_n]
+            lines.append(f"Top {len(top)} of {len(report.opportunities)} opportunities (after fees):")
+            for opp in top:
+                fee_quote = report.route_fees.get((opp.buy_chain, opp.sell_chain))
+                fee_detail = (
+                    f" (gas={fee_quote.gas_buy_usd + fee_quote.gas_sell_usd:.4f}, "
+                    f"bridge={fee_quote.bridge_fee_usd:.4f}, dex={fee_quote.dex_fee_usd:.4f})"
+                    if fee_quote is not None
+                    else ""
+                )
+                lines.append(
+                    f"  {opp.pair_key:14} buy={opp.buy_chain:10} sell={opp.sell_chain:10} "
+                    f"diff={opp.difference_pct:+.3f}% gross={opp.gross_profit:.4f} "
+                    f"fees={opp.fees:.4f} net={opp.net_profit:.4f}{fee_detail}"
+                )
+
+        sized, self._sized = _changed(
+            self._sized,
+            [
+                (
+                    (opp.pair_key, opp.buy_pool, opp.sell_pool),
+                    f"{opp.optimal_volume:.4f} {opp.net_profit:.4f}",
+                    opp,
+                )
+                for opp in report.sized
+            ],
+        )
+        if sized:
+            lines.append("Changed optimal sizes (constant-product, after slippage):")
+            lines.extend(
+                f"  {opp.pair_key:14} buy={opp.buy_chain:10} sell={opp.sell_chain:10} "
+                f"volume={opp.optimal_volume:.4f} out={opp.amount_out:.4f} "
+                f"gross={opp.gross_profit:.4f} fees={opp.fees:.4f} net={opp.net_profit:.4f}"
+                for opp in sized
+            )
+
+        cycles, self._cycles = _changed(
+            self._cycles, [(cycle.edges, f"{cycle.rate:.6f}", cycle) for cycle in report.cycles]
+        )
+        if cycles:
+            lines.append("Changed multi-hop cycles (after fees):")
+            lines.extend(
+                f"  {' -> '.join(cycle.nodes + cycle.nodes[:1])} rate={cycle.rate:.6f} "
+                f"profit={cycle.profit_pct:+.3f}%"
+                for cycle in cycles
+            )
+
+        if report.deltas:
+            lines.append("Opportunity changes:")
+            marks = {"new": "+", "changed": "~", "gone": "-"}
+            lines.extend(
+                f"  {marks[delta.kind]} {delta.opportunity.pair_key:14} buy={delta.opportunity.buy_chain:10} "
+                f"sell={delta.opportunity.sell_chain:10} net={delta.opportunity.net_profit:.4f}"
+                for delta in report.deltas
+            )
+
+        if report.fee_cache_stats:
+            lines.append(f"Fee cache: {report.fee_cache_stats}")
+        lines.append("-" * 90)
+
+
+def _json_default(value: object) -> object:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class _Fields:
+    def __init__(self, fields: dict) -> None:
+        self.__dict__.update(fields)
+
+
+def _finite_fields(row: object) -> _Fields:
+    return _Fields(
+        {k: None if isinstance(v, float) and not math.isfinite(v) else v for k, v in vars(row).items()}
+    )
+
+
+class JsonlRenderer:
+    # One object per row, tagged with "type" and the cycle number; a batch is one write.
+    def __init__(self) -> None:
+        self.cycle = 0
+
+    def render(self, reports: list[CycleReport], dropped_cycles: int) -> bytes:
+        lines: list[str] = []
+        for report in reports:
+            self.cycle += 1
+            header = {"cycle": self.cycle, "timestamp": report.timestamp.isoformat()}
+            lines.append(json.dumps({"type": "cycle", **header, "dropped_cycles": dropped_cycles}))
+            rows: list[tuple[str, object]] = [
+                *(("snapshot", s) for s in report.snapshots),
+                *(("spread", s) for s in report.spreads),
+                # nan/inf (warming up, no mean reversion) become null to keep the lines strict JSON.
+                *(("spread_stats", _finite_fields(s)) for s in report.spread_stats),
+                *(("opportunity", o) for o in report.opportunities),
+                *(("fee", q) for q in report.route_fees.values()),
+                *(("sized", o) for o in report.sized),
+                *(("multi_hop", c) for c in report.cycles),
+            ]
+            lines.extend(
+                json.dumps({"type": kind, "cycle": self.cycle, **vars(row)}, default=_json_default)
+                for kind, row in rows
+            )
+            lines.extend(
+                json.dumps(
+                    {"type": "delta", "cycle": self.cycle, "kind": delta.kind, **vars(delta.opportunity)},
+                    default=_json_default,
+                )
+                for delta in report.deltas
+            )
+            lines.extend(
+                json.dumps({"type": "error", "cycle": self.cycle, "message": error}) for error in report.errors
+            )
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def mark_written(self) -> None:
+        pass
+
+
+# Binary frames: header, then blocks of fixed-width little-endian rows. Strings are int32 ids;
+# a symbols block (JSON list) appends new names before any row that references them.
+FRAME_MAGIC = b"ARBF"
+FRAME_HEADER = struct.Struct("<4sIqI")  # magic, cycle, timestamp_ns, block count
+BLOCK_HEADER = struct.Struct("<BII")  # kind, rows, payload bytes
+BLOCK_SYMBOLS, BLOCK_ERRORS, BLOCK_SNAPSHOTS, BLOCK_SPREADS, BLOCK_OPPORTUNITIES = range(5)
+SPREAD_SCHEMA = (
+    ("timestamp_ns", "<i8"),
+    ("pair_key", "<i4"),
+    ("chain_a", "<i4"),
+    ("chain_b", "<i4"),
+    ("dex_a", "<i4"),
+    ("pool_a", "<i4"),
+    ("dex_b", "<i4"),
+    ("pool_b", "<i4"),
+    ("price_a", "<f8"),
+    ("price_b", "<f8"),
+    ("ratio_a_over_b", "<f8"),
+    ("spread_pct", "<f8"),
+)
+BLOCK_DTYPES = {
+    BLOCK_SNAPSHOTS: np.dtype(list(SCHEMAS["snapshots"])),
+    BLOCK_SPREADS: np.dtype(list(SPREAD_SCHEMA)),
+    BLOCK_OPPORTUNITIES: np.dtype(list(SCHEMAS["opportunities"])),
+}
+
+
+class BinaryRenderer:
+    def __init__(self) -> None:
+        self.cycle = 0
+        self._symbols: dict[str, int] = {}
+        self._names: list[str] = []
+        # Names known to have reached the reader, and names already put in a frame of this render.
+        # A failed write leaves _written behind, so the next render sends those names again.
+        self._written = 0
+        self._framed = 0
+
+    def _symbol(self, name: str) -> int:
+        symbol_id = self._symbols.get(name)
+        if symbol_id is None:
+            symbol_id = self._symbols[name] = len(self._symbols)
+            self._names.append(name)
+        return symbol_id
+
+    def render(self, reports: list[CycleReport], dropped_cycles: int) -> bytes:
+        self._framed = self._written
+        return b"".join(self._frame(report) for report in reports)
+
+    def mark_written(self) -> None:
+        self._written = self._framed
+
+    def _frame(self, report: CycleReport) -> bytes:
+        self.cycle += 1
+        tables = {
+            BLOCK_SNAPSHOTS: [
+                (
+                    datetime_to_ns(s.timestamp),
+                    self._symbol(s.chain),
+                    self._symbol(s.dex),
+                    self._symbol(s.pool_address),
+                    self._symbol(s.pair_key),
+                    s.price_token1_per_token0,
+                    s.block_number,
+                    s.latency_ms,
+                    s.reserve0,
+                    s.reserve1,
+                )
+                for s in report.snapshots
+            ],
+            BLOCK_SPREADS: [
+                (
+                    datetime_to_ns(s.timestamp),
+                    self._symbol(s.pair_key),
+                    self._symbol(s.chain_a),
+                    self._symbol(s.chain_b),
+                    self._symbol(s.dex_a),
+                    self._symbol(s.pool_a),
+                    self._symbol(s.dex_b),
+                    self._symbol(s.pool_b),
+                    s.price_a,
+                    s.price_b,
+                    s.ratio_a_over_b,
+                    s.spread_pct,
+                )
+                for s in report.spreads
+            ],
+            BLOCK_OPPORTUNITIES: [
+                (
+                    datetime_to_ns(o.timestamp),
+                    self._symbol(o.pair_key),
+                    self._symbol(o.buy_chain),
+                    self._symbol(o.sell_chain),
+                    o.buy_price,
+                    o.sell_price,
+                    o.difference,
+                    o.difference_pct,
+                    o.volume,
+                    o.gross_profit,
+                    o.fees,
+                    o.net_profit,
+                )
+                for o in report.opportunities
+            ],
+        }
+        blocks: list[bytes] = []
+        new_symbols = self._names[self._framed :]
+        if new_symbols:
+            payload = json.dumps(new_symbols).encode("utf-8")
+            blocks.append(BLOCK_HEADER.pack(BLOCK_SYMBOLS, len(new_symbols), len(payload)) + payload)
+            self._framed = len(self._names)
+        if report.errors:
+            payload = json.dumps(report.errors).encode("utf-8")
+            blocks.append(BLOCK_HEADER.pack(BLOCK_ERRORS, len(report.errors), len(payload)) + payload)
+        for kind, rows in tables.items():
+            if rows:
+                payload = np.array(rows, dtype=BLOCK_DTYPES[kind]).tobytes()
+                blocks.append(BLOCK_HEADER.pack(kind, len(rows), len(payload)) + payload)
+        header = FRAME_HEADER.pack(FRAME_MAGIC, self.cycle, datetime_to_ns(report.timestamp), len(blocks))
+        return header + b"".join(blocks)
+
+
+def iter_binary_frames(stream: BinaryIO) -> Iterator[tuple[int, int, dict[int, object]]]:
+    # Yields (cycle, timestamp_ns, {block kind: rows}); symbol blocks are only the names added by that frame.
+    while True:
+        header = stream.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            return
+        magic, cycle, timestamp_ns, block_count = FRAME_HEADER.unpack(header)
+        if magic != FRAME_MAGIC:
+            raise ValueError(f"Bad frame magic {magic!r}")
+        blocks: dict[int, object] = {}
+        for _ in range(block_count):
+            kind, _rows, size = BLOCK_HEADER.unpack(stream.read(BLOCK_HEADER.size))
+            payload = stream.read(size)
+            blocks[kind] = (
+                np.frombuffer(payload, dtype=BLOCK_DTYPES[kind]) if kind in BLOCK_DTYPES else json.loads(payload)
+            )
+        yield cycle, timestamp_ns, blocks
+
+
+class OutputSink:
+    def __init__(self, renderer: CycleRenderer, stream: BinaryIO, max_pending_cycles: int = 256) -> None:
+        self.renderer = renderer
+        self.stream = stream
+        self.dropped_cycles = 0
+        self.last_error: str | None = None
+        # Text printed before the sink took over must not land after its first write.
+        sys.stdout.flush()
+        self._queue: queue.Queue[CycleReport | None] = queue.Queue(max_pending_cycles)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="output-sink", daemon=True)
+        self._thread.start()
+
+    def submit(self, report: CycleReport) -> None:
+        # Never blocks the analysis loop: a full queue drops the cycle and counts it.
+        try:
+            self._queue.put_nowait(report)
+        except queue.Full:
+            self.dropped_cycles += 1
+
+    def close(self, timeout_sec: float = 5.0) -> None:
+        # A full queue means the writer is busy and sees the event after its next batch;
+        # the bounded join keeps a stuck stream from hanging shutdown.
+        self._stop.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout_sec)
+        if self._thread.is_alive():
+            self.last_error = f"output sink did not finish within {timeout_sec:.0f}s; pending cycles dropped"
+            return
+        if self.stream is not sys.stdout.buffer:
+            self.stream.close()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            pending = [self._queue.get()]
+            # Everything queued while the last write was in flight goes out as one batch.
+            while True:
+                try:
+                    pending.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in pending or self._stop.is_set()
+            reports = [report for report in pending if report is not None]
+            if not reports:
+                continue
+            try:
+                self.stream.write(self.renderer.render(reports, self.dropped_cycles))
+                self.stream.flush()
+                self.renderer.mark_written()
+            except Exception as exc:
+                self.last_error = str(exc)
+
+
+def build_output_sink(cfg: OutputConfig) -> OutputSink:
+    renderers = {"console": lambda: ConsoleRenderer(cfg.top_n), "jsonl": JsonlRenderer, "binary": BinaryRenderer}
+    stream = open(cfg.path, "ab") if cfg.path else sys.stdout.buffer
+    return OutputSink(renderers[cfg.mode](), stream, max_pending_cycles=cfg.max_pending_cycles)
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from eth_abi import decode as abi_decode
+from eth_utils import is_hex_address, to_checksum_address
+from web3 import Web3
+
+from src.config import PoolRegistryConfig, V2PoolConfig
+from src.multicall import MULTICALL3_ABI, MULTICALL3_ADDRESS, chunked, max_calls_per_batch
+
+# The registry lists only "chain dex pool_address"; token0/token1, decimals() and symbol()
+# are discovered once with Multicall3 and kept in a JSON index next to it, so later starts
+# build every V2PoolConfig from the index without any RPC or checksum hashing.
+
+TOKEN0_SELECTOR = bytes.fromhex("0dfe1681")
+TOKEN1_SELECTOR = bytes.fromhex("d21220a7")
+DECIMALS_SELECTOR = bytes.fromhex("313ce567")
+SYMBOL_SELECTOR = bytes.fromhex("95d89b41")
+INDEX_VERSION = 1
+
+RegistryEntry = tuple[str, str, str]  # chain, dex, lowercase pool address
+
+
+def read_registry(path: str | Path) -> list[RegistryEntry]:
+    # One pool per line, fields separated by commas or whitespace; "#" starts a comment.
+    entries: list[RegistryEntry] = []
+    for line_no, line in enumerate(Path(path).read_text().splitlines(), start=1):
+        fields = line.split("#", 1)[0].replace(",", " ").split()
+        if not fields:
+            continue
+        if len(fields) != 3 or not is_hex_address(fields[2]):
+            raise ValueError(f"{path}:{line_no}: expected 'chain dex pool_address', got {line.strip()!r}")
+        entries.append((fields[0].lower(), fields[1].lower(), fields[2].lower()))
+    return entries
+
+
+def decode_address(return_data: bytes) -> str:
+    if len(return_data) < 32:
+        raise ValueError(f"address call returned {len(return_data)} bytes, expected 32")
+    return "0x" + return_data[12:32].hex()
+
+
+def decode_decimals(return_data: bytes) -> int:
+    if len(return_data) < 32:
+        raise ValueError(f"decimals() returned {len(return_data)} bytes, expected 32")
+    decimals = int.from_bytes(return_data[:32], "big")
+    if decimals > 255:
+        raise ValueError(f"decimals() returned {decimals}")
+    return decimals
+
+
+def decode_symbol(return_data: bytes) -> str:
+    # Most tokens return an ABI string; a few early ones (MKR, SAI) return bytes32.
+    if len(return_data) == 32:
+        symbol = return_data.rstrip(b"\0").decode("utf-8", "replace")
+    else:
+        (symbol,) = abi_decode(["string"], return_data)
+    symbol = symbol.strip().upper()
+    if not symbol:
+        raise ValueError("symbol() returned an empty string")
+    return symbol
+
+
+class TokenMetadataReader:
+    def __init__(
+        self,
+        chain_web3: dict[str, Web3],
+        gas_limit: int = 30_000_000,
+        gas_per_call: int = 15_000,
+    ) -> None:
+        self.gas_limit = gas_limit
+        self.batch_size = max_calls_per_batch(gas_limit, gas_per_call)
+        self._multicalls = {
+            chain: w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+            for chain, w3 in chain_web3.items()
+        }
+
+    def _aggregate(self, chain: str, calls: list[tuple[str, bytes]]) -> list[bytes | Exception]:
+        multicall = self._multicalls[chain]
+        results: list[bytes | Exception] = []
+        for chunk in chunked(calls, self.batch_size):
+            try:
+                returned = multicall.functions.aggregate3(
+                    [(to_checksum_address(target), True, data) for target, data in chunk]
+                ).call({"gas": self.gas_limit})
+            except Exception as exc:
+                results.extend(exc for _ in chunk)
+                continue
+            results.extend(
+                return_data if success else ValueError(f"call to {target} reverted")
+                for (target, _), (success, return_data) in zip(chunk, returned, strict=True)
+            )
+        return results
+
+    def fetch_pool_tokens(self, chain: str, pools: list[str]) -> list[tuple[str, str] | Exception]:
+        calls = [(pool, selector) for pool in pools for selector in (TOKEN0_SELECTOR, TOKEN1_SELECTOR)]
+        returned = self._aggregate(chain, calls)
+        results: list[tuple[str, str] | Exception] = []
+        for token0, token1 in zip(returned[0::2], returned[1::2], strict=True):
+            failed = token0 if isinstance(token0, Exception) else token1
+            if isinstance(failed, Exception):
+                results.append(failed)
+                continue
+            try:
+                results.append((decode_address(token0), decode_address(token1)))
+            except ValueError as exc:
+                results.append(exc)
+        return results
+
+    def fetch_token_metadata(self, chain: str, tokens: list[str]) -> list[tuple[str, int] | Exception]:
+        calls = [(token, selector) for token in tokens for selector in (SYMBOL_SELECTOR, DECIMALS_SELECTOR)]
+        returned = self._aggregate(chain, calls)
+        results: list[tuple[str, int] | Exception] = []
+        for symbol, decimals in zip(returned[0::2], returned[1::2], strict=True):
+            failed = symbol if isinstance(symbol, Exception) else decimals
+            if isinstance(failed, Exception):
+                results.append(failed)
+                continue
+            try:
+                results.append((decode_symbol(symbol), decode_decimals(decimals)))
+            except Exception as exc:
+                results.append(exc)
+        return results
+
+
+def _is_pool_entry(value: object) -> bool:
+    return isinstance(value, list) and len(value) == 3 and all(isinstance(item, str) for item in value)
+
+
+def _is_token_entry(value: object) -> bool:
+    return (
+        isinstance(value, list)
+        and len(value) == 2
+        and isinstance(value[0], str)
+        and isinstance(value[1], int)
+        and not isinstance(value[1], bool)
+    )
+
+
+class PoolIndex:
+    def __init__(self) -> None:
+        # "chain:pool" -> [checksum pool address, token0, token1]; "chain:token" -> [symbol, decimals].
+        # Keys use lowercase addresses.
+        self.pools: dict[str, list] = {}
+        self.tokens: dict[str, list] = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str | Path) -> PoolIndex:
+        index = cls()
+        path = Path(path)
+        if not path.exists():
+            return index
+        try:
+            payload = json.loads(path.read_text())
+        except json.JSONDecodeError:
+            # A damaged index is rebuilt from the chain rather than blocking startup.
+            return index
+        if not isinstance(payload, dict) or payload.get("version") != INDEX_VERSION:
+            return index
+        pools, tokens = payload.get("pools"), payload.get("tokens")
+        if not isinstance(pools, dict) or not isinstance(tokens, dict):
+            return index
+        # Malformed entries are dropped and rediscovered like missing ones.
+        index.pools = {key: value for key, value in pools.items() if _is_pool_entry(value)}
+        index.tokens = {key: value for key, value in tokens.items() if _is_token_entry(value)}
+        index.dirty = len(index.pools) != len(pools) or len(index.tokens) != len(tokens)
+        return index
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({"version": INDEX_VERSION, "pools": self.pools, "tokens": self.tokens}, separators=(",", ":"))
+        )
+        os.replace(tmp, path)
+        self.dirty = False
+
+    def pool_config(self, chain: str, dex: str, pool: str) -> V2PoolConfig | None:
+        resolved = self.pools.get(f"{chain}:{pool}")
+        if resolved is None:
+            return None
+        checksum_address, token0, token1 = resolved
+        meta0 = self.tokens.get(f"{chain}:{token0}")
+        meta1 = self.tokens.get(f"{chain}:{token1}")
+        if meta0 is None or meta1 is None:
+            return None
+        return V2PoolConfig(
+            chain=chain,
+            dex=dex,
+            pool_address=checksum_address,
+            token0_symbol=meta0[0],
+            token1_symbol=meta1[0],
+            token0_decimals=meta0[1],
+            token1_decimals=meta1[1],
+            checksum_address=checksum_address,
+        )
+
+    def discover(self, reader: TokenMetadataReader, chain: str, entries: list[RegistryEntry]) -> list[str]:
+        # Resolves the given pools of one chain: pair tokens first, then metadata for unseen tokens.
+        errors: list[str] = []
+        pending = [pool for _, _, pool in entries if f"{chain}:{pool}" not in self.pools]
+        pool_errors: dict[str, Exception] = {}
+        for pool, result in zip(pending, reader.fetch_pool_tokens(chain, pending), strict=True):
+            if isinstance(result, Exception):
+                pool_errors[pool] = result
+                continue
+            self.pools[f"{chain}:{pool}"] = [to_checksum_address(pool), *result]
+            self.dirty = True
+
+        tokens = sorted(
+            {
+                token
+                for _, _, pool in entries
+                for token in self.pools.get(f"{chain}:{pool}", [None, None, None])[1:]
+                if token is not None and f"{chain}:{token}" not in self.tokens
+            }
+        )
+        token_errors: dict[str, Exception] = {}
+        for token, result in zip(tokens, reader.fetch_token_metadata(chain, tokens), strict=True):
+            if isinstance(result, Exception):
+                token_errors[token] = result
+                continue
+            self.tokens[f"{chain}:{token}"] = list(result)
+            self.dirty = True
+
+        for _, dex, pool in entries:
+            resolved = self.pools.get(f"{chain}:{pool}")
+            if resolved is None:
+                errors.append(f"{chain}:{dex}:{pool} error=token0()/token1(): {pool_errors.get(pool)}")
+                continue
+            for token in resolved[1:]:
+                if token in token_errors:
+                    errors.append(f"{chain}:{dex}:{pool} error=token {token} metadata: {token_errors[token]}")
+                    break
+        return errors
+
+
+def load_registry_pools(
+    cfg: PoolRegistryConfig,
+    chain_web3: dict[str, Web3],
+    gas_limit: int = 30_000_000,
+    gas_per_call: int = 15_000,
+) -> tuple[list[V2PoolConfig], list[str]]:
+    entries = read_registry(cfg.path)
+    index = PoolIndex.load(cfg.index_path)
+    resolved = [index.pool_config(*entry) for entry in entries]
+    unresolved: dict[str, list[RegistryEntry]] = {}
+    for entry, pool in zip(entries, resolved):
+        if pool is None:
+            unresolved.setdefault(entry[0], []).append(entry)
+
+    errors: list[str] = []
+    if unresolved:
+        reader = TokenMetadataReader(
+            {chain: w3 for chain, w3 in chain_web3.items() if chain in unresolved},
+            gas_limit=gas_limit,
+            gas_per_call=gas_per_call,
+        )
+        for chain, chain_entries in unresolved.items():
+            if chain not in chain_web3:
+                errors.extend(f"{chain}:{dex}:{pool} error=Missing RPC config" for _, dex, pool in chain_entries)
+                continue
+            errors.extend(index.discover(reader, chain, chain_entries))
+        if index.dirty:
+            index.save(cfg.index_path)
+        resolved = [pool or index.pool_config(*entry) for entry, pool in zip(entries, resolved)]
+
+    return [pool for pool in resolved if pool is not None], errors
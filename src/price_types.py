@@ -14,6 +14,9 @@ class PriceSnapshot:
     price_token1_per_token0: float
     block_number: int
     latency_ms: float
+    # Decimal-normalized pool reserves; zero when the source only knows the price.
+    reserve0: float = 0.0
+    reserve1: float = 0.0
 
 
 @dataclass(frozen=True)
@@ -22,6 +25,11 @@ class SpreadSignal:
     pair_key: str
     chain_a: str
     chain_b: str
+    # Venue identity: a chain can list several pools for the same pair.
+    dex_a: str
+    pool_a: str
+    dex_b: str
+    pool_b: str
     price_a: float
     price_b: float
     ratio_a_over_b: float
@@ -42,6 +50,9 @@ class ArbitrageOpportunity:
     gross_profit: float
     fees: float
     net_profit: float
+    # Pool addresses of both legs; empty when read back from history, which stores routes only.
+    buy_pool: str = ""
+    sell_pool: str = ""
 
 
 @dataclass(frozen=True)
@@ -53,3 +64,26 @@ class FeeBreakdown:
     bridge_fee_usd: float
     dex_fee_usd: float
     total_fees_usd: float
+
+
+@dataclass(frozen=True)
+class SizedOpportunity:
+    timestamp: datetime
+    pair_key: str
+    buy_chain: str
+    sell_chain: str
+    buy_pool: str
+    sell_pool: str
+    optimal_volume: float
+    amount_out: float
+    gross_profit: float
+    fees: float
+    net_profit: float
+
+
+@dataclass(frozen=True)
+class ArbitrageCycle:
+    nodes: tuple[str, ...]
+    edges: tuple[str, ...]
+    rate: float
+    profit_pct: float
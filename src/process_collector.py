@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+
+import numpy as np
+
+from src.config import CollectorConfig, V2PoolConfig, get_chain_configs, get_rpc_routing_config
+from src.dex_uniswap_v2 import (
+    AsyncUniswapV2ReserveReader,
+    BatchRpcV2ReserveReader,
+    MulticallV2ReserveReader,
+    UniswapV2ReserveReader,
+)
+from src.metrics import REGISTRY
+from src.multicall import chunked
+from src.price_types import PriceSnapshot
+from src.rpc_clients import build_batch_rpc_client, build_routed_async_rpc_client, build_routed_web3_client
+from src.rpc_router import build_endpoint_pool
+from src.shm_ring import CYCLES, ERROR_TEXT_BYTES, HEARTBEAT_NS, SNAPSHOT_RECORD, STATUS_ERROR, STATUS_OK, ShmRing
+from src.sync_tracker import SyncEventReserveTracker
+
+# Workers own the RPC reads and decoding; the parent only drains fixed-width records, so the
+# GIL-heavy JSON and web3 work scales with processes instead of contending in one interpreter.
+
+_MIN_RING_RECORDS = 1024
+_RING_CYCLES = 8
+_MAX_RESTART_DELAY_SEC = 30.0
+_MIN_STALL_TIMEOUT_SEC = 60.0
+# A pool whose newest record is older than this many poll intervals is reported, not served.
+_STALE_POLL_INTERVALS = 3
+_MIN_STALE_SEC = 2.0
+
+WORKER_RESTARTS = REGISTRY.counter(
+    "collector_worker_restarts_total", "Collector worker processes restarted after exiting or stalling.", ("worker",)
+)
+RING_DROPPED = REGISTRY.counter(
+    "collector_ring_dropped_total", "Ring records overwritten before the analyzer read them.", ("worker",)
+)
+
+ChainFetch = Callable[[list[V2PoolConfig]], list[PriceSnapshot | BaseException]]
+
+
+def _fetch_or_error(reader: UniswapV2ReserveReader, pool: V2PoolConfig) -> PriceSnapshot | BaseException:
+    try:
+        return reader.fetch_snapshot(pool)
+    except Exception as exc:
+        return exc
+
+
+def _build_worker_fetch(chain_name: str, cfg: CollectorConfig) -> ChainFetch:
+    # Same readers as the in-process collectors, built for a single chain inside the worker.
+    chain = next(chain for chain in get_chain_configs() if chain.name == chain_name)
+    endpoint_pool = build_endpoint_pool(chain, get_rpc_routing_config())
+    chain_web3 = {chain.name: build_routed_web3_client(endpoint_pool)}
+    multicall_reader = MulticallV2ReserveReader(
+        chain_web3,
+        gas_limit=cfg.multicall_gas_limit,
+        gas_per_call=cfg.multicall_gas_per_call,
+    )
+    if cfg.read_mode == "multicall":
+        return lambda pools: multicall_reader.fetch_chain_snapshots(chain.name, pools)
+    if cfg.read_mode == "sync_events":
+        tracker = SyncEventReserveTracker(
+            chain_web3,
+            seed_reader=multicall_reader,
+            confirmation_depth=cfg.sync_confirmation_depth,
+            max_block_range=cfg.sync_max_block_range,
+        )
+        return lambda pools: tracker.fetch_chain_snapshots(chain.name, pools)
+    if cfg.read_mode == "batch":
+        batch_reader = BatchRpcV2ReserveReader({chain.name: build_batch_rpc_client(chain.rpc_url)})
+        return lambda pools: batch_reader.fetch_chain_snapshots(chain.name, pools)
+    if cfg.read_mode == "async":
+        loop = asyncio.new_event_loop()
+        async_reader = AsyncUniswapV2ReserveReader(
+            {
+                chain.name: build_routed_async_rpc_client(
+                    endpoint_pool,
+                    max_connections=cfg.rpc_max_connections_per_chain,
+                    max_in_flight=cfg.rpc_max_in_flight_per_chain,
+                    request_timeout=cfg.rpc_request_timeout_sec,
+                )
+            }
+        )
+
+        async def fetch_async(pools: list[V2PoolConfig]) -> list[PriceSnapshot | BaseException]:
+            return await asyncio.gather(*(async_reader.fetch_snapshot(pool) for pool in pools), return_exceptions=True)
+
+        return lambda pools: loop.run_until_complete(fetch_async(pools))
+
+    reader = UniswapV2ReserveReader(chain_web3)
+    executor = ThreadPoolExecutor(max_workers=cfg.rpc_max_in_flight_per_chain)
+    return lambda pools: list(executor.map(lambda pool: _fetch_or_error(reader, pool), pools))
+
+
+def _fill_rows(rows: np.ndarray, results: list[PriceSnapshot | BaseException]) -> None:
+    status: list[int] = []
+    block_number: list[int] = []
+    reserve0: list[float] = []
+    reserve1: list[float] = []
+    price: list[float] = []
+    latency_ms: list[float] = []
+    error: list[bytes] = []
+    for result in results:
+        if isinstance(result, BaseException):
+            status.append(STATUS_ERROR)
+            block_number.append(0)
+            reserve0.append(0.0)
+            reserve1.append(0.0)
+            price.append(0.0)
+            latency_ms.append(0.0)
+            error.append(str(result).encode("utf-8", "replace")[:ERROR_TEXT_BYTES])
+            continue
+        status.append(STATUS_OK)
+        block_number.append(result.block_number)
+        reserve0.append(result.reserve0)
+        reserve1.append(result.reserve1)
+        price.append(result.price_token1_per_token0)
+        latency_ms.append(result.latency_ms)
+        error.append(b"")
+    rows["status"] = status
+    rows["block_number"] = block_number
+    rows["reserve0"] = reserve0
+    rows["reserve1"] = reserve1
+    rows["price"] = price
+    rows["latency_ms"] = latency_ms
+    rows["timestamp_ns"] = time.time_ns()
+    rows["error"] = error
+
+
+def _run_worker(
+    ring_name: str,
+    capacity: int,
+    chain: str,
+    pools: list[V2PoolConfig],
+    pool_indices: list[int],
+    cfg: CollectorConfig,
+    parent_pid: int,
+) -> None:
+    # Ctrl+C is handled by the parent, which terminates workers on shutdown.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    ring = ShmRing.attach(ring_name, capacity)
+    try:
+        fetch = _build_worker_fetch(chain, cfg)
+        rows = np.zeros(len(pools), dtype=SNAPSHOT_RECORD)
+        rows["pool_index"] = pool_indices
+        pid = os.getpid()
+        # Exits on its own if the parent dies without cleaning up.
+        while os.getppid() == parent_pid:
+            start = time.monotonic()
+            try:
+                results = fetch(pools)
+            except Exception as exc:
+                results = [exc for _ in pools]
+            _fill_rows(rows, results)
+            ring.write(rows)
+            ring.heartbeat(time.monotonic_ns(), pid)
+            time.sleep(max(0.0, cfg.poll_interval_sec - (time.monotonic() - start)))
+    finally:
+        ring.close()
+
+
+@dataclass
+class CollectorShard:
+    name: str
+    chain: str
+    pool_indices: list[int]
+    capacity: int
+    # Created by ProcessShardedCollector.start, so shared memory only exists once shutdown can release it.
+    ring: ShmRing | None = None
+    process: multiprocessing.process.BaseProcess | None = None
+    restarts: int = 0
+    restart_at: float = 0.0
+
+
+def plan_shards(pools: list[V2PoolConfig], pools_per_worker: int) -> list[tuple[str, str, list[int]]]:
+    # (worker name, chain, pool indices): one worker per chain, or per fixed-size shard of it.
+    by_chain: dict[str, list[int]] = {}
+    for index, pool in enumerate(pools):
+        by_chain.setdefault(pool.chain, []).append(index)
+    if pools_per_worker <= 0:
+        return [(chain, chain, indices) for chain, indices in by_chain.items()]
+    return [
+        (f"{chain}-{shard}", chain, list(indices))
+        for chain, chain_indices in by_chain.items()
+        for shard, indices in enumerate(chunked(chain_indices, pools_per_worker))
+    ]
+
+
+class ProcessShardedCollector:
+    def __init__(self, pools: list[V2PoolConfig], cfg: CollectorConfig) -> None:
+        self.pools = pools
+        self.cfg = cfg
+        self._index = {(pool.chain, pool.dex, pool.pool_address): i for i, pool in enumerate(pools)}
+        self._latest: list[PriceSnapshot | None] = [None] * len(pools)
+        self._latest_ns = np.zeros(len(pools), dtype=np.int64)
+        self._pool_errors: dict[int, str] = {}
+        self._worker_errors: list[str] = []
+        self._context = multiprocessing.get_context("spawn")
+        self.stall_timeout_sec = max(_MIN_STALL_TIMEOUT_SEC, 10 * cfg.poll_interval_sec)
+        self.max_snapshot_age_sec = max(_MIN_STALE_SEC, _STALE_POLL_INTERVALS * cfg.poll_interval_sec)
+        self.shards: list[CollectorShard] = []
+        for name, chain, indices in plan_shards(pools, cfg.pools_per_worker):
+            # A ring smaller than one cycle would overwrite the same pools on every write.
+            if cfg.ring_records and cfg.ring_records < len(indices):
+                raise ValueError(
+                    f"COLLECTOR_RING_RECORDS={cfg.ring_records} is smaller than worker {name} "
+                    f"({len(indices)} pools); raise it or lower COLLECTOR_POOLS_PER_WORKER"
+                )
+            capacity = cfg.ring_records or max(_MIN_RING_RECORDS, _RING_CYCLES * len(indices))
+            self.shards.append(CollectorShard(name, chain, indices, capacity))
+
+    async def start(self, ready_timeout_sec: float = 30.0) -> None:
+        for shard in self.shards:
+            shard.ring = ShmRing.create(shard.capacity)
+        for shard in self.shards:
+            self._spawn(shard)
+        # Waits for one cycle from every worker so the first analysis is not empty.
+        deadline = time.monotonic() + ready_timeout_sec
+        while time.monotonic() < deadline:
+            if all(shard.ring.header[CYCLES] > 0 or not shard.process.is_alive() for shard in self.shards):
+                return
+            await asyncio.sleep(0.05)
+
+    def _spawn(self, shard: CollectorShard) -> None:
+        shard.ring.header[HEARTBEAT_NS] = time.monotonic_ns()
+        shard.ring.header[CYCLES] = 0
+        shard.process = self._context.Process(
+            target=_run_worker,
+            name=f"collector-{shard.name}",
+            args=(
+                shard.ring.name,
+                shard.ring.capacity,
+                shard.chain,
+                [self.pools[i] for i in shard.pool_indices],
+                shard.pool_indices,
+                self.cfg,
+                os.getpid(),
+            ),
+            daemon=True,
+        )
+        shard.process.start()
+
+    def _supervise(self) -> None:
+        # A dead or stalled worker is restarted on the same ring; other chains keep running.
+        now = time.monotonic()
+        for shard in self.shards:
+            process = shard.process
+            if process is not None:
+                if process.is_alive():
+                    heartbeat_age_sec = (time.monotonic_ns() - int(shard.ring.header[HEARTBEAT_NS])) / 1e9
+                    if heartbeat_age_sec < self.stall_timeout_sec:
+                        if shard.ring.header[CYCLES] > 0:
+                            shard.restarts = 0
+                        continue
+                    process.kill()
+                    process.join(timeout=1.0)
+                    reason = f"stalled for {heartbeat_age_sec:.0f}s"
+                else:
+                    process.join()
+                    reason = f"exited with code {process.exitcode}"
+                shard.process = None
+                delay = min(_MAX_RESTART_DELAY_SEC, 0.5 * 2**shard.restarts)
+                shard.restarts += 1
+                shard.restart_at = now + delay
+                WORKER_RESTARTS.inc(shard.name)
+                self._worker_errors.append(f"collector worker {shard.name} {reason}; restarting in {delay:.1f}s")
+            if now >= shard.restart_at:
+                self._spawn(shard)
+
+    def _drain(self) -> None:
+        for shard in self.shards:
+            dropped = shard.ring.dropped
+            rows = shard.ring.read()
+            if shard.ring.dropped != dropped:
+                RING_DROPPED.inc(shard.name, amount=shard.ring.dropped - dropped)
+            if not len(rows):
+                continue
+            # Several cycles may be queued; only the newest record per pool matters.
+            _, newest = np.unique(rows["pool_index"][::-1], return_index=True)
+            rows = rows[len(rows) - 1 - newest]
+            for _, index, status, block_number, reserve0, reserve1, price, latency_ms, ts_ns, error in rows.tolist():
+                self._latest_ns[index] = ts_ns
+                if status != STATUS_OK:
+                    self._latest[index] = None
+                    self._pool_errors[index] = error.decode("utf-8", "replace")
+                    continue
+                pool = self.pools[index]
+                self._pool_errors.pop(index, None)
+                self._latest[index] = PriceSnapshot(
+                    timestamp=datetime.fromtimestamp(ts_ns / 1e9, timezone.utc),
+                    chain=pool.chain,
+                    dex=pool.dex,
+                    pool_address=pool.pool_address,
+                    pair_key=pool.pair_key,
+                    price_token1_per_token0=price,
+                    block_number=block_number,
+                    latency_ms=latency_ms,
+                    reserve0=reserve0,
+                    reserve1=reserve1,
+                )
+
+    async def collect(self, pools: list[V2PoolConfig]) -> tuple[list[PriceSnapshot], list[str]]:
+        # SnapshotCollector-compatible: returns the newest state the workers have published.
+        self._supervise()
+        self._drain()
+        snapshots: list[PriceSnapshot] = []
+        errors, self._worker_errors = self._worker_errors, []
+        stale_before_ns = time.time_ns() - int(self.max_snapshot_age_sec * 1e9)
+        for pool in pools:
+            index = self._index.get((pool.chain, pool.dex, pool.pool_address))
+            if index is None:
+                errors.append(f"{pool.chain}:{pool.dex}:{pool.pair_key} error=pool is not assigned to a collector worker")
+                continue
+            snapshot = self._latest[index]
+            # A crashed or stalled worker's last prices must not pass for current ones.
+            if snapshot is not None and self._latest_ns[index] < stale_before_ns:
+                age_sec = (time.time_ns() - int(self._latest_ns[index])) / 1e9
+                errors.append(f"{pool.chain}:{pool.dex}:{pool.pair_key} error=stale snapshot, last update {age_sec:.1f}s ago")
+            elif snapshot is not None:
+                snapshots.append(snapshot)
+            elif index in self._pool_errors:
+                errors.append(f"{pool.chain}:{pool.dex}:{pool.pair_key} error={self._pool_errors[index]}")
+        return snapshots, errors
+
+    def close(self) -> None:
+        for shard in self.shards:
+            if shard.process is not None and shard.process.is_alive():
+                shard.process.terminate()
+        for shard in self.shards:
+            if shard.process is not None:
+                shard.process.join(timeout=5.0)
+                if shard.process.is_alive():
+                    shard.process.kill()
+            if shard.ring is not None:
+                shard.ring.close()
+                shard.ring = None
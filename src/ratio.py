@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import heapq
 from itertools import combinations
 
 from src.config import ArbitrageConfig
@@ -28,6 +29,10 @@ def compute_cross_chain_spreads(snapshots: list[PriceSnapshot]) -> list[SpreadSi
                     pair_key=pair_key,
                     chain_a=a.chain,
                     chain_b=b.chain,
+                    dex_a=a.dex,
+                    pool_a=a.pool_address,
+                    dex_b=b.dex,
+                    pool_b=b.pool_address,
                     price_a=a.price_token1_per_token0,
                     price_b=b.price_token1_per_token0,
                     ratio_a_over_b=ratio,
@@ -98,7 +103,122 @@ def compute_arbitrage_opportunities(
                     gross_profit=gross_profit,
                     fees=fees,
                     net_profit=net_profit,
+                    buy_pool=lower.pool_address,
+                    sell_pool=higher.pool_address,
                 )
             )
 
     return sorted(opportunities, key=lambda x: x.net_profit, reverse=True)
+
+
+def compute_top_arbitrage_opportunities(
+    snapshots: list[PriceSnapshot],
+    cfg: ArbitrageConfig,
+    route_fees: dict[tuple[str, str], FeeBreakdown],
+    top_k: int | None = None,
+) -> list[ArbitrageOpportunity]:
+    by_pair: dict[str, list[PriceSnapshot]] = {}
+    for snapshot in snapshots:
+        by_pair.setdefault(snapshot.pair_key, []).append(snapshot)
+
+    # Min-heap of (net_profit, -sequence, opportunity); earlier finds win ties, like a stable sort.
+    heap: list[tuple[float, int, ArbitrageOpportunity]] = []
+    sequence = 0
+    for pair_key, pair_snapshots in by_pair.items():
+        min_fee_from = _min_fee_by_buy_chain({s.chain for s in pair_snapshots}, route_fees)
+        if not min_fee_from:
+            continue
+        pair_min_fee = min(min_fee_from.values())
+        venues = sorted(pair_snapshots, key=lambda x: x.price_token1_per_token0)
+        top_price = venues[-1].price_token1_per_token0
+
+        for i, lower in enumerate(venues):
+            lower_price = lower.price_token1_per_token0
+            if lower_price <= 0:
+                continue
+            floor = heap[0][0] if top_k is not None and len(heap) >= top_k else None
+            # Buying any pricier venue against the best sell and cheapest route only gets worse.
+            if not _may_clear(top_price, lower_price, pair_min_fee, cfg, floor):
+                break
+            fee_floor = min_fee_from.get(lower.chain)
+            if fee_floor is None:
+                continue
+
+            # Sweep sells from the most expensive down; once the bound fails, cheaper ones fail too.
+            for higher in reversed(venues[i + 1:]):
+                higher_price = higher.price_token1_per_token0
+                if higher_price <= lower_price:
+                    break
+                floor = heap[0][0] if top_k is not None and len(heap) >= top_k else None
+                if not _may_clear(higher_price, lower_price, fee_floor, cfg, floor):
+                    break
+                if higher.chain == lower.chain:
+                    continue
+                fee_quote = route_fees.get((lower.chain, higher.chain))
+                if not fee_quote:
+                    continue
+
+                difference = higher_price - lower_price
+                difference_pct = (difference / lower_price) * 100
+                gross_profit = (difference / lower_price) * cfg.volume
+                fees = fee_quote.total_fees_usd
+                net_profit = gross_profit - fees
+                net_profit_pct = (net_profit / cfg.volume) * 100
+                if net_profit <= 0 or net_profit < cfg.min_net_profit or net_profit_pct < cfg.min_net_profit_pct:
+                    continue
+
+                opportunity = ArbitrageOpportunity(
+                    timestamp=max(lower.timestamp, higher.timestamp),
+                    pair_key=pair_key,
+                    buy_chain=lower.chain,
+                    sell_chain=higher.chain,
+                    buy_price=lower_price,
+                    sell_price=higher_price,
+                    difference=difference,
+                    difference_pct=difference_pct,
+                    volume=cfg.volume,
+                    gross_profit=gross_profit,
+                    fees=fees,
+                    net_profit=net_profit,
+                    buy_pool=lower.pool_address,
+                    sell_pool=higher.pool_address,
+                )
+                sequence += 1
+                if top_k is None or len(heap) < top_k:
+                    heapq.heappush(heap, (net_profit, -sequence, opportunity))
+                else:
+                    heapq.heappushpop(heap, (net_profit, -sequence, opportunity))
+
+    return [entry[2] for entry in sorted(heap, reverse=True)]
+
+
+def _min_fee_by_buy_chain(
+    chains: set[str],
+    route_fees: dict[tuple[str, str], FeeBreakdown],
+) -> dict[str, float]:
+    min_fees: dict[str, float] = {}
+    for (buy_chain, sell_chain), quote in route_fees.items():
+        if quote and buy_chain in chains and sell_chain in chains and buy_chain != sell_chain:
+            current = min_fees.get(buy_chain)
+            if current is None or quote.total_fees_usd < current:
+                min_fees[buy_chain] = quote.total_fees_usd
+    return min_fees
+
+
+def _may_clear(
+    higher_price: float,
+    lower_price: float,
+    fee_floor: float,
+    cfg: ArbitrageConfig,
+    profit_floor: float | None,
+) -> bool:
+    # Upper bound on net profit: the real route fee is never below `fee_floor`.
+    difference_pct = ((higher_price - lower_price) / lower_price) * 100
+    if difference_pct < cfg.min_diff_pct:
+        return False
+    best_net = (higher_price - lower_price) / lower_price * cfg.volume - fee_floor
+    if best_net <= 0 or best_net < cfg.min_net_profit:
+        return False
+    if (best_net / cfg.volume) * 100 < cfg.min_net_profit_pct:
+        return False
+    return profit_floor is None or best_net > profit_floor
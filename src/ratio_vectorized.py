@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.config import ArbitrageConfig
+from src.price_types import ArbitrageOpportunity, FeeBreakdown, PriceSnapshot, SpreadSignal
+
+
+@dataclass
+class PairVenues:
+    pair_key: str
+    snapshots: list[PriceSnapshot]
+    prices: np.ndarray
+    chain_ids: np.ndarray
+
+
+def group_pair_venues(
+    snapshots: list[PriceSnapshot],
+    chain_index: dict[str, int],
+) -> list[PairVenues]:
+    by_pair: dict[str, list[PriceSnapshot]] = {}
+    for snapshot in snapshots:
+        by_pair.setdefault(snapshot.pair_key, []).append(snapshot)
+        chain_index.setdefault(snapshot.chain, len(chain_index))
+
+    return [
+        PairVenues(
+            pair_key=pair_key,
+            snapshots=pair_snapshots,
+            prices=np.fromiter((s.price_token1_per_token0 for s in pair_snapshots), dtype=np.float64),
+            chain_ids=np.fromiter((chain_index[s.chain] for s in pair_snapshots), dtype=np.int64),
+        )
+        for pair_key, pair_snapshots in by_pair.items()
+    ]
+
+
+def build_fee_matrix(
+    route_fees: dict[tuple[str, str], FeeBreakdown],
+    chain_index: dict[str, int],
+    exclude_dex_fee: bool = False,
+) -> np.ndarray:
+    # fees[buy, sell] = total route fee; NaN marks routes without a quote.
+    size = len(chain_index)
+    fees = np.full((size, size), np.nan, dtype=np.float64)
+    for (buy_chain, sell_chain), quote in route_fees.items():
+        buy_id = chain_index.get(buy_chain)
+        sell_id = chain_index.get(sell_chain)
+        if buy_id is not None and sell_id is not None:
+            fees[buy_id, sell_id] = quote.total_fees_usd - (quote.dex_fee_usd if exclude_dex_fee else 0.0)
+    return fees
+
+
+def cross_chain_pairs(venues: PairVenues) -> tuple[np.ndarray, np.ndarray]:
+    # Upper triangle of the venue x venue matrix, in itertools.combinations order.
+    rows, cols = np.triu_indices(len(venues.prices), k=1)
+    keep = venues.chain_ids[rows] != venues.chain_ids[cols]
+    return rows[keep], cols[keep]
+
+
+def compute_cross_chain_spreads_vectorized(
+    snapshots: list[PriceSnapshot],
+    limit: int | None = None,
+) -> list[SpreadSignal]:
+    chain_index: dict[str, int] = {}
+    venues_by_pair = group_pair_venues(snapshots, chain_index)
+    flat, offsets = flatten_venues(venues_by_pair)
+
+    a_parts: list[np.ndarray] = []
+    b_parts: list[np.ndarray] = []
+    ratio_parts: list[np.ndarray] = []
+    for venues, offset in zip(venues_by_pair, offsets, strict=True):
+        rows, cols = cross_chain_pairs(venues)
+        keep = venues.prices[cols] != 0
+        rows, cols = rows[keep], cols[keep]
+        ratio_parts.append(venues.prices[rows] / venues.prices[cols])
+        a_parts.append(rows + offset)
+        b_parts.append(cols + offset)
+
+    if not ratio_parts:
+        return []
+
+    ratios = np.concatenate(ratio_parts)
+    spread_pct = (ratios - 1.0) * 100
+    # Stable descending sort, matching sorted(..., reverse=True) on ties.
+    order = np.argsort(-np.abs(spread_pct), kind="stable")
+    if limit is not None:
+        # Only the widest `limit` spreads become objects.
+        order = order[:limit]
+
+    spreads: list[SpreadSignal] = []
+    for a_index, b_index, ratio, spread in zip(
+        np.concatenate(a_parts)[order].tolist(),
+        np.concatenate(b_parts)[order].tolist(),
+        ratios[order].tolist(),
+        spread_pct[order].tolist(),
+    ):
+        a = flat[a_index]
+        b = flat[b_index]
+        spreads.append(
+            SpreadSignal(
+                timestamp=max(a.timestamp, b.timestamp),
+                pair_key=a.pair_key,
+                chain_a=a.chain,
+                chain_b=b.chain,
+                dex_a=a.dex,
+                pool_a=a.pool_address,
+                dex_b=b.dex,
+                pool_b=b.pool_address,
+                price_a=a.price_token1_per_token0,
+                price_b=b.price_token1_per_token0,
+                ratio_a_over_b=ratio,
+                spread_pct=spread,
+            )
+        )
+    return spreads
+
+
+def compute_arbitrage_opportunities_vectorized(
+    snapshots: list[PriceSnapshot],
+    cfg: ArbitrageConfig,
+    route_fees: dict[tuple[str, str], FeeBreakdown],
+) -> list[ArbitrageOpportunity]:
+    chain_index: dict[str, int] = {}
+    venues_by_pair = group_pair_venues(snapshots, chain_index)
+    flat, offsets = flatten_venues(venues_by_pair)
+    fee_matrix = build_fee_matrix(route_fees, chain_index)
+
+    columns: dict[str, list[np.ndarray]] = {
+        "buy": [], "sell": [], "difference": [], "difference_pct": [], "gross": [], "fees": [], "net": []
+    }
+    for venues, offset in zip(venues_by_pair, offsets, strict=True):
+        rows, cols = cross_chain_pairs(venues)
+        # The cheaper venue is the buy side; ties keep `a` as the buy side.
+        a_is_higher = venues.prices[rows] > venues.prices[cols]
+        buy = np.where(a_is_higher, cols, rows)
+        sell = np.where(a_is_higher, rows, cols)
+        lower_price = venues.prices[buy]
+        higher_price = venues.prices[sell]
+
+        fees = fee_matrix[venues.chain_ids[buy], venues.chain_ids[sell]]
+        valid = (lower_price > 0) & ~np.isnan(fees)
+        safe_lower = np.where(valid, lower_price, 1.0)
+        difference = higher_price - lower_price
+        difference_pct = (difference / safe_lower) * 100
+        gross_profit = (difference / safe_lower) * cfg.volume
+        net_profit = gross_profit - fees
+        net_profit_pct = (net_profit / cfg.volume) * 100
+
+        keep = (
+            valid
+            & (difference_pct >= cfg.min_diff_pct)
+            & (net_profit > 0)
+            & (net_profit >= cfg.min_net_profit)
+            & (net_profit_pct >= cfg.min_net_profit_pct)
+        )
+        columns["buy"].append(buy[keep] + offset)
+        columns["sell"].append(sell[keep] + offset)
+        columns["difference"].append(difference[keep])
+        columns["difference_pct"].append(difference_pct[keep])
+        columns["gross"].append(gross_profit[keep])
+        columns["fees"].append(fees[keep])
+        columns["net"].append(net_profit[keep])
+
+    if not columns["net"]:
+        return []
+
+    merged = {name: np.concatenate(parts) for name, parts in columns.items()}
+    order = np.argsort(-merged["net"], kind="stable")
+
+    # Objects are created only for rows that passed every threshold, already in output order.
+    opportunities: list[ArbitrageOpportunity] = []
+    for buy_index, sell_index, difference, difference_pct, gross, fees, net in zip(
+        *(merged[name][order].tolist() for name in ("buy", "sell", "difference", "difference_pct", "gross", "fees", "net"))
+    ):
+        lower = flat[buy_index]
+        higher = flat[sell_index]
+        opportunities.append(
+            ArbitrageOpportunity(
+                timestamp=max(lower.timestamp, higher.timestamp),
+                pair_key=lower.pair_key,
+                buy_chain=lower.chain,
+                sell_chain=higher.chain,
+                buy_price=lower.price_token1_per_token0,
+                sell_price=higher.price_token1_per_token0,
+                difference=difference,
+                difference_pct=difference_pct,
+                volume=cfg.volume,
+                gross_profit=gross,
+                fees=fees,
+                net_profit=net,
+                buy_pool=lower.pool_address,
+                sell_pool=higher.pool_address,
+            )
+        )
+    return opportunities
+
+
+def flatten_venues(venues_by_pair: list[PairVenues]) -> tuple[list[PriceSnapshot], list[int]]:
+    flat: list[PriceSnapshot] = []
+    offsets: list[int] = []
+    for venues in venues_by_pair:
+        offsets.append(len(flat))
+        flat.extend(venues.snapshots)
+    return flat, offsets
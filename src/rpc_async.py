@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+from typing import Any
+
+import aiohttp
+
+from src.rpc_batch import JsonRpcError, build_batch_request, parse_batch_response, rpc_error_code
+
+
+class AsyncJsonRpcClient:
+    def __init__(
+        self,
+        rpc_url: str,
+        max_connections: int = 16,
+        max_in_flight: int = 64,
+        request_timeout: float = 10.0,
+        keepalive_timeout: float = 30.0,
+    ) -> None:
+        self.rpc_url = rpc_url
+        self.max_connections = max_connections
+        self.request_timeout = request_timeout
+        self.keepalive_timeout = keepalive_timeout
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._session: aiohttp.ClientSession | None = None
+        self._closed = False
+        self._ids = itertools.count(1)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so the session binds to the running event loop; never again after aclose().
+        if self._closed:
+            raise RuntimeError(f"{self.rpc_url}: client is closed")
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                headers={"Content-Type": "application/json", "User-Agent": "trade-bot/0.1"},
+            )
+        return self._session
+
+    async def _post(self, body: Any) -> Any:
+        async with self._in_flight:
+            async with self._get_session().post(self.rpc_url, json=body) as resp:
+                resp.raise_for_status()
+                return await resp.json(content_type=None)
+
+    async def call(self, method: str, params: list[Any]) -> Any:
+        payload = await self._post({"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params})
+        if "error" in payload:
+            raise JsonRpcError(f"{method} failed: {payload['error']!r}", rpc_error_code(payload["error"]))
+        return payload.get("result")
+
+    async def call_batch(self, calls: list[tuple[str, list[Any]]]) -> list[Any | JsonRpcError]:
+        if not calls:
+            return []
+
+        ids = [next(self._ids) for _ in calls]
+        payload = await self._post(build_batch_request(ids, calls))
+        return parse_batch_response(self.rpc_url, ids, calls, payload)
+
+    async def aclose(self) -> None:
+        self._closed = True
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
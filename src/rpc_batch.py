@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import itertools
+import json
+import urllib.request
+from typing import Any
+
+
+class JsonRpcError(Exception):
+    def __init__(self, message: str, code: int | None = None) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+def rpc_error_code(error: Any) -> int | None:
+    code = error.get("code") if isinstance(error, dict) else None
+    return code if isinstance(code, int) else None
+
+
+class JsonRpcBatchClient:
+    def __init__(self, rpc_url: str, request_timeout: int = 10) -> None:
+        self.rpc_url = rpc_url
+        self.request_timeout = request_timeout
+        self._ids = itertools.count(1)
+
+    def call_batch(self, calls: list[tuple[str, list[Any]]]) -> list[Any | JsonRpcError]:
+        if not calls:
+            return []
+
+        ids = [next(self._ids) for _ in calls]
+        body = build_batch_request(ids, calls)
+        req = urllib.request.Request(
+            self.rpc_url,
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json", "User-Agent": "trade-bot/0.1"},
+        )
+        with urllib.request.urlopen(req, timeout=self.request_timeout) as resp:
+            payload = json.loads(resp.read().decode("utf-8"))
+
+        return parse_batch_response(self.rpc_url, ids, calls, payload)
+
+
+def build_batch_request(ids: list[int], calls: list[tuple[str, list[Any]]]) -> list[dict[str, Any]]:
+    return [
+        {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+        for request_id, (method, params) in zip(ids, calls, strict=True)
+    ]
+
+
+def parse_batch_response(
+    rpc_url: str,
+    ids: list[int],
+    calls: list[tuple[str, list[Any]]],
+    payload: Any,
+) -> list[Any | JsonRpcError]:
+    if not isinstance(payload, list):
+        # Some providers answer a whole batch with a single error object.
+        error = payload.get("error") if isinstance(payload, dict) else None
+        raise JsonRpcError(f"Batch rejected by {rpc_url}: {payload!r}", rpc_error_code(error))
+
+    # Batch responses may come back in any order.
+    by_id = {item.get("id"): item for item in payload if isinstance(item, dict)}
+    results: list[Any | JsonRpcError] = []
+    for request_id, (method, _) in zip(ids, calls, strict=True):
+        item = by_id.get(request_id)
+        if item is None:
+            results.append(JsonRpcError(f"No response for {method} (id={request_id})"))
+        elif "error" in item:
+            results.append(JsonRpcError(f"{method} failed: {item['error']!r}", rpc_error_code(item["error"])))
+        else:
+            results.append(item.get("result"))
+    return results
+
+
+def unwrap(result: Any | JsonRpcError) -> Any:
+    if isinstance(result, JsonRpcError):
+        raise result
+    return result
@@ -2,6 +2,10 @@ from __future__ import annotations
 
 from web3 import HTTPProvider, Web3
 
+from src.rpc_async import AsyncJsonRpcClient
+from src.rpc_batch import JsonRpcBatchClient
+from src.rpc_router import EndpointPool, HedgedAsyncJsonRpcClient, HedgedHTTPProvider
+
 
 def build_web3_client(rpc_url: str, request_timeout: int = 10) -> Web3:
     provider = HTTPProvider(
@@ -9,3 +13,54 @@ def build_web3_client(rpc_url: str, request_timeout: int = 10) -> Web3:
         request_kwargs={"timeout": request_timeout},
     )
     return Web3(provider)
+
+
+def build_batch_rpc_client(rpc_url: str, request_timeout: int = 10) -> JsonRpcBatchClient:
+    return JsonRpcBatchClient(rpc_url=rpc_url, request_timeout=request_timeout)
+
+
+def build_async_rpc_client(
+    rpc_url: str,
+    max_connections: int = 16,
+    max_in_flight: int = 64,
+    request_timeout: float = 10.0,
+) -> AsyncJsonRpcClient:
+    return AsyncJsonRpcClient(
+        rpc_url=rpc_url,
+        max_connections=max_connections,
+        max_in_flight=max_in_flight,
+        request_timeout=request_timeout,
+    )
+
+
+def build_routed_web3_client(pool: EndpointPool, request_timeout: int = 10) -> Web3:
+    if len(pool.endpoints) == 1:
+        return build_web3_client(pool.endpoints[0].url, request_timeout=request_timeout)
+    return Web3(HedgedHTTPProvider(pool, request_timeout=request_timeout))
+
+
+def close_web3_client(w3: Web3) -> None:
+    # Only the routed provider owns threads; plain HTTPProvider sessions are left to web3.
+    if isinstance(w3.provider, HedgedHTTPProvider):
+        w3.provider.close()
+
+
+def build_routed_async_rpc_client(
+    pool: EndpointPool,
+    max_connections: int = 16,
+    max_in_flight: int = 64,
+    request_timeout: float = 10.0,
+) -> AsyncJsonRpcClient | HedgedAsyncJsonRpcClient:
+    if len(pool.endpoints) == 1:
+        return build_async_rpc_client(
+            pool.endpoints[0].url,
+            max_connections=max_connections,
+            max_in_flight=max_in_flight,
+            request_timeout=request_timeout,
+        )
+    return HedgedAsyncJsonRpcClient(
+        pool,
+        max_connections=max_connections,
+        max_in_flight=max_in_flight,
+        request_timeout=request_timeout,
+    )
@@ -0,0 +1,449 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from typing import Any, Awaitable, Callable
+
+from web3 import HTTPProvider
+from web3.providers.base import BaseProvider
+
+from src.config import ChainConfig, RpcRoutingConfig
+from src.metrics import REGISTRY
+from src.multicall import MULTICALL3_ADDRESS, leading_block_number
+from src.rpc_async import AsyncJsonRpcClient
+from src.rpc_batch import JsonRpcError
+
+# Errors that say "this endpoint cannot answer right now" rather than "the call itself failed":
+# rate limits, overload and a node that has not seen the requested block yet.
+RETRYABLE_ERROR_CODES = {-32005, -32603, 429}
+RETRYABLE_ERROR_MARKERS = ("rate limit", "header not found", "unknown block", "too many requests")
+# Percentile of recent latency after which a hedged duplicate goes to the next endpoint.
+HEDGE_QUANTILE = 0.95
+MIN_SAMPLES_FOR_HEDGE = 10
+
+HEDGED_REQUESTS = REGISTRY.counter(
+    "rpc_hedged_requests_total", "Requests duplicated to a second endpoint.", ("chain",)
+)
+ENDPOINT_FAILURES = REGISTRY.counter(
+    "rpc_endpoint_failures_total",
+    "Failed, lagging or rejected endpoint responses (endpoint is the index in <PREFIX>_RPC_URLS).",
+    ("chain", "endpoint"),
+)
+
+
+class EndpointError(Exception):
+    pass
+
+
+def is_retryable_error(code: int | None, message: str) -> bool:
+    lowered = message.lower()
+    return code in RETRYABLE_ERROR_CODES or any(marker in lowered for marker in RETRYABLE_ERROR_MARKERS)
+
+
+class EndpointStats:
+    def __init__(self, index: int, url: str, window: int) -> None:
+        self.index = index
+        self.url = url
+        self.latencies: deque[float] = deque(maxlen=window)
+        # True for a failed attempt; the mean is the rolling error rate.
+        self.failures: deque[bool] = deque(maxlen=window)
+        self.head_block: int | None = None
+        self.head_seen_at = 0.0
+        self.chain_id: int | None = None
+        self.disabled = ""
+        self.last_failure_at = 0.0
+        self.last_error = ""
+        self._sorted: list[float] | None = None
+
+    def quantile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        if self._sorted is None:
+            self._sorted = sorted(self.latencies)
+        return self._sorted[min(len(self._sorted) - 1, int(q * len(self._sorted)))]
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self.failures) / len(self.failures) if self.failures else 0.0
+
+    @property
+    def score(self) -> float:
+        # Mean rather than median so a heavy tail counts against the endpoint; inflated by recent
+        # errors. Untried endpoints score 0 and get sampled first.
+        mean = sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+        return mean * (1.0 + 4.0 * self.error_rate)
+
+    def _add_latency(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self._sorted = None
+
+
+class EndpointPool:
+    def __init__(
+        self,
+        chain: str,
+        urls: tuple[str, ...] | list[str],
+        expected_chain_id: int,
+        hedge_enabled: bool = True,
+        hedge_min_delay_sec: float = 0.025,
+        max_block_lag: int = 3,
+        stats_window: int = 200,
+        retry_after_sec: float = 15.0,
+    ) -> None:
+        self.chain = chain
+        self.expected_chain_id = expected_chain_id
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_delay_sec = hedge_min_delay_sec
+        self.max_block_lag = max_block_lag
+        self.retry_after_sec = retry_after_sec
+        self.endpoints = [EndpointStats(index, url, stats_window) for index, url in enumerate(urls)]
+        self.best_head = 0
+        self._lock = threading.Lock()
+
+    def _is_healthy(self, endpoint: EndpointStats, now: float) -> bool:
+        if endpoint.disabled:
+            return False
+        # Lag comes first, judged on a head seen within the cool-down: an older reading says
+        # nothing about where the node is now, and expiring it lets the node be probed again.
+        if (
+            endpoint.head_block is not None
+            and endpoint.head_block < self.best_head - self.max_block_lag
+            and now - endpoint.head_seen_at < self.retry_after_sec
+        ):
+            return False
+        # Endpoints that failed get another chance after a cool-down so they can recover.
+        if endpoint.last_failure_at and now - endpoint.last_failure_at >= self.retry_after_sec:
+            return True
+        return endpoint.error_rate < 0.5
+
+    def is_healthy(self, endpoint: EndpointStats) -> bool:
+        with self._lock:
+            return self._is_healthy(endpoint, time.monotonic())
+
+    def ranked(self) -> list[EndpointStats]:
+        # Healthy endpoints fastest first, then the rest as a last resort; disabled ones never.
+        now = time.monotonic()
+        with self._lock:
+            usable = [endpoint for endpoint in self.endpoints if not endpoint.disabled]
+            healthy = sorted((e for e in usable if self._is_healthy(e, now)), key=lambda e: e.score)
+            return healthy + sorted((e for e in usable if e not in healthy), key=lambda e: e.score)
+
+    def hedge_delay(self, endpoint: EndpointStats) -> float | None:
+        if not self.hedge_enabled or len(endpoint.latencies) < MIN_SAMPLES_FOR_HEDGE:
+            return None
+        with self._lock:
+            return max(self.hedge_min_delay_sec, endpoint.quantile(HEDGE_QUANTILE))
+
+    def record_success(self, endpoint: EndpointStats, latency: float) -> None:
+        with self._lock:
+            endpoint._add_latency(latency)
+            endpoint.failures.append(False)
+
+    def record_failure(self, endpoint: EndpointStats, latency: float | None, reason: str) -> None:
+        with self._lock:
+            if latency is not None:
+                endpoint._add_latency(latency)
+            endpoint.failures.append(True)
+            endpoint.last_failure_at = time.monotonic()
+            endpoint.last_error = reason
+        ENDPOINT_FAILURES.inc(self.chain, str(endpoint.index))
+
+    def record_abandoned(self, endpoint: EndpointStats, elapsed: float) -> None:
+        # A hedge beat the primary: its elapsed time (already past its p95) is a lower bound on its
+        # latency and still counts. A cancelled hedge is not recorded; that would hide its tail.
+        with self._lock:
+            endpoint._add_latency(elapsed)
+
+    def observe_head(self, endpoint: EndpointStats, block: int) -> bool:
+        with self._lock:
+            endpoint.head_block = block
+            endpoint.head_seen_at = time.monotonic()
+            if endpoint.disabled:
+                # A node on the wrong chain must not move the best known head.
+                return False
+            self.best_head = max(self.best_head, block)
+            return block >= self.best_head - self.max_block_lag
+
+    def observe_chain_id(self, endpoint: EndpointStats, chain_id: int) -> None:
+        with self._lock:
+            endpoint.chain_id = chain_id
+            if chain_id != self.expected_chain_id:
+                endpoint.disabled = f"chain_id={chain_id} expected={self.expected_chain_id}"
+
+    def check_response(self, endpoint: EndpointStats, calls: list[tuple[str, list[Any]]], results: list[Any]) -> str:
+        # Returns why the response must not be used, or "" when it is fine.
+        for (method, params), result in zip(calls, results):
+            if isinstance(result, JsonRpcError):
+                if is_retryable_error(result.code, str(result)):
+                    return str(result)
+                continue
+            if not isinstance(result, str):
+                continue
+            block: int | None = None
+            if method == "eth_blockNumber":
+                block = int(result, 16)
+            elif method == "eth_call":
+                block = _multicall_block(params, result)
+            if block is not None and not self.observe_head(endpoint, block):
+                return f"lagging at block {block}, best known {self.best_head}"
+        return ""
+
+
+def _multicall_block(params: list[Any], result: str) -> int | None:
+    # Reserve reads are aggregate3 batches led by getBlockNumber(); that block is the node's head
+    # for "latest" reads, so it is checked like an eth_blockNumber answer.
+    call = params[0] if params and isinstance(params[0], dict) else {}
+    if str(call.get("to", "")).lower() != MULTICALL3_ADDRESS.lower():
+        return None
+    # Reads pinned to a block report that block, not the head.
+    if (params[1] if len(params) > 1 else "latest") not in ("latest", "pending"):
+        return None
+    data = call.get("data") or call.get("input") or "0x"
+    try:
+        return leading_block_number(bytes.fromhex(data[2:]), bytes.fromhex(result[2:]))
+    except ValueError:
+        return None
+
+
+def build_endpoint_pool(chain: ChainConfig, routing: RpcRoutingConfig) -> EndpointPool:
+    return EndpointPool(
+        chain.name,
+        chain.rpc_urls or (chain.rpc_url,),
+        chain.expected_chain_id,
+        hedge_enabled=routing.hedge_enabled,
+        hedge_min_delay_sec=routing.hedge_min_delay_sec,
+        max_block_lag=routing.max_block_lag,
+        stats_window=routing.stats_window,
+        retry_after_sec=routing.retry_after_sec,
+    )
+
+
+class HedgedAsyncJsonRpcClient:
+    # Drop-in for AsyncJsonRpcClient that spreads calls over every endpoint of one chain.
+    def __init__(
+        self,
+        pool: EndpointPool,
+        max_connections: int = 16,
+        max_in_flight: int = 64,
+        request_timeout: float = 10.0,
+    ) -> None:
+        self.pool = pool
+        self.rpc_url = pool.endpoints[0].url
+        self._clients = {
+            endpoint.url: AsyncJsonRpcClient(
+                endpoint.url,
+                max_connections=max_connections,
+                max_in_flight=max_in_flight,
+                request_timeout=request_timeout,
+            )
+            for endpoint in pool.endpoints
+        }
+        self._verified: asyncio.Task | None = None
+
+    async def call(self, method: str, params: list[Any]) -> Any:
+        calls = [(method, params)]
+
+        async def send(client: AsyncJsonRpcClient) -> list[Any]:
+            try:
+                return [await client.call(method, params)]
+            except JsonRpcError as exc:
+                return [exc]
+
+        (result,) = await self._route(send, calls)
+        if isinstance(result, JsonRpcError):
+            raise result
+        return result
+
+    async def call_batch(self, calls: list[tuple[str, list[Any]]]) -> list[Any | JsonRpcError]:
+        if not calls:
+            return []
+        return await self._route(lambda client: client.call_batch(calls), calls)
+
+    async def aclose(self) -> None:
+        await asyncio.gather(*(client.aclose() for client in self._clients.values()))
+
+    async def _verify_chain_ids(self) -> None:
+        async def verify(endpoint: EndpointStats) -> None:
+            try:
+                chain_id = int(await self._clients[endpoint.url].call("eth_chainId", []), 16)
+            except Exception as exc:
+                self.pool.record_failure(endpoint, None, f"eth_chainId failed: {exc}")
+                return
+            self.pool.observe_chain_id(endpoint, chain_id)
+
+        await asyncio.gather(*(verify(endpoint) for endpoint in self.pool.endpoints))
+
+    async def _attempt(
+        self,
+        endpoint: EndpointStats,
+        send: Callable[[AsyncJsonRpcClient], Awaitable[list[Any]]],
+        calls: list[tuple[str, list[Any]]],
+    ) -> list[Any]:
+        start = time.perf_counter()
+        try:
+            results = await send(self._clients[endpoint.url])
+        except Exception as exc:
+            code = exc.code if isinstance(exc, JsonRpcError) else None
+            if isinstance(exc, JsonRpcError) and not is_retryable_error(code, str(exc)):
+                self.pool.record_success(endpoint, time.perf_counter() - start)
+                raise
+            self.pool.record_failure(endpoint, time.perf_counter() - start, str(exc))
+            raise EndpointError(f"{endpoint.url}: {exc}") from exc
+        problem = self.pool.check_response(endpoint, calls, results)
+        if problem:
+            self.pool.record_failure(endpoint, time.perf_counter() - start, problem)
+            raise EndpointError(f"{endpoint.url}: {problem}")
+        self.pool.record_success(endpoint, time.perf_counter() - start)
+        return results
+
+    async def _route(
+        self,
+        send: Callable[[AsyncJsonRpcClient], Awaitable[list[Any]]],
+        calls: list[tuple[str, list[Any]]],
+    ) -> list[Any]:
+        if self._verified is None:
+            self._verified = asyncio.ensure_future(self._verify_chain_ids())
+        await asyncio.shield(self._verified)
+
+        candidates = self.pool.ranked()
+        if not candidates:
+            raise EndpointError(f"{self.pool.chain}: no usable RPC endpoint")
+        started: dict[asyncio.Task, tuple[EndpointStats, float]] = {}
+        pending: set[asyncio.Task] = set()
+        errors: list[str] = []
+        hedged = False
+
+        def launch() -> None:
+            endpoint = candidates[len(started)]
+            task = asyncio.ensure_future(self._attempt(endpoint, send, calls))
+            started[task] = (endpoint, time.perf_counter())
+            pending.add(task)
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if not hedged and len(started) < len(candidates):
+                    timeout = self.pool.hedge_delay(candidates[len(started) - 1])
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # The first endpoint is slower than its own recent p95: race a second one.
+                    hedged = True
+                    HEDGED_REQUESTS.inc(self.pool.chain)
+                    launch()
+                    continue
+                for task in done:
+                    pending.discard(task)
+                    try:
+                        return task.result()
+                    except EndpointError as exc:
+                        errors.append(str(exc))
+                if not pending and len(started) < len(candidates):
+                    launch()
+            raise EndpointError(f"{self.pool.chain}: every endpoint failed: {'; '.join(errors)}")
+        finally:
+            for task in pending:
+                task.cancel()
+                endpoint, start = started[task]
+                if endpoint is candidates[0]:
+                    self.pool.record_abandoned(endpoint, time.perf_counter() - start)
+
+
+class HedgedHTTPProvider(BaseProvider):
+    # web3 provider with the same routing for the synchronous readers; hedges run on a thread pool.
+    def __init__(self, pool: EndpointPool, request_timeout: int = 10, max_workers: int = 32) -> None:
+        super().__init__()
+        self.pool = pool
+        self._providers = {
+            endpoint.url: HTTPProvider(endpoint_uri=endpoint.url, request_kwargs={"timeout": request_timeout})
+            for endpoint in pool.endpoints
+        }
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"rpc-{pool.chain}")
+        self._verify_lock = threading.Lock()
+        self._verified = False
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return any(provider.is_connected(show_traceback) for provider in self._providers.values())
+
+    def close(self) -> None:
+        # Losing hedges still running are left to finish; nothing new is started.
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _verify_chain_ids(self) -> None:
+        with self._verify_lock:
+            if self._verified:
+                return
+            for endpoint in self.pool.endpoints:
+                try:
+                    response = self._providers[endpoint.url].make_request("eth_chainId", [])
+                    self.pool.observe_chain_id(endpoint, int(response["result"], 16))
+                except Exception as exc:
+                    self.pool.record_failure(endpoint, None, f"eth_chainId failed: {exc}")
+            self._verified = True
+
+    def _attempt(self, endpoint: EndpointStats, method: str, params: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            response = self._providers[endpoint.url].make_request(method, params)
+        except Exception as exc:
+            self.pool.record_failure(endpoint, time.perf_counter() - start, str(exc))
+            raise EndpointError(f"{endpoint.url}: {exc}") from exc
+        error = response.get("error")
+        result: Any = response.get("result")
+        if error is not None:
+            code = error.get("code") if isinstance(error, dict) else None
+            result = JsonRpcError(str(error), code)
+        problem = self.pool.check_response(endpoint, [(method, params)], [result])
+        if problem:
+            self.pool.record_failure(endpoint, time.perf_counter() - start, problem)
+            raise EndpointError(f"{endpoint.url}: {problem}")
+        self.pool.record_success(endpoint, time.perf_counter() - start)
+        return response
+
+    def make_request(self, method, params):
+        if not self._verified:
+            self._verify_chain_ids()
+        candidates = self.pool.ranked()
+        if not candidates:
+            raise EndpointError(f"{self.pool.chain}: no usable RPC endpoint")
+        started: dict[Future, tuple[EndpointStats, float]] = {}
+        pending: set[Future] = set()
+        errors: list[str] = []
+        hedged = False
+
+        def launch() -> None:
+            endpoint = candidates[len(started)]
+            future = self._executor.submit(self._attempt, endpoint, method, params)
+            started[future] = (endpoint, time.perf_counter())
+            pending.add(future)
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if not hedged and len(started) < len(candidates):
+                    timeout = self.pool.hedge_delay(candidates[len(started) - 1])
+                done, _ = wait_futures(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    HEDGED_REQUESTS.inc(self.pool.chain)
+                    launch()
+                    continue
+                for future in done:
+                    pending.discard(future)
+                    try:
+                        return future.result()
+                    except EndpointError as exc:
+                        errors.append(str(exc))
+                if not pending and len(started) < len(candidates):
+                    launch()
+            raise EndpointError(f"{self.pool.chain}: every endpoint failed: {'; '.join(errors)}")
+        finally:
+            # Threads cannot be interrupted: a losing request finishes in the background, records its
+            # real latency and is otherwise ignored.
+            for future in pending:
+                future.cancel()
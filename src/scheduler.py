@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from src.collector import SnapshotCollector
+from src.config import V2PoolConfig
+from src.price_types import PriceSnapshot
+
+# Starting guesses; replaced by the observed block interval after a few polls.
+DEFAULT_BLOCK_TIME_SEC = {
+    "ethereum": 12.0,
+    "bsc": 3.0,
+    "polygon": 2.0,
+    "avalanche": 2.0,
+    "arbitrum": 0.25,
+    "base": 2.0,
+}
+
+# Below this change rate a chain is treated as idle rather than slowed further.
+_MIN_ACTIVITY = 0.1
+# After a failed poll the previous prices are served only while they are this many intervals old.
+_STALE_POLL_INTERVALS = 3
+_MIN_STALE_SEC = 2.0
+
+
+@dataclass
+class ChainPollState:
+    chain: str
+    block_interval_sec: float
+    change_rate: float = 1.0
+    interval_sec: float = 0.0
+    # Floor that keeps this chain's polls within its RPC budget.
+    min_interval_sec: float = 0.0
+    last_head: int | None = None
+    last_head_at: float | None = None
+    last_prices: dict[str, float] = field(default_factory=dict)
+    collected_at: float | None = None
+    snapshots: list[PriceSnapshot] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+
+class AdaptivePollScheduler:
+    def __init__(
+        self,
+        collect: SnapshotCollector,
+        pools: list[V2PoolConfig],
+        min_interval_sec: float = 0.25,
+        max_interval_sec: float = 30.0,
+        rpc_budget_per_min: float = 120.0,
+        rpc_budgets_per_min: dict[str, float] | None = None,
+        rpc_calls_per_poll: Callable[[list[V2PoolConfig]], int] | None = None,
+        smoothing: float = 0.2,
+    ) -> None:
+        # Budgets are JSON-RPC calls per minute for each chain; rpc_calls_per_poll says what
+        # one poll of a chain's pools costs (one call when not given).
+        self.collect = collect
+        self.min_interval_sec = min_interval_sec
+        self.max_interval_sec = max_interval_sec
+        self.smoothing = smoothing
+        self.pools_by_chain: dict[str, list[V2PoolConfig]] = {}
+        for pool in pools:
+            self.pools_by_chain.setdefault(pool.chain, []).append(pool)
+        self.states: dict[str, ChainPollState] = {}
+        for chain, chain_pools in self.pools_by_chain.items():
+            budget = (rpc_budgets_per_min or {}).get(chain, rpc_budget_per_min)
+            calls = rpc_calls_per_poll(chain_pools) if rpc_calls_per_poll is not None else 1
+            self.states[chain] = ChainPollState(
+                chain=chain,
+                block_interval_sec=DEFAULT_BLOCK_TIME_SEC.get(chain, 2.0),
+                min_interval_sec=max(min_interval_sec, 60.0 * calls / budget if budget > 0 else 0.0),
+            )
+        self._updated = asyncio.Event()
+        self._dirty: set[str] = set()
+
+    def snapshots(self) -> tuple[list[PriceSnapshot], list[str]]:
+        snapshots: list[PriceSnapshot] = []
+        errors: list[str] = []
+        for state in self.states.values():
+            snapshots.extend(state.snapshots)
+            errors.extend(state.errors)
+        return snapshots, errors
+
+    async def wait_for_update(self) -> set[str]:
+        # Returns the chains that produced new data since the previous call.
+        await self._updated.wait()
+        self._updated.clear()
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    async def run(self) -> None:
+        await asyncio.gather(*(self._poll_chain(chain) for chain in self.states))
+
+    async def _poll_chain(self, chain: str) -> None:
+        state = self.states[chain]
+        pools = self.pools_by_chain[chain]
+        while True:
+            started = time.monotonic()
+            try:
+                snapshots, errors = await self.collect(pools)
+                state.collected_at = time.monotonic()
+            except Exception as exc:
+                snapshots, errors = self._last_good(state, time.monotonic()), [f"{chain} poll failed error={exc}"]
+            changed = self._observe(state, snapshots, time.monotonic())
+            state.snapshots = snapshots
+            state.errors = errors
+            if changed or errors:
+                self._dirty.add(chain)
+                self._updated.set()
+
+            state.interval_sec = self._next_interval(state)
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(0.0, state.interval_sec - elapsed))
+
+    def _last_good(self, state: ChainPollState, now: float) -> list[PriceSnapshot]:
+        # A failing chain must not keep serving its last prices as current ones.
+        max_age_sec = max(_MIN_STALE_SEC, _STALE_POLL_INTERVALS * state.interval_sec)
+        if state.collected_at is None or now - state.collected_at > max_age_sec:
+            return []
+        return state.snapshots
+
+    def _observe(self, state: ChainPollState, snapshots: list[PriceSnapshot], now: float) -> bool:
+        alpha = self.smoothing
+        if snapshots:
+            head = max(s.block_number for s in snapshots)
+            if state.last_head is not None and state.last_head_at is not None and head > state.last_head:
+                sample = (now - state.last_head_at) / (head - state.last_head)
+                state.block_interval_sec += alpha * (sample - state.block_interval_sec)
+            if state.last_head is None or head > state.last_head:
+                state.last_head = head
+                state.last_head_at = now
+
+        prices = {s.pool_address: s.price_token1_per_token0 for s in snapshots}
+        changed = sum(1 for key, price in prices.items() if state.last_prices.get(key) != price)
+        if prices:
+            state.change_rate += alpha * (changed / len(prices) - state.change_rate)
+        state.last_prices = prices
+        return changed > 0
+
+    def _next_interval(self, state: ChainPollState) -> float:
+        # Poll once per block while pools keep moving; back off as they go quiet.
+        # The budget floor wins over max_interval_sec when the two conflict.
+        interval = state.block_interval_sec / max(state.change_rate, _MIN_ACTIVITY)
+        return max(min(interval, self.max_interval_sec), state.min_interval_sec)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Single-producer / single-consumer ring of fixed-width records in shared memory.
+# A record is valid while its seq field equals its 1-based sequence number: the producer
+# zeroes seq, writes the payload, then stores seq, so the consumer rejects torn reads by
+# checking seq both in its copy and in the live slot after copying.
+
+ERROR_TEXT_BYTES = 120
+
+SNAPSHOT_RECORD = np.dtype(
+    [
+        ("seq", "<u8"),
+        ("pool_index", "<u4"),
+        ("status", "u1"),
+        ("block_number", "<u8"),
+        ("reserve0", "<f8"),
+        ("reserve1", "<f8"),
+        ("price", "<f8"),
+        ("latency_ms", "<f8"),
+        ("timestamp_ns", "<i8"),
+        ("error", f"S{ERROR_TEXT_BYTES}"),
+    ]
+)
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+# write_seq, heartbeat_ns, cycles, pid; padded to a cache line ahead of the records.
+_HEADER_FIELDS = 4
+_HEADER_BYTES = 64
+WRITE_SEQ, HEARTBEAT_NS, CYCLES, PID = range(_HEADER_FIELDS)
+
+
+class ShmRing:
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int, owner: bool) -> None:
+        self.shm = shm
+        self.capacity = capacity
+        self.owner = owner
+        self.header = np.ndarray((_HEADER_FIELDS,), dtype="<i8", buffer=shm.buf)
+        self.records = np.ndarray((capacity,), dtype=SNAPSHOT_RECORD, buffer=shm.buf, offset=_HEADER_BYTES)
+        self.read_seq = int(self.header[WRITE_SEQ])
+        self.dropped = 0
+
+    @classmethod
+    def create(cls, capacity: int) -> ShmRing:
+        size = _HEADER_BYTES + capacity * SNAPSHOT_RECORD.itemsize
+        ring = cls(shared_memory.SharedMemory(create=True, size=size), capacity, owner=True)
+        ring.header[:] = 0
+        ring.records["seq"] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name: str, capacity: int) -> ShmRing:
+        return cls(shared_memory.SharedMemory(name=name), capacity, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, rows: np.ndarray) -> None:
+        # Producer side. Batches larger than the ring keep only their newest rows; the sequence
+        # still advances past the skipped ones so the consumer counts them as dropped.
+        skipped = max(0, len(rows) - self.capacity)
+        rows = rows[skipped:]
+        start = int(self.header[WRITE_SEQ]) + skipped
+        seqs = np.arange(start + 1, start + len(rows) + 1, dtype=np.uint64)
+        slots = (seqs - 1) % self.capacity
+        self.records["seq"][slots] = 0
+        rows = rows.copy()
+        rows["seq"] = 0
+        self.records[slots] = rows
+        self.records["seq"][slots] = seqs
+        self.header[WRITE_SEQ] = start + len(rows)
+
+    def heartbeat(self, now_ns: int, pid: int) -> None:
+        self.header[HEARTBEAT_NS] = now_ns
+        self.header[CYCLES] += 1
+        self.header[PID] = pid
+
+    def read(self) -> np.ndarray:
+        # Consumer side: everything written since the last read that was not overwritten meanwhile.
+        end = int(self.header[WRITE_SEQ])
+        start = self.read_seq
+        if end - start > self.capacity:
+            self.dropped += end - start - self.capacity
+            start = end - self.capacity
+        self.read_seq = end
+        if end <= start:
+            return self.records[:0].copy()
+        seqs = np.arange(start + 1, end + 1, dtype=np.uint64)
+        slots = (seqs - 1) % self.capacity
+        rows = self.records[slots]
+        valid = (rows["seq"] == seqs) & (self.records["seq"][slots] == seqs)
+        if not valid.all():
+            self.dropped += int((~valid).sum())
+            rows = rows[valid]
+        return rows
+
+    def close(self) -> None:
+        # Views must go before the mapping can be closed.
+        del self.header, self.records
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import numpy as np
+
+from src.config import ArbitrageConfig
+from src.price_types import ArbitrageOpportunity, FeeBreakdown, PriceSnapshot, SizedOpportunity
+from src.ratio_vectorized import build_fee_matrix, cross_chain_pairs, flatten_venues, group_pair_venues
+
+
+def optimal_input(
+    buy_reserve_in: np.ndarray,
+    buy_reserve_out: np.ndarray,
+    sell_reserve_in: np.ndarray,
+    sell_reserve_out: np.ndarray,
+    fee_factor: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    # Two constant-product swaps compose to out(x) = K*x / (M + N*x), with
+    #   K = g^2 * Rb_out * Rs_out, M = Rb_in * Rs_in, N = g * (Rs_in + g * Rb_out).
+    # d/dx (out(x) - x) = 0 gives x* = (sqrt(K*M) - M) / N, positive only when K > M.
+    g = fee_factor
+    k = g * g * buy_reserve_out * sell_reserve_out
+    m = buy_reserve_in * sell_reserve_in
+    n = g * (sell_reserve_in + g * buy_reserve_out)
+    x = np.maximum((np.sqrt(k * m) - m) / n, 0.0)
+    return x, k * x / (m + n * x)
+
+
+def is_sizable(snapshot: PriceSnapshot, usd_quote_symbols: tuple[str, ...]) -> bool:
+    # Profit comes out in token1, and fees are in USD: only USD-quoted pools with known reserves
+    # can be sized without a separate price source.
+    return (
+        snapshot.reserve0 > 0
+        and snapshot.reserve1 > 0
+        and snapshot.pair_key.rsplit("/", 1)[-1].upper() in usd_quote_symbols
+    )
+
+
+def size_opportunities(
+    snapshots: list[PriceSnapshot],
+    cfg: ArbitrageConfig,
+    route_fees: dict[tuple[str, str], FeeBreakdown],
+    usd_quote_symbols: tuple[str, ...] = ("USD", "USDC", "USDT", "DAI"),
+) -> list[SizedOpportunity]:
+    # Volumes and amounts are in token1, which is worth one dollar, so profits compare with USD fees.
+    chain_index: dict[str, int] = {}
+    snapshots = [snapshot for snapshot in snapshots if is_sizable(snapshot, usd_quote_symbols)]
+    venues_by_pair = group_pair_venues(snapshots, chain_index)
+    flat, offsets = flatten_venues(venues_by_pair)
+    # The DEX fee lives in the swap math here, so only gas and bridge costs are charged on top.
+    fixed_fees = build_fee_matrix(route_fees, chain_index, exclude_dex_fee=True)
+    reserve0 = np.fromiter((s.reserve0 for s in flat), dtype=np.float64, count=len(flat))
+    reserve1 = np.fromiter((s.reserve1 for s in flat), dtype=np.float64, count=len(flat))
+
+    buy_parts: list[np.ndarray] = []
+    sell_parts: list[np.ndarray] = []
+    for venues, offset in zip(venues_by_pair, offsets, strict=True):
+        rows, cols = cross_chain_pairs(venues)
+        a_is_higher = venues.prices[rows] > venues.prices[cols]
+        buy_parts.append(np.where(a_is_higher, cols, rows) + offset)
+        sell_parts.append(np.where(a_is_higher, rows, cols) + offset)
+    if not buy_parts:
+        return []
+    buy = np.concatenate(buy_parts)
+    sell = np.concatenate(sell_parts)
+    chain_ids = np.fromiter((chain_index[s.chain] for s in flat), dtype=np.int64, count=len(flat))
+    fees = fixed_fees[chain_ids[buy], chain_ids[sell]]
+
+    # Buy token0 with token1 on the cheap pool, sell it back for token1 on the expensive one.
+    usable = ~np.isnan(fees)
+    buy, sell, fees = buy[usable], sell[usable], fees[usable]
+    fee_factor = 1.0 - cfg.dex_fee_bps_per_swap / 10_000
+    volume, amount_out = optimal_input(reserve1[buy], reserve0[buy], reserve0[sell], reserve1[sell], fee_factor)
+    gross_profit = amount_out - volume
+    net_profit = gross_profit - fees
+    safe_volume = np.where(volume > 0, volume, 1.0)
+
+    keep = (
+        (volume > 0)
+        & (net_profit > 0)
+        & (net_profit >= cfg.min_net_profit)
+        & ((net_profit / safe_volume) * 100 >= cfg.min_net_profit_pct)
+    )
+    order = np.flatnonzero(keep)
+    order = order[np.argsort(-net_profit[order], kind="stable")]
+
+    sized: list[SizedOpportunity] = []
+    for buy_index, sell_index, x, out, gross, fee, net in zip(
+        buy[order].tolist(),
+        sell[order].tolist(),
+        volume[order].tolist(),
+        amount_out[order].tolist(),
+        gross_profit[order].tolist(),
+        fees[order].tolist(),
+        net_profit[order].tolist(),
+    ):
+        lower = flat[buy_index]
+        higher = flat[sell_index]
+        sized.append(
+            SizedOpportunity(
+                timestamp=max(lower.timestamp, higher.timestamp),
+                pair_key=lower.pair_key,
+                buy_chain=lower.chain,
+                sell_chain=higher.chain,
+                buy_pool=lower.pool_address,
+                sell_pool=higher.pool_address,
+                optimal_volume=x,
+                amount_out=out,
+                gross_profit=gross,
+                fees=fee,
+                net_profit=net,
+            )
+        )
+    return sized
+
+
+def filter_by_sizing(
+    opportunities: list[ArbitrageOpportunity],
+    snapshots: list[PriceSnapshot],
+    sized: list[SizedOpportunity],
+    usd_quote_symbols: tuple[str, ...] = ("USD", "USDC", "USDT", "DAI"),
+) -> list[ArbitrageOpportunity]:
+    # Drops opportunities that sizing could judge but found no profitable size for once price impact
+    # is counted. `sized` must be the full sizing result, not a top-K slice.
+    sizable = {(s.chain, s.pool_address) for s in snapshots if is_sizable(s, usd_quote_symbols)}
+    profitable = {(o.buy_chain, o.buy_pool, o.sell_chain, o.sell_pool) for o in sized}
+    return [
+        opp
+        for opp in opportunities
+        if (opp.buy_chain, opp.buy_pool) not in sizable
+        or (opp.sell_chain, opp.sell_pool) not in sizable
+        or (opp.buy_chain, opp.buy_pool, opp.sell_chain, opp.sell_pool) in profitable
+    ]
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+from src.price_types import ArbitrageOpportunity, SpreadSignal
+
+# Streaming statistics per venue pair (pair_key, (chain_a, pool_a), (chain_b, pool_b)), stored as
+# preallocated numpy columns indexed by a route slot. Each pool pair keeps its own history, so a
+# z-score always describes the spread it is reported or judged against. Memory is fixed by
+# max_routes x window whatever the runtime; the least recently updated route gives up its slot
+# when a new one arrives and the table is full.
+#
+# Routes are stored with venues in sorted order and the observation is the log spread
+# 100 * ln(price_a / price_b), which simply changes sign when the orientation flips.
+
+# (chain, pool_address)
+Venue = tuple[str, str]
+# (pair_key, venue_a, venue_b)
+RouteKey = tuple[str, Venue, Venue]
+
+_LN2 = math.log(2.0)
+
+
+def _simple_pct(log_pct: float) -> float:
+    # Levels are reported like SpreadSignal.spread_pct; deviations stay in log-percent units.
+    return 100.0 * math.expm1(log_pct / 100.0)
+
+
+@dataclass(frozen=True)
+class SpreadStats:
+    pair_key: str
+    chain_a: str
+    pool_a: str
+    chain_b: str
+    pool_b: str
+    samples: int
+    last_pct: float
+    mean_pct: float
+    std_pct: float
+    z_score: float
+    # Mean-reversion half-life from an AR(1) fit of deviations; inf when no reversion is seen.
+    half_life_sec: float
+    window_mean_pct: float
+    window_std_pct: float
+
+
+class SpreadStatsTracker:
+    def __init__(
+        self,
+        halflife_sec: float = 300.0,
+        window: int = 128,
+        max_routes: int = 4096,
+        min_samples: int = 30,
+    ) -> None:
+        self.halflife_sec = halflife_sec
+        self.window = window
+        self.max_routes = max_routes
+        self.min_samples = min_samples
+        self.evicted = 0
+        self._slots: OrderedDict[RouteKey, int] = OrderedDict()
+        self._free = list(range(max_routes - 1, -1, -1))
+        self.count = np.zeros(max_routes, dtype=np.int64)
+        self.last_t = np.zeros(max_routes)
+        self.last_x = np.zeros(max_routes)
+        self.mean = np.zeros(max_routes)
+        self.var = np.zeros(max_routes)
+        self.z = np.full(max_routes, np.nan)
+        # EWMA of lag-1 deviation products, of squared lagged deviations, and of sample spacing.
+        self.ar_cov = np.zeros(max_routes)
+        self.ar_var = np.zeros(max_routes)
+        self.mean_dt = np.zeros(max_routes)
+        self.ring = np.zeros((max_routes, window))
+        self.window_sum = np.zeros(max_routes)
+        self.window_sumsq = np.zeros(max_routes)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _slot(self, key: RouteKey) -> int:
+        slot = self._slots.get(key)
+        if slot is not None:
+            self._slots.move_to_end(key)
+            return slot
+        if self._free:
+            slot = self._free.pop()
+        else:
+            _, slot = self._slots.popitem(last=False)
+            self.evicted += 1
+        self._slots[key] = slot
+        self.count[slot] = 0
+        self.z[slot] = np.nan
+        self.ar_cov[slot] = self.ar_var[slot] = self.mean_dt[slot] = 0.0
+        self.window_sum[slot] = self.window_sumsq[slot] = 0.0
+        return slot
+
+    def update(self, spreads: Iterable[SpreadSignal]) -> None:
+        # One observation per venue pair and timestamp.
+        observations: dict[RouteKey, tuple[float, float]] = {}
+        for spread in spreads:
+            venue_a, venue_b = (spread.chain_a, spread.pool_a), (spread.chain_b, spread.pool_b)
+            if venue_a <= venue_b:
+                key = (spread.pair_key, venue_a, venue_b)
+                ratio = spread.ratio_a_over_b
+            else:
+                key = (spread.pair_key, venue_b, venue_a)
+                ratio = 1.0 / spread.ratio_a_over_b if spread.ratio_a_over_b else 0.0
+            if key in observations or ratio <= 0:
+                continue
+            observations[key] = (100.0 * math.log(ratio), spread.timestamp.timestamp())
+            # More routes than slots in one batch would evict routes of this same batch.
+            if len(observations) == self.max_routes:
+                break
+        if not observations:
+            return
+
+        slots = np.fromiter((self._slot(key) for key in observations), dtype=np.int64, count=len(observations))
+        x = np.fromiter((value for value, _ in observations.values()), dtype=float, count=len(slots))
+        t = np.fromiter((ts for _, ts in observations.values()), dtype=float, count=len(slots))
+
+        count = self.count[slots]
+        fresh = count == 0
+        dt = t - self.last_t[slots]
+        # Re-reads of an unchanged snapshot carry no new information.
+        keep = fresh | (dt > 0)
+        slots, x, t, dt, count, fresh = slots[keep], x[keep], t[keep], dt[keep], count[keep], fresh[keep]
+
+        mean, var = self.mean[slots], self.var[slots]
+        # Time-decayed weight: irregular polling intervals are weighted by elapsed time.
+        alpha = np.where(fresh, 1.0, -np.expm1(-np.where(fresh, 0.0, dt) * _LN2 / self.halflife_sec))
+        std = np.sqrt(var)
+        warm = (count >= self.min_samples) & (std > 0)
+        self.z[slots] = np.where(warm, (x - mean) / np.where(warm, std, 1.0), np.nan)
+
+        diff = x - mean
+        new_mean = np.where(fresh, x, mean + alpha * diff)
+        new_var = np.where(fresh, 0.0, (1.0 - alpha) * (var + alpha * diff * diff))
+        d_prev = self.last_x[slots] - mean
+        d_cur = x - new_mean
+        lagged = ~fresh
+        self.ar_cov[slots] += np.where(lagged, alpha * (d_prev * d_cur - self.ar_cov[slots]), 0.0)
+        self.ar_var[slots] += np.where(lagged, alpha * (d_prev * d_prev - self.ar_var[slots]), 0.0)
+        self.mean_dt[slots] = np.where(
+            count <= 1, np.where(fresh, 0.0, dt), self.mean_dt[slots] + alpha * (dt - self.mean_dt[slots])
+        )
+        self.mean[slots] = new_mean
+        self.var[slots] = new_var
+
+        position = count % self.window
+        evicted = np.where(count >= self.window, self.ring[slots, position], 0.0)
+        self.ring[slots, position] = x
+        self.window_sum[slots] += x - evicted
+        self.window_sumsq[slots] += x * x - evicted * evicted
+        # Running sums drift in floating point; rebuild them once per lap of the ring.
+        lap = slots[(position == self.window - 1)]
+        if len(lap):
+            self.window_sum[lap] = self.ring[lap].sum(axis=1)
+            self.window_sumsq[lap] = (self.ring[lap] ** 2).sum(axis=1)
+
+        self.count[slots] = count + 1
+        self.last_x[slots] = x
+        self.last_t[slots] = t
+
+    def _oriented(self, pair_key: str, venue_a: Venue, venue_b: Venue) -> tuple[int, float] | None:
+        if venue_a <= venue_b:
+            slot = self._slots.get((pair_key, venue_a, venue_b))
+            sign = 1.0
+        else:
+            slot = self._slots.get((pair_key, venue_b, venue_a))
+            sign = -1.0
+        return None if slot is None else (slot, sign)
+
+    def z_score(self, pair_key: str, venue_a: Venue, venue_b: Venue) -> float | None:
+        # z of the latest spread of venue_a over venue_b against the history before it.
+        found = self._oriented(pair_key, venue_a, venue_b)
+        if found is None:
+            return None
+        slot, sign = found
+        z = float(self.z[slot])
+        return None if math.isnan(z) else sign * z
+
+    def stats(self, pair_key: str, venue_a: Venue, venue_b: Venue) -> SpreadStats | None:
+        found = self._oriented(pair_key, venue_a, venue_b)
+        if found is None:
+            return None
+        slot, sign = found
+        samples = int(self.count[slot])
+        n = min(samples, self.window)
+        window_mean = float(self.window_sum[slot]) / n
+        window_var = max(0.0, float(self.window_sumsq[slot]) / n - window_mean * window_mean)
+        ar_var = float(self.ar_var[slot])
+        phi = float(self.ar_cov[slot]) / ar_var if ar_var > 0 else 0.0
+        half_life = -_LN2 / math.log(phi) * float(self.mean_dt[slot]) if 0.0 < phi < 1.0 else math.inf
+        z = float(self.z[slot])
+        return SpreadStats(
+            pair_key=pair_key,
+            chain_a=venue_a[0],
+            pool_a=venue_a[1],
+            chain_b=venue_b[0],
+            pool_b=venue_b[1],
+            samples=samples,
+            last_pct=_simple_pct(sign * float(self.last_x[slot])),
+            mean_pct=_simple_pct(sign * float(self.mean[slot])),
+            std_pct=math.sqrt(float(self.var[slot])),
+            z_score=sign * z,
+            half_life_sec=half_life,
+            window_mean_pct=_simple_pct(sign * window_mean),
+            window_std_pct=math.sqrt(window_var),
+        )
+
+    def filter_opportunities(
+        self,
+        opportunities: list[ArbitrageOpportunity],
+        min_z: float,
+    ) -> list[ArbitrageOpportunity]:
+        # Keeps opportunities whose sell-over-buy spread is at least min_z deviations wider than
+        # usual, dropping persistent structural basis. Routes still warming up are kept.
+        kept: list[ArbitrageOpportunity] = []
+        for opp in opportunities:
+            z = self.z_score(opp.pair_key, (opp.sell_chain, opp.sell_pool), (opp.buy_chain, opp.buy_pool))
+            if z is None or z >= min_z:
+                kept.append(opp)
+        return kept
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+
+from web3 import Web3
+
+from src.config import V2PoolConfig
+from src.dex_uniswap_v2 import MulticallV2ReserveReader, snapshot_from_reserves
+from src.metrics import track
+from src.multicall import chunked
+from src.price_types import PriceSnapshot
+
+# keccak("Sync(uint112,uint112)")
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+
+# Seeded reserves sort before any Sync log of the same block.
+_SEED_LOG_INDEX = -1
+
+
+@dataclass
+class _PoolState:
+    pool: V2PoolConfig
+    snapshot: PriceSnapshot
+    # Raw reserves behind `snapshot`, used to tell whether a new snapshot is needed.
+    emitted: tuple[int, int]
+    # (block_number, log_index, reserve0, reserve1), sorted; only the reorg window is kept.
+    history: list[tuple[int, int, int, int]] = field(default_factory=list)
+
+    @property
+    def reserves(self) -> tuple[int, int]:
+        _, _, reserve0, reserve1 = self.history[-1]
+        return reserve0, reserve1
+
+
+class SyncEventReserveTracker:
+    def __init__(
+        self,
+        chain_web3: dict[str, Web3],
+        seed_reader: MulticallV2ReserveReader,
+        confirmation_depth: int = 12,
+        max_block_range: int = 2_000,
+        max_addresses_per_query: int = 500,
+    ) -> None:
+        self.chain_web3 = chain_web3
+        self.seed_reader = seed_reader
+        self.confirmation_depth = confirmation_depth
+        self.max_block_range = max_block_range
+        self.max_addresses_per_query = max_addresses_per_query
+        self._states: dict[str, dict[str, _PoolState]] = {}
+        self._last_head: dict[str, int] = {}
+
+    def fetch_chain_snapshots(
+        self,
+        chain: str,
+        pools: list[V2PoolConfig],
+    ) -> list[PriceSnapshot | Exception]:
+        start = time.perf_counter()
+        w3 = self.chain_web3[chain]
+        states = self._states.setdefault(chain, {})
+        with track("rpc_block_number", chain):
+            head = w3.eth.block_number
+        last_head = self._last_head.get(chain)
+
+        errors: dict[str, Exception] = {}
+        too_far = last_head is None or head - last_head > self.max_block_range
+        deep_reorg = last_head is not None and head < last_head - self.confirmation_depth
+        if too_far or deep_reorg:
+            # A full read is cheaper than walking a long log range, and it resets all state.
+            states.clear()
+        else:
+            from_block = max(min(last_head, head) - self.confirmation_depth + 1, 0)
+            tracked = [pool for pool in pools if pool.pool_address.lower() in states]
+            self._apply_sync_logs(w3, states, tracked, from_block, head)
+            self._prune_history(states, head)
+
+        unseeded = [pool for pool in pools if pool.pool_address.lower() not in states]
+        if unseeded:
+            errors.update(self._seed(chain, states, unseeded))
+        self._last_head[chain] = head
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        # Unchanged pools return the same snapshot, block included, so downstream change
+        # detection (IncrementalOpportunityAnalyzer) skips them without extra bookkeeping.
+        results: list[PriceSnapshot | Exception] = []
+        for pool in pools:
+            key = pool.pool_address.lower()
+            if key in errors:
+                results.append(errors[key])
+                continue
+            state = states[key]
+            reserve0, reserve1 = state.reserves
+            if (reserve0, reserve1) != state.emitted:
+                try:
+                    state.snapshot = snapshot_from_reserves(pool, reserve0, reserve1, head, latency_ms)
+                except ValueError as exc:
+                    results.append(exc)
+                    continue
+                state.emitted = (reserve0, reserve1)
+            results.append(state.snapshot)
+        return results
+
+    def _seed(
+        self,
+        chain: str,
+        states: dict[str, _PoolState],
+        pools: list[V2PoolConfig],
+    ) -> dict[str, Exception]:
+        errors: dict[str, Exception] = {}
+        reads = self.seed_reader.fetch_chain_reserves(chain, pools)
+        for pool, read in zip(pools, reads, strict=True):
+            key = pool.pool_address.lower()
+            if isinstance(read, Exception):
+                errors[key] = read
+                continue
+            try:
+                snapshot = snapshot_from_reserves(
+                    pool, read.reserve0, read.reserve1, read.block_number, read.latency_ms
+                )
+            except ValueError as exc:
+                errors[key] = exc
+                continue
+            states[key] = _PoolState(
+                pool=pool,
+                snapshot=snapshot,
+                emitted=(read.reserve0, read.reserve1),
+                history=[(read.block_number, _SEED_LOG_INDEX, read.reserve0, read.reserve1)],
+            )
+        return errors
+
+    def _apply_sync_logs(
+        self,
+        w3: Web3,
+        states: dict[str, _PoolState],
+        pools: list[V2PoolConfig],
+        from_block: int,
+        to_block: int,
+    ) -> None:
+        if not pools or from_block > to_block:
+            return
+
+        logs = []
+        for chunk in chunked(pools, self.max_addresses_per_query):
+            with track("rpc_get_logs", pools[0].chain):
+                logs.extend(
+                    w3.eth.get_logs(
+                        {
+                            "fromBlock": from_block,
+                            "toBlock": to_block,
+                            "address": [pool.checksum_address for pool in chunk],
+                            "topics": [SYNC_TOPIC],
+                        }
+                    )
+                )
+
+        # The window [from_block, to_block] is re-read in full, so any entries from it are
+        # replaced; logs dropped by a reorg disappear and their replacements are applied.
+        for pool in pools:
+            state = states[pool.pool_address.lower()]
+            state.history = [
+                entry
+                for entry in state.history
+                if entry[0] < from_block or entry[1] == _SEED_LOG_INDEX
+            ]
+
+        for log in logs:
+            if log.get("removed"):
+                continue
+            state = states.get(str(log["address"]).lower())
+            if state is None:
+                continue
+            data = bytes(log["data"])
+            reserve0 = int.from_bytes(data[0:32], "big")
+            reserve1 = int.from_bytes(data[32:64], "big")
+            state.history.append((int(log["blockNumber"]), int(log["logIndex"]), reserve0, reserve1))
+
+        for pool in pools:
+            states[pool.pool_address.lower()].history.sort()
+
+    def _prune_history(self, states: dict[str, _PoolState], head: int) -> None:
+        confirmed_block = head - self.confirmation_depth
+        for state in states.values():
+            # Keep the newest confirmed entry as the base plus everything still reorgable.
+            keep_from = 0
+            for index, entry in enumerate(state.history):
+                if entry[0] <= confirmed_block:
+                    keep_from = index
+            state.history = state.history[keep_from:]
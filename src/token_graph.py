@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import math
+from collections import deque
+
+from src.config import ArbitrageConfig
+from src.price_types import ArbitrageCycle, FeeBreakdown, PriceSnapshot
+
+# (chain, token symbol)
+TokenNode = tuple[str, str]
+# ("pool", chain, dex, pool_address, direction) or ("bridge", token, from_chain, to_chain)
+EdgeKey = tuple[str, ...]
+
+# Ignore cycles whose log-rate gain is below float noise.
+CYCLE_EPSILON = 1e-12
+
+
+class TokenGraph:
+    def __init__(self, cfg: ArbitrageConfig) -> None:
+        self.cfg = cfg
+        self.fee_factor = 1.0 - cfg.dex_fee_bps_per_swap / 10_000
+        self._node_ids: dict[TokenNode, int] = {}
+        self._nodes: list[TokenNode] = []
+        # out_edges[u][edge] = (v, weight); in_edges mirrors it for re-seeding invalidated nodes.
+        self._out_edges: list[dict[EdgeKey, tuple[int, float]]] = []
+        self._in_edges: list[dict[EdgeKey, int]] = []
+        self._dist: list[float] = []
+        self._parent: list[tuple[int, EdgeKey] | None] = []
+        self._children: list[set[int]] = []
+        self._dirty: set[int] = set()
+        self._gas_usd: dict[str, float] = {}
+        # chain -> pool edge base -> (u, v, price); lets a gas change re-weight the chain's pools.
+        self._pools_by_chain: dict[str, dict[EdgeKey, tuple[int, int, float]]] = {}
+        self._chains_by_token: dict[str, set[str]] = {}
+        self._bridge_fees: dict[tuple[str, str], float] = {}
+        self._cycles: dict[tuple[EdgeKey, ...], list[tuple[int, EdgeKey]]] = {}
+
+    def update_pool(self, snapshot: PriceSnapshot) -> None:
+        price = snapshot.price_token1_per_token0
+        if price <= 0:
+            return
+        token0, token1 = snapshot.pair_key.split("/", 1)
+        chain = snapshot.chain
+        u = self._node((chain, token0))
+        v = self._node((chain, token1))
+        base = ("pool", chain, snapshot.dex, snapshot.pool_address)
+        self._pools_by_chain.setdefault(chain, {})[base] = (u, v, price)
+        self._set_pool_edges(chain, base, u, v, price)
+        for token in (token0, token1):
+            chains = self._chains_by_token.setdefault(token, set())
+            if chain not in chains:
+                chains.add(chain)
+                self._refresh_bridges(token)
+
+    def update_route_fees(self, route_fees: dict[tuple[str, str], FeeBreakdown]) -> None:
+        # Every quote prices gas on both of its chains. Chains without a quote this cycle keep
+        # their last known gas rather than swapping for free.
+        gas_usd: dict[str, float] = {}
+        for (buy_chain, sell_chain), quote in route_fees.items():
+            gas_usd[buy_chain] = quote.gas_buy_usd
+            gas_usd[sell_chain] = quote.gas_sell_usd
+        for chain, gas in gas_usd.items():
+            if self._gas_usd.get(chain) == gas:
+                continue
+            self._gas_usd[chain] = gas
+            for base, (u, v, price) in self._pools_by_chain.get(chain, {}).items():
+                self._set_pool_edges(chain, base, u, v, price)
+        self._bridge_fees = {route: quote.bridge_fee_usd for route, quote in route_fees.items()}
+        for token in self._chains_by_token:
+            self._refresh_bridges(token)
+
+    def find_cycles(self) -> list[ArbitrageCycle]:
+        # Cycles found earlier are re-priced against current weights; SPFA only re-relaxes from
+        # nodes whose edges changed, so a quiet block costs almost nothing.
+        for key, cycle in list(self._cycles.items()):
+            if self._cycle_weight(cycle) >= -CYCLE_EPSILON:
+                del self._cycles[key]
+        seeds, self._dirty = self._dirty, set()
+        for cycle in self._relax(seeds):
+            self._cycles[tuple(edge for _, edge in cycle)] = cycle
+        return sorted(
+            (self._to_cycle(cycle) for cycle in self._cycles.values()),
+            key=lambda x: x.profit_pct,
+            reverse=True,
+        )
+
+    def _node(self, node: TokenNode) -> int:
+        node_id = self._node_ids.get(node)
+        if node_id is None:
+            node_id = len(self._nodes)
+            self._node_ids[node] = node_id
+            self._nodes.append(node)
+            self._out_edges.append({})
+            self._in_edges.append({})
+            # Distances start from a virtual source linked to every node with weight 0.
+            self._dist.append(0.0)
+            self._parent.append(None)
+            self._children.append(set())
+            self._dirty.add(node_id)
+        return node_id
+
+    def _set_pool_edges(self, chain: str, base: EdgeKey, u: int, v: int, price: float) -> None:
+        # Per-swap gas is charged as a fraction of the configured trade notional.
+        cost_factor = 1.0 - self._gas_usd.get(chain, 0.0) / self.cfg.volume
+        self._set_edge(u, v, base + ("0to1",), price * self.fee_factor * cost_factor)
+        self._set_edge(v, u, base + ("1to0",), self.fee_factor * cost_factor / price)
+
+    def _refresh_bridges(self, token: str) -> None:
+        chains = self._chains_by_token.get(token, set())
+        for from_chain in chains:
+            for to_chain in chains:
+                if from_chain == to_chain:
+                    continue
+                u = self._node((from_chain, token))
+                v = self._node((to_chain, token))
+                edge = ("bridge", token, from_chain, to_chain)
+                fee = self._bridge_fees.get((from_chain, to_chain))
+                rate = 1.0 - fee / self.cfg.volume if fee is not None else 0.0
+                self._set_edge(u, v, edge, rate)
+
+    def _set_edge(self, u: int, v: int, edge: EdgeKey, rate: float) -> None:
+        previous = self._out_edges[u].get(edge)
+        if rate <= 0:
+            if previous is not None:
+                del self._out_edges[u][edge]
+                del self._in_edges[v][edge]
+                self._weight_increased(u, v, edge)
+            return
+        weight = -math.log(rate)
+        if previous is not None and previous[1] == weight:
+            return
+        self._out_edges[u][edge] = (v, weight)
+        self._in_edges[v][edge] = u
+        if previous is None or weight < previous[1]:
+            self._dirty.add(u)
+        else:
+            self._weight_increased(u, v, edge)
+
+    def _weight_increased(self, u: int, v: int, edge: EdgeKey) -> None:
+        # Distances derived through a costlier edge may now be too low: reset that shortest-path
+        # subtree to the virtual source and re-seed it from its in-neighbours.
+        if self._parent[v] == (u, edge):
+            self._invalidate_subtree(v)
+        else:
+            self._dirty.add(u)
+
+    def _invalidate_subtree(self, root: int) -> None:
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            stack.extend(self._children[node])
+            self._children[node] = set()
+            self._set_parent(node, None)
+            self._dist[node] = 0.0
+            self._dirty.add(node)
+            self._dirty.update(self._in_edges[node].values())
+
+    def _set_parent(self, node: int, parent: tuple[int, EdgeKey] | None) -> None:
+        previous = self._parent[node]
+        if previous is not None:
+            self._children[previous[0]].discard(node)
+        self._parent[node] = parent
+        if parent is not None:
+            self._children[parent[0]].add(node)
+
+    def _relax(self, seeds: set[int]) -> list[list[tuple[int, EdgeKey]]]:
+        node_count = len(self._nodes) + 1
+        queue = deque(seeds)
+        queued = set(seeds)
+        relax_counts = [0] * len(self._nodes)
+        frozen: set[int] = set()
+        cycles: list[list[tuple[int, EdgeKey]]] = []
+        while queue:
+            u = queue.popleft()
+            queued.discard(u)
+            if u in frozen:
+                continue
+            for edge, (v, weight) in self._out_edges[u].items():
+                if v in frozen:
+                    continue
+                candidate = self._dist[u] + weight
+                if candidate >= self._dist[v] - CYCLE_EPSILON:
+                    continue
+                self._dist[v] = candidate
+                self._set_parent(v, (u, edge))
+                relax_counts[v] += 1
+                if relax_counts[v] >= node_count:
+                    # A node relaxed more than |V| times sits on or behind a negative cycle.
+                    cycle = self._extract_cycle(v)
+                    if cycle is not None:
+                        cycles.append(cycle)
+                        frozen.update(node for node, _ in cycle)
+                    continue
+                if v not in queued:
+                    queue.append(v)
+                    queued.add(v)
+
+        # Reset the cycles' regions so the next pass starts from finite distances; they stay
+        # dirty so other loops through the same nodes are still found on the next pass.
+        for node in frozen:
+            self._invalidate_subtree(node)
+        return cycles
+
+    def _extract_cycle(self, start: int) -> list[tuple[int, EdgeKey]] | None:
+        node = start
+        for _ in range(len(self._nodes)):
+            parent = self._parent[node]
+            if parent is None:
+                return None
+            node = parent[0]
+
+        cycle: list[tuple[int, EdgeKey]] = []
+        seen: set[int] = set()
+        while node not in seen:
+            seen.add(node)
+            parent = self._parent[node]
+            if parent is None:
+                return None
+            cycle.append(parent)
+            node = parent[0]
+        # Parent pointers run backwards along the cycle.
+        cycle.reverse()
+        # Rotate to a canonical start so the same loop found from another node dedupes.
+        first = min(range(len(cycle)), key=lambda i: cycle[i][1])
+        cycle = cycle[first:] + cycle[:first]
+        return cycle if self._cycle_weight(cycle) < -CYCLE_EPSILON else None
+
+    def _cycle_weight(self, cycle: list[tuple[int, EdgeKey]]) -> float:
+        total = 0.0
+        for u, edge in cycle:
+            entry = self._out_edges[u].get(edge)
+            if entry is None:
+                return math.inf
+            total += entry[1]
+        return total
+
+    def _to_cycle(self, cycle: list[tuple[int, EdgeKey]]) -> ArbitrageCycle:
+        rate = math.exp(-self._cycle_weight(cycle))
+        return ArbitrageCycle(
+            nodes=tuple(f"{self._nodes[u][0]}:{self._nodes[u][1]}" for u, _ in cycle),
+            edges=tuple(":".join(edge) for _, edge in cycle),
+            rate=rate,
+            profit_pct=(rate - 1.0) * 100,
+        )
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+from dataclasses import dataclass, field
+from typing import Callable
+
+import websockets
+
+from src.collector import SnapshotCollector
+from src.config import V2PoolConfig
+from src.price_types import PriceSnapshot
+
+
+class HeadSubscriptionError(Exception):
+    pass
+
+
+class NewHeadsSubscriber:
+    def __init__(
+        self,
+        chain: str,
+        ws_url: str,
+        on_head: Callable[[str, int], None],
+        on_state: Callable[[str, bool], None] | None = None,
+        initial_backoff_sec: float = 0.5,
+        max_backoff_sec: float = 30.0,
+        open_timeout_sec: float = 10.0,
+    ) -> None:
+        self.chain = chain
+        self.ws_url = ws_url
+        self.on_head = on_head
+        self.on_state = on_state
+        self.initial_backoff_sec = initial_backoff_sec
+        self.max_backoff_sec = max_backoff_sec
+        self.open_timeout_sec = open_timeout_sec
+        self.connected = False
+        self.last_error: str | None = None
+
+    async def run(self) -> None:
+        backoff = self.initial_backoff_sec
+        while True:
+            try:
+                async with websockets.connect(self.ws_url, open_timeout=self.open_timeout_sec) as ws:
+                    await self._subscribe(ws)
+                    self._set_connected(True)
+                    backoff = self.initial_backoff_sec
+                    async for message in ws:
+                        block_number = _parse_head(message)
+                        if block_number is not None:
+                            self.on_head(self.chain, block_number)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.last_error = str(exc)
+            self._set_connected(False)
+
+            # Full jitter keeps several chains from reconnecting to one provider in lockstep.
+            await asyncio.sleep(random.uniform(0, backoff))
+            backoff = min(backoff * 2, self.max_backoff_sec)
+
+    async def _subscribe(self, ws) -> None:
+        await ws.send(json.dumps({"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]}))
+        reply = json.loads(await asyncio.wait_for(ws.recv(), timeout=self.open_timeout_sec))
+        if "error" in reply or not reply.get("result"):
+            raise HeadSubscriptionError(f"eth_subscribe failed on {self.chain}: {reply!r}")
+
+    def _set_connected(self, connected: bool) -> None:
+        if connected != self.connected:
+            self.connected = connected
+            if self.on_state is not None:
+                self.on_state(self.chain, connected)
+
+
+def _parse_head(message: str | bytes) -> int | None:
+    payload = json.loads(message)
+    if payload.get("method") != "eth_subscription":
+        return None
+    head = payload.get("params", {}).get("result", {})
+    number = head.get("number")
+    return int(number, 16) if isinstance(number, str) else None
+
+
+@dataclass
+class _ChainHeadState:
+    chain: str
+    pools: list[V2PoolConfig]
+    wake: asyncio.Event = field(default_factory=asyncio.Event)
+    latest_head: int | None = None
+    read_head: int | None = None
+    socket_up: bool = False
+    snapshots: list[PriceSnapshot] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+
+class HeadDrivenCollector:
+    def __init__(
+        self,
+        collect: SnapshotCollector,
+        pools: list[V2PoolConfig],
+        ws_urls: dict[str, str],
+        fallback_interval_sec: float = 5.0,
+    ) -> None:
+        self.collect = collect
+        self.fallback_interval_sec = fallback_interval_sec
+        pools_by_chain: dict[str, list[V2PoolConfig]] = {}
+        for pool in pools:
+            pools_by_chain.setdefault(pool.chain, []).append(pool)
+        self.states = {chain: _ChainHeadState(chain, chain_pools) for chain, chain_pools in pools_by_chain.items()}
+        for state in self.states.values():
+            # Read every chain once at startup without waiting for the first head.
+            state.wake.set()
+        self.subscribers = {
+            chain: NewHeadsSubscriber(chain, ws_urls[chain], self._on_head, self._on_socket_state)
+            for chain in self.states
+            if ws_urls.get(chain)
+        }
+        self._updated = asyncio.Event()
+        self._dirty: set[str] = set()
+
+    def snapshots(self) -> tuple[list[PriceSnapshot], list[str]]:
+        snapshots: list[PriceSnapshot] = []
+        errors: list[str] = []
+        for state in self.states.values():
+            snapshots.extend(state.snapshots)
+            errors.extend(state.errors)
+        return snapshots, errors
+
+    async def wait_for_update(self) -> set[str]:
+        await self._updated.wait()
+        self._updated.clear()
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    async def run(self) -> None:
+        tasks = [subscriber.run() for subscriber in self.subscribers.values()]
+        tasks.extend(self._read_chain(chain) for chain in self.states)
+        await asyncio.gather(*tasks)
+
+    def _on_head(self, chain: str, block_number: int) -> None:
+        state = self.states[chain]
+        if state.latest_head is None or block_number > state.latest_head:
+            state.latest_head = block_number
+            state.wake.set()
+
+    def _on_socket_state(self, chain: str, connected: bool) -> None:
+        state = self.states[chain]
+        state.socket_up = connected
+        # Wake the reader so it switches between push and fallback polling immediately.
+        state.wake.set()
+
+    async def _read_chain(self, chain: str) -> None:
+        state = self.states[chain]
+        while True:
+            if state.socket_up:
+                await state.wake.wait()
+            else:
+                try:
+                    await asyncio.wait_for(state.wake.wait(), timeout=self.fallback_interval_sec)
+                except asyncio.TimeoutError:
+                    pass
+            state.wake.clear()
+
+            # Heads that arrive while a read is running coalesce into one follow-up read.
+            if state.socket_up and state.latest_head == state.read_head:
+                continue
+            target_head = state.latest_head
+            try:
+                snapshots, errors = await self.collect(state.pools)
+            except Exception as exc:
+                snapshots, errors = state.snapshots, [f"{chain} head read failed error={exc}"]
+            state.read_head = target_head
+            state.snapshots = snapshots
+            state.errors = errors
+            subscriber = self.subscribers.get(chain)
+            if not state.socket_up and subscriber is not None and subscriber.last_error is not None:
+                state.errors = errors + [
+                    f"{chain} websocket down, polling fallback reason={subscriber.last_error}"
+                ]
+            self._dirty.add(chain)
+            self._updated.set()
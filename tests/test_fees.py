@@ -0,0 +1,95 @@
+import asyncio
+
+from src.config import ArbitrageConfig
+from src.fee_cache import FeeInputCache
+from src.fees import CHAIN_NATIVE_COINGECKO_ID, AsyncRealTimeFeeEstimator
+
+CFG = ArbitrageConfig(
+    volume=1000.0,
+    min_diff_pct=0.0,
+    min_net_profit=0.0,
+    min_net_profit_pct=0.0,
+    dex_fee_bps_per_swap=30.0,
+    gas_units_per_swap=150_000,
+    bridge_fee_url_template="http://bridge/quote?from={buy_chain}&to={sell_chain}",
+    bridge_fee_json_path="fee.usd",
+)
+ROUTES = [("ethereum", "arbitrum"), ("arbitrum", "ethereum"), ("ethereum", "base")]
+
+
+class _StubRpc:
+    def __init__(self, delay_sec: float = 0.0) -> None:
+        self.delay_sec = delay_sec
+        self.calls = 0
+
+    async def call(self, method: str, params: list) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay_sec)
+        return hex(10**9)
+
+
+class _StubHttp:
+    def __init__(self, delay_sec: float = 0.0, bridge_error: BaseException | None = None) -> None:
+        self.delay_sec = delay_sec
+        self.bridge_error = bridge_error
+        self.urls: list[str] = []
+        self.closed = False
+
+    async def get_json(self, url: str) -> dict:
+        self.urls.append(url)
+        await asyncio.sleep(self.delay_sec)
+        if url.startswith("http://bridge"):
+            if self.bridge_error is not None:
+                raise self.bridge_error
+            return {"fee": {"usd": 1.5}}
+        return {coingecko_id: {"usd": 2000.0} for coingecko_id in CHAIN_NATIVE_COINGECKO_ID.values()}
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+def _estimator(http: _StubHttp, rpc: _StubRpc, cache: FeeInputCache | None = None, **kwargs) -> AsyncRealTimeFeeEstimator:
+    clients = {chain: rpc for chain in ("ethereum", "arbitrum", "base")}
+    return AsyncRealTimeFeeEstimator(clients, http, CFG, cache=cache, **kwargs)
+
+
+def test_coalesced_lookups_count_one_miss_per_request() -> None:
+    cache = FeeInputCache()
+    http, rpc = _StubHttp(delay_sec=0.01), _StubRpc(delay_sec=0.01)
+    route_fees, errors = asyncio.run(_estimator(http, rpc, cache).estimate_routes(ROUTES, CFG.volume))
+    assert errors == [] and len(route_fees) == 3
+
+    native_requests = sum(not url.startswith("http://bridge") for url in http.urls)
+    assert (native_requests, rpc.calls) == (1, 3)
+    assert cache.counters["native_price"].misses == native_requests
+    assert cache.counters["gas_price"].misses == rpc.calls
+    assert cache.counters["bridge_quote"].misses == 3
+    # Six gas lookups across three routes, but only three chains: the rest joined a fetch.
+    assert cache.counters["gas_price"].hits == 3
+
+
+def test_request_timeout_is_not_reported_as_deadline() -> None:
+    http = _StubHttp(bridge_error=asyncio.TimeoutError())
+    _, errors = asyncio.run(_estimator(http, _StubRpc(), route_deadline_sec=5.0).estimate_routes(ROUTES[:1], CFG.volume))
+    assert errors == ["fee_quote_failed route=ethereum->arbitrum reason=request timed out"]
+
+    slow = _StubHttp(delay_sec=1.0)
+    _, errors = asyncio.run(_estimator(slow, _StubRpc(), route_deadline_sec=0.05).estimate_routes(ROUTES[:1], CFG.volume))
+    assert errors == ["fee_quote_failed route=ethereum->arbitrum reason=deadline 0.1s exceeded"]
+
+
+def test_aclose_cancels_fetches_left_in_flight() -> None:
+    async def run() -> tuple[list[asyncio.Task], _StubHttp]:
+        http = _StubHttp(delay_sec=10.0)
+        estimator = _estimator(http, _StubRpc(), FeeInputCache(), route_deadline_sec=0.05)
+        _, errors = await estimator.estimate_routes(ROUTES, CFG.volume)
+        assert len(errors) == 3
+        # The shielded fetches are still running after every route gave up on them.
+        tasks = list(estimator._in_flight.values())
+        assert tasks and not any(task.done() for task in tasks)
+        await estimator.aclose()
+        return tasks, http
+
+    tasks, http = asyncio.run(run())
+    assert all(task.cancelled() for task in tasks)
+    assert http.closed
@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from src.http_async import AsyncHttpClient
+
+
+async def _serve_slow(delay_sec: float) -> tuple[web.AppRunner, str]:
+    async def handler(request: web.Request) -> web.Response:
+        await asyncio.sleep(delay_sec)
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_get("/slow", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/slow"
+
+
+def test_get_json_applies_session_timeout_by_default() -> None:
+    async def run() -> float:
+        runner, url = await _serve_slow(3.0)
+        client = AsyncHttpClient(request_timeout=0.5)
+        start = time.perf_counter()
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await client.get_json(url)
+            return time.perf_counter() - start
+        finally:
+            await client.aclose()
+            await runner.cleanup()
+
+    assert asyncio.run(run()) < 2.0
+
+
+def test_get_json_per_call_timeout_overrides_session() -> None:
+    async def run() -> None:
+        runner, url = await _serve_slow(0.5)
+        client = AsyncHttpClient(request_timeout=0.1)
+        try:
+            assert await client.get_json(url, timeout=2.0) == {"ok": True}
+        finally:
+            await client.aclose()
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+
+
+def test_closed_client_does_not_reopen() -> None:
+    async def run() -> None:
+        runner, url = await _serve_slow(0.0)
+        client = AsyncHttpClient()
+        try:
+            assert await client.get_json(url) == {"ok": True}
+            await client.aclose()
+            with pytest.raises(RuntimeError, match="closed"):
+                await client.get_json(url)
+            assert client._session is not None and client._session.closed
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(run())
@@ -0,0 +1,148 @@
+import io
+import threading
+import time
+from datetime import datetime, timezone
+
+from src.output_sink import (
+    BLOCK_SNAPSHOTS,
+    BLOCK_SYMBOLS,
+    BinaryRenderer,
+    ConsoleRenderer,
+    CycleReport,
+    OutputSink,
+    iter_binary_frames,
+)
+from src.price_types import PriceSnapshot
+from src.ratio import compute_cross_chain_spreads
+from src.spread_stats import SpreadStats
+
+
+TIMESTAMP = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _snapshot(chain: str, dex: str = "uniswap", pool: int = 0, price: float = 2000.0) -> PriceSnapshot:
+    return PriceSnapshot(
+        timestamp=TIMESTAMP,
+        chain=chain,
+        dex=dex,
+        pool_address=f"0x{pool:040x}",
+        pair_key="WETH/USDC",
+        price_token1_per_token0=price,
+        block_number=1,
+        latency_ms=1.0,
+    )
+
+
+def _report(chain: str) -> CycleReport:
+    return CycleReport(timestamp=TIMESTAMP, snapshots=[_snapshot(chain)], errors=[])
+
+
+def _console_cycle(
+    renderer: ConsoleRenderer, snapshots: list[PriceSnapshot], spread_stats: list[SpreadStats] | None = None
+) -> list[str]:
+    report = CycleReport(
+        timestamp=TIMESTAMP,
+        snapshots=snapshots,
+        errors=[],
+        spreads=compute_cross_chain_spreads(snapshots),
+        spread_stats=spread_stats or [],
+    )
+    return renderer.render([report], 0).decode("utf-8").splitlines()
+
+
+class _FlakyStream(io.BytesIO):
+    def __init__(self, failures: int) -> None:
+        super().__init__()
+        self.failures = failures
+
+    def write(self, data: bytes) -> int:
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        return super().write(data)
+
+    def close(self) -> None:
+        self.data = self.getvalue()
+        super().close()
+
+
+class _StuckStream(io.BytesIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, data: bytes) -> int:
+        self.release.wait()
+        return super().write(data)
+
+
+def _wait_for(predicate, timeout_sec: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout_sec
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_binary_symbols_are_resent_after_failed_write() -> None:
+    stream = _FlakyStream(failures=1)
+    sink = OutputSink(BinaryRenderer(), stream)
+    sink.submit(_report("ethereum"))
+    _wait_for(lambda: sink.last_error is not None)
+    sink.submit(_report("bsc"))
+    sink.close()
+    assert sink.last_error == "disk full"
+
+    names: list[str] = []
+    decoded = []
+    for _cycle, _ts, blocks in iter_binary_frames(io.BytesIO(stream.data)):
+        names.extend(blocks.get(BLOCK_SYMBOLS, []))
+        decoded.extend(names[row["chain"]] for row in blocks[BLOCK_SNAPSHOTS])
+    assert decoded == ["bsc"]
+    assert names == ["ethereum", "uniswap", "0x" + "0" * 40, "WETH/USDC", "bsc"]
+
+
+def test_close_does_not_hang_on_stuck_stream_with_full_queue() -> None:
+    stream = _StuckStream()
+    sink = OutputSink(BinaryRenderer(), stream, max_pending_cycles=1)
+    for _ in range(5):
+        sink.submit(_report("ethereum"))
+
+    start = time.perf_counter()
+    sink.close(timeout_sec=0.3)
+    assert time.perf_counter() - start < 2.0
+    assert sink.last_error is not None and "did not finish" in sink.last_error
+    stream.release.set()
+
+
+def test_console_spreads_are_diffed_per_venue_pair() -> None:
+    # Two pools for the same pair on each chain: four spreads share one (pair, chain, chain) route.
+    snapshots = [
+        _snapshot("ethereum", "uniswap", 1, 2000.0),
+        _snapshot("ethereum", "sushiswap", 2, 2001.0),
+        _snapshot("arbitrum", "uniswap", 3, 2002.0),
+        _snapshot("arbitrum", "sushiswap", 4, 2003.0),
+    ]
+    renderer = ConsoleRenderer()
+    first = _console_cycle(renderer, snapshots)
+    assert "Changed spreads (4/4):" in first
+    rows = [line for line in first if line.startswith("  WETH/USDC") and "ratio=" in line]
+    assert len(set(rows)) == 4
+
+    for _ in range(2):
+        assert not any(line.startswith("Changed spreads") for line in _console_cycle(renderer, snapshots))
+
+    moved = snapshots[:3] + [_snapshot("arbitrum", "sushiswap", 4, 2010.0)]
+    assert "Changed spreads (2/4):" in _console_cycle(renderer, moved)
+
+
+def test_console_stats_attach_to_their_own_venue_pair() -> None:
+    snapshots = [
+        _snapshot("ethereum", "uniswap", 1, 2000.0),
+        _snapshot("arbitrum", "uniswap", 3, 2002.0),
+        _snapshot("arbitrum", "sushiswap", 4, 2003.0),
+    ]
+    stats = SpreadStats(
+        "WETH/USDC", "ethereum", f"0x{1:040x}", "arbitrum", f"0x{4:040x}", 40, -0.15, -0.1, 0.01, -5.0, 60.0, -0.1, 0.01
+    )
+    rows = [line for line in _console_cycle(ConsoleRenderer(), snapshots, [stats]) if "ratio=" in line]
+    assert len(rows) == 2
+    assert [row for row in rows if "z=-5.00" in row] == [row for row in rows if "sushiswap" in row]
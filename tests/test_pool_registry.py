@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from src.pool_registry import INDEX_VERSION, PoolIndex
+
+POOL = "0x" + "11" * 20
+TOKEN0 = "0x" + "22" * 20
+TOKEN1 = "0x" + "33" * 20
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        [],
+        {"version": INDEX_VERSION},
+        {"version": INDEX_VERSION, "pools": {}},
+        {"version": INDEX_VERSION, "pools": [], "tokens": {}},
+        {"version": INDEX_VERSION, "pools": {}, "tokens": None},
+        "not an index",
+    ],
+)
+def test_load_falls_back_to_empty_index_on_wrong_shape(tmp_path, payload) -> None:
+    path = tmp_path / "pool_index.json"
+    path.write_text(json.dumps(payload))
+    index = PoolIndex.load(path)
+    assert index.pools == {} and index.tokens == {}
+    assert index.pool_config("ethereum", "uniswap", POOL) is None
+
+
+def test_load_drops_malformed_entries_for_rediscovery(tmp_path) -> None:
+    path = tmp_path / "pool_index.json"
+    path.write_text(
+        json.dumps(
+            {
+                "version": INDEX_VERSION,
+                "pools": {f"ethereum:{POOL}": [POOL, TOKEN0, TOKEN1], f"ethereum:{TOKEN0}": [POOL]},
+                "tokens": {f"ethereum:{TOKEN0}": ["WETH", 18], f"ethereum:{TOKEN1}": ["USDC", "6"]},
+            }
+        )
+    )
+    index = PoolIndex.load(path)
+    assert list(index.pools) == [f"ethereum:{POOL}"]
+    assert list(index.tokens) == [f"ethereum:{TOKEN0}"]
+    assert index.dirty
+    # token1 has to be rediscovered before the pool resolves.
+    assert index.pool_config("ethereum", "uniswap", POOL) is None
+
+    index.tokens[f"ethereum:{TOKEN1}"] = ["USDC", 6]
+    index.save(path)
+    reloaded = PoolIndex.load(path)
+    assert not reloaded.dirty
+    assert reloaded.pool_config("ethereum", "uniswap", POOL).pair_key == "WETH/USDC"
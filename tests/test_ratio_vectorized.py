@@ -0,0 +1,86 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.config import ArbitrageConfig
+from src.price_types import FeeBreakdown, PriceSnapshot
+from src.ratio import compute_arbitrage_opportunities, compute_cross_chain_spreads
+from src.ratio_vectorized import (
+    compute_arbitrage_opportunities_vectorized,
+    compute_cross_chain_spreads_vectorized,
+)
+
+CHAINS = ["ethereum", "bsc", "polygon", "arbitrum", "base"]
+PAIRS = ["WETH/USDC", "WBTC/USDC", "LINK/WETH"]
+# Repeated values make tied prices, spreads and net profits common; 0 and negatives hit the guards.
+PRICES = [0.0, -1.0, 1.0, 1.0, 1.001, 1.01, 1.05, 0.99, 2000.0, 2000.0, 2010.5]
+
+
+def _random_snapshots(rng: random.Random) -> list[PriceSnapshot]:
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    snapshots = []
+    for index in range(rng.randint(0, 40)):
+        price = rng.choice(PRICES) if rng.random() < 0.6 else rng.uniform(-0.5, 3.0)
+        snapshots.append(
+            PriceSnapshot(
+                timestamp=start + timedelta(seconds=rng.randint(0, 5)),
+                chain=rng.choice(CHAINS),
+                dex=rng.choice(["uniswap", "sushiswap"]),
+                pool_address=f"0x{index:040x}",
+                pair_key=rng.choice(PAIRS),
+                price_token1_per_token0=price,
+                block_number=index,
+                latency_ms=1.0,
+            )
+        )
+    return snapshots
+
+
+def _random_route_fees(rng: random.Random) -> dict[tuple[str, str], FeeBreakdown]:
+    fees = {}
+    for buy_chain in CHAINS:
+        for sell_chain in CHAINS:
+            # Some routes have no quote at all.
+            if buy_chain == sell_chain or rng.random() < 0.2:
+                continue
+            total = rng.choice([0.0, 0.5, 0.5, 2.0, rng.uniform(0.0, 5.0)])
+            fees[(buy_chain, sell_chain)] = FeeBreakdown(
+                buy_chain=buy_chain,
+                sell_chain=sell_chain,
+                gas_buy_usd=total / 2,
+                gas_sell_usd=total / 2,
+                bridge_fee_usd=0.0,
+                dex_fee_usd=0.0,
+                total_fees_usd=total,
+            )
+    return fees
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_vectorized_spreads_match_reference(seed: int) -> None:
+    snapshots = _random_snapshots(random.Random(seed))
+    expected = compute_cross_chain_spreads(snapshots)
+
+    assert compute_cross_chain_spreads_vectorized(snapshots) == expected
+    assert compute_cross_chain_spreads_vectorized(snapshots, limit=5) == expected[:5]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_vectorized_opportunities_match_reference(seed: int) -> None:
+    rng = random.Random(seed)
+    snapshots = _random_snapshots(rng)
+    route_fees = _random_route_fees(rng)
+    cfg = ArbitrageConfig(
+        volume=rng.choice([100.0, 1000.0]),
+        min_diff_pct=rng.choice([0.0, 0.05, 0.5]),
+        min_net_profit=rng.choice([0.0, 0.1]),
+        min_net_profit_pct=rng.choice([0.0, 0.01]),
+        dex_fee_bps_per_swap=30.0,
+        gas_units_per_swap=150_000,
+        bridge_fee_url_template="",
+        bridge_fee_json_path="",
+    )
+
+    expected = compute_arbitrage_opportunities(snapshots, cfg, route_fees)
+    assert compute_arbitrage_opportunities_vectorized(snapshots, cfg, route_fees) == expected
@@ -0,0 +1,165 @@
+import asyncio
+import time
+
+import pytest
+from eth_abi import encode as abi_encode
+
+from src.multicall import AGGREGATE3_SELECTOR, GET_BLOCK_NUMBER_SELECTOR, MULTICALL3_ADDRESS, leading_block_number
+from src.rpc_batch import JsonRpcError
+from src.rpc_router import EndpointError, EndpointPool, HedgedAsyncJsonRpcClient, HedgedHTTPProvider
+
+PAIR = "0x" + "11" * 20
+GET_RESERVES = bytes.fromhex("0902f1ac")
+
+
+def _aggregate3(block: int, lead_with_block: bool = True) -> tuple[dict, str]:
+    calls = [(PAIR, True, GET_RESERVES), (PAIR, True, GET_RESERVES)]
+    returned = [(True, abi_encode(["uint112", "uint112", "uint32"], [1, 2, 3]))] * 2
+    if lead_with_block:
+        calls.insert(0, (MULTICALL3_ADDRESS, False, GET_BLOCK_NUMBER_SELECTOR))
+        returned.insert(0, (True, abi_encode(["uint256"], [block])))
+    data = AGGREGATE3_SELECTOR + abi_encode(["(address,bool,bytes)[]"], [calls])
+    result = abi_encode(["(bool,bytes)[]"], [returned])
+    return {"to": MULTICALL3_ADDRESS, "data": "0x" + data.hex()}, "0x" + result.hex()
+
+
+def _pool(urls: int = 2, **kwargs) -> EndpointPool:
+    return EndpointPool("ethereum", [f"http://node{i}" for i in range(urls)], 1, **kwargs)
+
+
+def test_leading_block_number_reads_the_multicall_block() -> None:
+    call, result = _aggregate3(123_456)
+    assert leading_block_number(bytes.fromhex(call["data"][2:]), bytes.fromhex(result[2:])) == 123_456
+
+    call, result = _aggregate3(123_456, lead_with_block=False)
+    assert leading_block_number(bytes.fromhex(call["data"][2:]), bytes.fromhex(result[2:])) is None
+    assert leading_block_number(GET_BLOCK_NUMBER_SELECTOR, b"") is None
+    assert leading_block_number(AGGREGATE3_SELECTOR + b"\x00" * 8, b"\x00" * 8) is None
+
+
+def test_multicall_response_from_lagging_endpoint_is_rejected() -> None:
+    pool = _pool(max_block_lag=3)
+    fresh, lagging = pool.endpoints
+    call, result = _aggregate3(100)
+    assert pool.check_response(fresh, [("eth_call", [call, "latest"])], [result]) == ""
+
+    call, result = _aggregate3(90)
+    assert "lagging at block 90" in pool.check_response(lagging, [("eth_call", [call, "latest"])], [result])
+    # A read pinned to an older block reports that block, not the node's head.
+    assert pool.check_response(lagging, [("eth_call", [call, hex(90)])], [result]) == ""
+
+
+def test_lagging_endpoint_that_never_failed_is_unhealthy() -> None:
+    pool = _pool(max_block_lag=3, retry_after_sec=15.0)
+    fresh, lagging = pool.endpoints
+    pool.observe_head(fresh, 100)
+    pool.observe_head(lagging, 90)
+    assert lagging.last_failure_at == 0.0
+    assert not pool.is_healthy(lagging)
+    assert pool.ranked() == [fresh, lagging]
+
+    # Once the reading is older than the cool-down the node is worth probing again.
+    lagging.head_seen_at -= 20.0
+    assert pool.is_healthy(lagging)
+
+
+class _StubClient:
+    def __init__(self, block: int, delay_sec: float = 0.0) -> None:
+        self.block = block
+        self.delay_sec = delay_sec
+        self.calls: list[str] = []
+
+    async def call(self, method: str, params: list) -> str:
+        if method == "eth_chainId":
+            return "0x1"
+        self.calls.append(method)
+        await asyncio.sleep(self.delay_sec)
+        return hex(self.block)
+
+    async def call_batch(self, calls: list) -> list:
+        return [await self.call(method, params) for method, params in calls]
+
+    async def aclose(self) -> None:
+        pass
+
+
+def _hedged_client(pool: EndpointPool, stubs: list[_StubClient]) -> HedgedAsyncJsonRpcClient:
+    client = HedgedAsyncJsonRpcClient(pool)
+    client._clients = {endpoint.url: stub for endpoint, stub in zip(pool.endpoints, stubs)}
+    return client
+
+
+def test_hedge_goes_to_second_endpoint_when_primary_is_slow() -> None:
+    pool = _pool(hedge_min_delay_sec=0.01)
+    primary, secondary = pool.endpoints
+    for _ in range(20):
+        pool.record_success(primary, 0.001)
+    pool.record_success(secondary, 0.002)
+    slow, fast = _StubClient(100, delay_sec=1.0), _StubClient(100)
+    client = _hedged_client(pool, [slow, fast])
+
+    async def run() -> tuple[str, float]:
+        start = time.perf_counter()
+        result = await client.call("eth_blockNumber", [])
+        return result, time.perf_counter() - start
+
+    result, elapsed = asyncio.run(run())
+    assert result == hex(100)
+    assert elapsed < 0.5
+    assert slow.calls == fast.calls == ["eth_blockNumber"]
+
+
+def test_lagging_answer_falls_through_to_next_endpoint() -> None:
+    pool = _pool(max_block_lag=3, hedge_enabled=False)
+    pool.observe_head(pool.endpoints[1], 100)
+    # The lagging node ranks first: it has never answered, so it has no latency yet.
+    pool.endpoints[1]._add_latency(0.5)
+    lagging, fresh = _StubClient(90), _StubClient(101)
+    client = _hedged_client(pool, [lagging, fresh])
+
+    assert asyncio.run(client.call("eth_blockNumber", [])) == hex(101)
+    assert lagging.calls == fresh.calls == ["eth_blockNumber"]
+    assert "lagging" in pool.endpoints[0].last_error
+
+
+def test_every_endpoint_failing_raises_endpoint_error() -> None:
+    pool = _pool(max_block_lag=3, hedge_enabled=False)
+    pool.observe_head(pool.endpoints[0], 200)
+    client = _hedged_client(pool, [_StubClient(90), _StubClient(91)])
+    with pytest.raises(EndpointError, match="every endpoint failed"):
+        asyncio.run(client.call("eth_blockNumber", []))
+
+
+class _StubProvider:
+    def __init__(self, response: dict) -> None:
+        self.response = response
+
+    def make_request(self, method: str, params: list) -> dict:
+        if method == "eth_chainId":
+            return {"result": "0x1"}
+        return self.response
+
+
+def test_sync_provider_rejects_lagging_multicall_and_closes_executor() -> None:
+    pool = _pool(max_block_lag=3, hedge_enabled=False)
+    pool.observe_head(pool.endpoints[1], 100)
+    pool.endpoints[1]._add_latency(0.5)
+    stale_call, stale_result = _aggregate3(90)
+    _, fresh_result = _aggregate3(100)
+    provider = HedgedHTTPProvider(pool)
+    provider._providers = {
+        pool.endpoints[0].url: _StubProvider({"result": stale_result}),
+        pool.endpoints[1].url: _StubProvider({"result": fresh_result}),
+    }
+
+    assert provider.make_request("eth_call", [stale_call, "latest"]) == {"result": fresh_result}
+    assert pool.endpoints[0].head_block == 90
+    provider.close()
+    with pytest.raises(RuntimeError):
+        provider._executor.submit(time.sleep, 0)
+
+
+def test_retryable_errors_are_not_served() -> None:
+    pool = _pool()
+    error = JsonRpcError("header not found", -32000)
+    assert pool.check_response(pool.endpoints[0], [("eth_call", [{}, "latest"])], [error]) == "header not found"
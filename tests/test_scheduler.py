@@ -0,0 +1,120 @@
+import asyncio
+from datetime import datetime, timezone
+
+from src.config import V2PoolConfig
+from src.price_types import PriceSnapshot
+from src.scheduler import AdaptivePollScheduler
+
+POOL = V2PoolConfig(
+    chain="ethereum",
+    dex="uniswap",
+    pool_address="0x" + "11" * 20,
+    token0_symbol="WETH",
+    token1_symbol="USDC",
+    token0_decimals=18,
+    token1_decimals=6,
+)
+ARBITRUM_POOLS = [
+    V2PoolConfig("arbitrum", "uniswap", f"0x{index:040x}", "WETH", "USDC", 18, 6) for index in range(1, 5)
+]
+
+
+def _snapshot(block: int) -> PriceSnapshot:
+    return PriceSnapshot(
+        timestamp=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        chain=POOL.chain,
+        dex=POOL.dex,
+        pool_address=POOL.pool_address,
+        pair_key=POOL.pair_key,
+        price_token1_per_token0=2000.0,
+        block_number=block,
+        latency_ms=1.0,
+    )
+
+
+def test_failed_polls_age_out_previous_snapshots() -> None:
+    calls = 0
+
+    async def collect(pools: list[V2PoolConfig]) -> tuple[list[PriceSnapshot], list[str]]:
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            raise ConnectionError("node down")
+        return [_snapshot(100)], []
+
+    async def run() -> tuple[list, list]:
+        scheduler = AdaptivePollScheduler(collect, [POOL], min_interval_sec=0.01, max_interval_sec=0.01)
+        task = asyncio.create_task(scheduler.run())
+        try:
+            while calls < 2:
+                await scheduler.wait_for_update()
+            # A poll that just failed still serves the prices of the one before it.
+            recent = scheduler.snapshots()
+            scheduler.states["ethereum"].collected_at -= 10.0
+            await scheduler.wait_for_update()
+            return recent, scheduler.snapshots()
+        finally:
+            task.cancel()
+
+    (recent, recent_errors), (aged, aged_errors) = asyncio.run(run())
+    assert [s.block_number for s in recent] == [100]
+    assert recent_errors == ["ethereum poll failed error=node down"]
+    assert aged == []
+    assert aged_errors == ["ethereum poll failed error=node down"]
+
+
+def test_intervals_stay_within_each_chains_rpc_budget() -> None:
+    async def collect(pools: list[V2PoolConfig]) -> tuple[list[PriceSnapshot], list[str]]:
+        return [], []
+
+    scheduler = AdaptivePollScheduler(
+        collect,
+        [POOL, *ARBITRUM_POOLS],
+        min_interval_sec=0.25,
+        max_interval_sec=30.0,
+        rpc_budget_per_min=120.0,
+        rpc_budgets_per_min={"ethereum": 600.0},
+        rpc_calls_per_poll=lambda pools: 1 + len(pools),
+    )
+    ethereum, arbitrum = scheduler.states["ethereum"], scheduler.states["arbitrum"]
+    # 2 calls per poll at 600/min, 5 calls per poll at the 120/min default.
+    assert ethereum.min_interval_sec == 0.25
+    assert arbitrum.min_interval_sec == 2.5
+
+    # A fast, busy chain would poll every 0.25s block; the budget floor holds it at 2.5s.
+    arbitrum.block_interval_sec, arbitrum.change_rate = 0.25, 1.0
+    assert scheduler._next_interval(arbitrum) == 2.5
+    # A quiet chain backs off up to max_interval_sec.
+    ethereum.block_interval_sec, ethereum.change_rate = 12.0, 0.0
+    assert scheduler._next_interval(ethereum) == 30.0
+
+
+def test_budget_floor_wins_over_max_interval() -> None:
+    async def collect(pools: list[V2PoolConfig]) -> tuple[list[PriceSnapshot], list[str]]:
+        return [], []
+
+    scheduler = AdaptivePollScheduler(
+        collect, ARBITRUM_POOLS, max_interval_sec=1.0, rpc_budget_per_min=6.0, rpc_calls_per_poll=len
+    )
+    state = scheduler.states["arbitrum"]
+    assert state.min_interval_sec == 40.0
+    assert scheduler._next_interval(state) == 40.0
+
+
+def test_polls_are_spaced_by_the_budget_floor() -> None:
+    polls: list[float] = []
+
+    async def collect(pools: list[V2PoolConfig]) -> tuple[list[PriceSnapshot], list[str]]:
+        polls.append(asyncio.get_running_loop().time())
+        return [], []
+
+    async def run() -> None:
+        # One call per poll at 300/min leaves 0.2s between polls even though the chain looks busy.
+        scheduler = AdaptivePollScheduler(collect, ARBITRUM_POOLS, min_interval_sec=0.01, rpc_budget_per_min=300.0)
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.7)
+        task.cancel()
+
+    asyncio.run(run())
+    assert 3 <= len(polls) <= 4
+    assert min(b - a for a, b in zip(polls, polls[1:])) >= 0.19
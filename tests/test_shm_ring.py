@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from src.shm_ring import SNAPSHOT_RECORD, ShmRing
+
+
+def _rows(first: int, count: int) -> np.ndarray:
+    rows = np.zeros(count, dtype=SNAPSHOT_RECORD)
+    rows["pool_index"] = np.arange(first, first + count)
+    return rows
+
+
+@pytest.fixture
+def ring():
+    ring = ShmRing.create(8)
+    yield ring
+    ring.close()
+
+
+def test_reads_across_the_wraparound(ring: ShmRing) -> None:
+    consumer = ShmRing.attach(ring.name, ring.capacity)
+    try:
+        ring.write(_rows(0, 6))
+        assert consumer.read()["pool_index"].tolist() == list(range(6))
+        # Slots 6, 7 and then 0..3 again.
+        ring.write(_rows(6, 6))
+        assert consumer.read()["pool_index"].tolist() == list(range(6, 12))
+        assert consumer.read().size == 0
+        assert consumer.dropped == 0
+    finally:
+        consumer.close()
+
+
+def test_overrun_keeps_newest_records_and_counts_dropped(ring: ShmRing) -> None:
+    consumer = ShmRing.attach(ring.name, ring.capacity)
+    try:
+        ring.write(_rows(0, 5))
+        ring.write(_rows(5, 7))
+        assert consumer.read()["pool_index"].tolist() == list(range(4, 12))
+        assert consumer.dropped == 4
+
+        # A batch larger than the ring keeps only its newest rows.
+        ring.write(_rows(12, 20))
+        assert consumer.read()["pool_index"].tolist() == list(range(24, 32))
+        assert consumer.dropped == 4 + 12
+    finally:
+        consumer.close()
+
+
+def test_torn_slot_is_dropped_not_returned(ring: ShmRing) -> None:
+    consumer = ShmRing.attach(ring.name, ring.capacity)
+    try:
+        ring.write(_rows(0, 3))
+        # The producer zeroes seq before rewriting a slot; a reader must skip it.
+        ring.records["seq"][1] = 0
+        assert consumer.read()["pool_index"].tolist() == [0, 2]
+        assert consumer.dropped == 1
+    finally:
+        consumer.close()
@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.config import ArbitrageConfig
+from src.price_types import FeeBreakdown, PriceSnapshot
+from src.ratio import compute_arbitrage_opportunities
+from src.sizing import filter_by_sizing, optimal_input, size_opportunities
+
+CFG = ArbitrageConfig(
+    volume=1000.0,
+    min_diff_pct=0.0,
+    min_net_profit=0.0,
+    min_net_profit_pct=0.0,
+    dex_fee_bps_per_swap=30.0,
+    gas_units_per_swap=150_000,
+    bridge_fee_url_template="",
+    bridge_fee_json_path="",
+)
+FEES = {
+    (buy, sell): FeeBreakdown(buy, sell, 1.0, 1.0, 0.0, 6.0, 8.0)
+    for buy, sell in (("ethereum", "arbitrum"), ("arbitrum", "ethereum"))
+}
+
+
+def _snapshot(chain: str, pool: int, pair_key: str, reserve0: float, reserve1: float) -> PriceSnapshot:
+    return PriceSnapshot(
+        timestamp=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        chain=chain,
+        dex="uniswap",
+        pool_address=f"0x{pool:040x}",
+        pair_key=pair_key,
+        price_token1_per_token0=reserve1 / reserve0,
+        block_number=1,
+        latency_ms=1.0,
+        reserve0=reserve0,
+        reserve1=reserve1,
+    )
+
+
+def test_optimal_input_matches_brute_force() -> None:
+    reserves = [np.array([v]) for v in (2_000_000.0, 1_000.0, 1_000.0, 2_100_000.0)]
+    x, out = optimal_input(*reserves, fee_factor=0.997)
+    grid = np.linspace(0.0, 2 * x[0], 20_001)
+    g = 0.997
+    token0 = g * grid * reserves[1] / (reserves[0] + g * grid)
+    profit = g * token0 * reserves[3] / (reserves[2] + g * token0) - grid
+    assert abs(out[0] - x[0] - profit.max()) < 1e-3 * profit.max()
+
+
+def test_sizing_skips_pairs_not_quoted_in_usd() -> None:
+    snapshots = [
+        _snapshot("ethereum", 1, "WETH/WBTC", 1_000.0, 50.0),
+        _snapshot("arbitrum", 2, "WETH/WBTC", 1_000.0, 55.0),
+    ]
+    assert compute_arbitrage_opportunities(snapshots, CFG, FEES)
+    assert size_opportunities(snapshots, CFG, FEES) == []
+    # Nothing could be sized, so nothing is filtered either.
+    opportunities = compute_arbitrage_opportunities(snapshots, CFG, FEES)
+    assert filter_by_sizing(opportunities, snapshots, []) == opportunities
+
+
+def test_price_impact_filters_shallow_pools_only() -> None:
+    # Same 2% spread; the shallow pair cannot absorb enough volume to pay the fixed fees.
+    snapshots = [
+        _snapshot("ethereum", 1, "WETH/USDC", 1_000.0, 2_000_000.0),
+        _snapshot("arbitrum", 2, "WETH/USDC", 1_000.0, 2_040_000.0),
+        _snapshot("ethereum", 3, "LINK/USDC", 10.0, 100.0),
+        _snapshot("arbitrum", 4, "LINK/USDC", 10.0, 102.0),
+    ]
+    opportunities = compute_arbitrage_opportunities(snapshots, CFG, FEES)
+    assert {opp.pair_key for opp in opportunities} == {"WETH/USDC", "LINK/USDC"}
+
+    sized = size_opportunities(snapshots, CFG, FEES)
+    assert [(opp.pair_key, opp.buy_pool) for opp in sized] == [("WETH/USDC", f"0x{1:040x}")]
+    assert sized[0].net_profit == sized[0].gross_profit - 2.0
+
+    kept = filter_by_sizing(opportunities, snapshots, sized)
+    assert [opp.pair_key for opp in kept] == ["WETH/USDC"]
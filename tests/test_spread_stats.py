@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+
+from src.config import ArbitrageConfig
+from src.price_types import FeeBreakdown, PriceSnapshot
+from src.ratio import compute_arbitrage_opportunities, compute_cross_chain_spreads
+from src.spread_stats import SpreadStatsTracker
+
+CFG = ArbitrageConfig(
+    volume=1000.0,
+    min_diff_pct=0.0,
+    min_net_profit=0.0,
+    min_net_profit_pct=0.0,
+    dex_fee_bps_per_swap=0.0,
+    gas_units_per_swap=0,
+    bridge_fee_url_template="",
+    bridge_fee_json_path="",
+)
+FEES = {
+    (buy, sell): FeeBreakdown(buy, sell, 0.0, 0.0, 0.0, 0.0, 0.0)
+    for buy, sell in (("ethereum", "arbitrum"), ("arbitrum", "ethereum"))
+}
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _snapshot(second: int, chain: str, pool: int, price: float) -> PriceSnapshot:
+    return PriceSnapshot(
+        timestamp=START + timedelta(seconds=second),
+        chain=chain,
+        dex="uniswap",
+        pool_address=f"0x{pool:040x}",
+        pair_key="WETH/USDC",
+        price_token1_per_token0=price,
+        block_number=second,
+        latency_ms=1.0,
+    )
+
+
+def _cycle(second: int, wide: float, narrow: float) -> list[PriceSnapshot]:
+    # One ethereum pool against two arbitrum pools with different structural basis.
+    return [
+        _snapshot(second, "ethereum", 1, 2000.0),
+        _snapshot(second, "arbitrum", 2, 2000.0 * (1 + wide)),
+        _snapshot(second, "arbitrum", 3, 2000.0 * (1 + narrow)),
+    ]
+
+
+def test_stats_and_filter_follow_each_venue_pair() -> None:
+    tracker = SpreadStatsTracker(halflife_sec=5.0, min_samples=5)
+    for second in range(20):
+        noise = 0.0005 if second % 2 else -0.0005
+        tracker.update(compute_cross_chain_spreads(_cycle(second, 0.03 + noise, 0.005 + noise)))
+    # The narrow pool jumps while the wide pool stays at its usual basis.
+    snapshots = _cycle(20, 0.0305, 0.02)
+    tracker.update(compute_cross_chain_spreads(snapshots))
+
+    eth, wide, narrow = (
+        (chain, f"0x{pool:040x}") for chain, pool in (("ethereum", 1), ("arbitrum", 2), ("arbitrum", 3))
+    )
+    wide_stats = tracker.stats("WETH/USDC", wide, eth)
+    narrow_stats = tracker.stats("WETH/USDC", narrow, eth)
+    assert (wide_stats.pool_a, narrow_stats.pool_a) == (wide[1], narrow[1])
+    assert wide_stats.mean_pct > 2.5 > 1.0 > narrow_stats.mean_pct
+    assert wide_stats.z_score < 2.0 < narrow_stats.z_score
+    assert tracker.z_score("WETH/USDC", eth, narrow) == -narrow_stats.z_score
+
+    opportunities = compute_arbitrage_opportunities(snapshots, CFG, FEES)
+    assert {opp.sell_pool for opp in opportunities} == {wide[1], narrow[1]}
+    kept = tracker.filter_opportunities(opportunities, min_z=2.0)
+    assert [opp.sell_pool for opp in kept] == [narrow[1]]
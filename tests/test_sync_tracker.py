@@ -0,0 +1,80 @@
+from src.config import V2PoolConfig
+from src.dex_uniswap_v2 import ReserveRead
+from src.sync_tracker import SyncEventReserveTracker
+
+POOL = V2PoolConfig(
+    chain="ethereum",
+    dex="uniswap",
+    pool_address="0x" + "11" * 20,
+    token0_symbol="WETH",
+    token1_symbol="USDC",
+    token0_decimals=0,
+    token1_decimals=0,
+)
+
+
+class _FakeChain:
+    # Stands in for both the node and the seed reader: a head plus the Sync logs of the canonical chain.
+    def __init__(self, head: int, reserves: tuple[int, int]) -> None:
+        self.block_number = head
+        self.reserves = reserves
+        self.logs: list[dict] = []
+        self.seeds = 0
+        self.eth = self
+
+    def sync(self, block: int, reserve0: int, reserve1: int, removed: bool = False) -> dict:
+        return {
+            "address": POOL.checksum_address,
+            "blockNumber": block,
+            "logIndex": 0,
+            "data": reserve0.to_bytes(32, "big") + reserve1.to_bytes(32, "big"),
+            "removed": removed,
+        }
+
+    def get_logs(self, params: dict) -> list[dict]:
+        return [
+            log
+            for log in self.logs
+            if params["fromBlock"] <= log["blockNumber"] <= params["toBlock"] and log["address"] in params["address"]
+        ]
+
+    def fetch_chain_reserves(self, chain: str, pools: list[V2PoolConfig]) -> list[ReserveRead]:
+        self.seeds += 1
+        return [ReserveRead(*self.reserves, self.block_number, 1.0) for _ in pools]
+
+
+def _prices(tracker: SyncEventReserveTracker) -> list[tuple[int, float]]:
+    return [(s.block_number, s.price_token1_per_token0) for s in tracker.fetch_chain_snapshots("ethereum", [POOL])]
+
+
+def test_reorged_sync_logs_are_replayed_from_the_window() -> None:
+    chain = _FakeChain(head=100, reserves=(10, 20_000))
+    tracker = SyncEventReserveTracker({"ethereum": chain}, chain, confirmation_depth=12)
+    assert _prices(tracker) == [(100, 2000.0)]
+
+    chain.block_number = 101
+    chain.logs = [chain.sync(101, 10, 21_000)]
+    assert _prices(tracker) == [(101, 2100.0)]
+
+    # Block 101 is reorged out: its Sync log is gone (or reported removed) and no replacement exists.
+    chain.block_number = 102
+    chain.logs = [chain.sync(101, 10, 21_000, removed=True)]
+    assert _prices(tracker) == [(102, 2000.0)]
+
+    chain.block_number = 103
+    chain.logs = [chain.sync(103, 10, 20_500)]
+    assert _prices(tracker) == [(103, 2050.0)]
+    # Reads between Syncs serve the same snapshot, block included.
+    chain.block_number = 104
+    assert _prices(tracker) == [(103, 2050.0)]
+    assert chain.seeds == 1
+
+
+def test_reorg_deeper_than_the_window_reseeds() -> None:
+    chain = _FakeChain(head=100, reserves=(10, 20_000))
+    tracker = SyncEventReserveTracker({"ethereum": chain}, chain, confirmation_depth=12)
+    _prices(tracker)
+
+    chain.block_number, chain.reserves = 80, (10, 19_000)
+    assert _prices(tracker) == [(80, 1900.0)]
+    assert chain.seeds == 2